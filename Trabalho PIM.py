@@ -1,266 +1,58 @@
+# Sistema Acadêmico (Trabalho PIM): menus de cada perfil, login e linha de comando.
+# O restante fica nos módulos ao lado: configuracao, metricas, entidades, armazenamento, estatisticas,
+# indices, sistema_academico, exportacao e servico.
 from datetime import datetime
-import json
-import os # Importa o módulo os para verificar a existência do arquivo
-
-# --- Configurações Globais 
-MEDIA_APROVACAO = 7.0
-PERCENTUAL_FREQUENCIA_MINIMA = 75.0
-ARQUIVO_DADOS = 'sistema_academico_dados.json' # Nome do arquivo para armazenamento
-
-# --- Funções Auxiliares de Conversão
-
-def to_dict(obj):
-    #Converte um objeto de classe em um dicionário para JSON
-    if isinstance(obj, (Usuario, Professor, Aluno, Disciplina)):
-        # Obtém o dicionário interno
-        data = obj.__dict__.copy()
-        data['__class__'] = obj.__class__.__name__
-       
-        if 'senha' in data:
-             data.pop('senha') 
-             
-        # Lógica especial para classes filhas
-        if isinstance(obj, Professor):
-            data['disciplinas_ministradas'] = obj.disciplinas_ministradas
-        
-        return data
-    raise TypeError(f"Objeto do tipo {type(obj)} não é serializável em JSON.")
-
-def from_dict(data):
-    #Converte um dicionário de volta para um objeto de classe
-    if '__class__' in data:
-        class_name = data.pop('__class__')
-     
-        # Reconstrução dos objetos
-        if class_name == 'Usuario':
-            # Usuários genéricos (admin/secretaria)
-            return Usuario(data['login'], '123', data['nome'], data['perfil'])
-        
-        elif class_name == 'Professor':
-            # Professor
-            professor = Professor(data['login'], '123', data['nome'])
-            professor.disciplinas_ministradas = data.get('disciplinas_ministradas', [])
-            return professor
-        
-        elif class_name == 'Aluno':
-            # Aluno
-            aluno = Aluno(data['login'], '123', data['nome'], data['ra'])
-            aluno.cursos = data.get('cursos', {})
-            aluno.frequencias = data.get('frequencias', {})
-            aluno.notas = data.get('notas', {})
-            aluno.dados_pessoais = data.get('dados_pessoais', {})
-            return aluno
-            
-        elif class_name == 'Disciplina':
-            # Disciplina
-            disc = Disciplina(data['id'], data['nome'], data.get('professor_login'))
-            disc.alunos_ra = data.get('alunos_ra', [])
-            return disc
-            
-    return data # Retorna o dicionário se não for um objeto de classe conhecido
-
-# --- JSON Encoder Customizado para lidar com classes
-class CustomEncoder(json.JSONEncoder):
-    def default(self, obj):
-        try:
-            # Tenta usar a função de conversão customizada
-            return to_dict(obj)
-        except TypeError:
-            # Fallback para o comportamento padrão do JSONEncoder
-            return json.JSONEncoder.default(self, obj)
-
-# --- Classes de Entidades
-
-class Usuario:
-    def __init__(self, login, senha, nome, perfil):
-        self.login = login
-        self.senha = senha
-        self.nome = nome
-        self.perfil = perfil
-
-class Disciplina:
-    def __init__(self, id_disciplina, nome, professor_login=None):
-        self.id = id_disciplina
-        self.nome = nome
-        self.professor_login = professor_login
-        self.alunos_ra = []
-
-class Professor(Usuario):
-    # Chama o construtor da classe base (Usuario) passando o perfil 'professor'.
-    def __init__(self, login, senha, nome):
-        super().__init__(login, senha, nome, 'professor')
-        self.disciplinas_ministradas = []
-
-class Aluno(Usuario):
-    #Chama o construtor da classe base (Usuario) passando o perfil 'aluno'.
-    def __init__(self, login, senha, nome, ra):
-        super().__init__(login, senha, nome, 'aluno') 
-        self.ra = ra
-        self.cursos = {} 
-        self.frequencias = {} 
-        self.notas = {} 
-        self.dados_pessoais = {} 
-
-    def calcular_media(self, id_disciplina):
-        notas_disciplina = self.notas.get(id_disciplina, [])
-        if notas_disciplina:
-            return sum(notas_disciplina) / len(notas_disciplina)
-        return 0.0
-
-    def verificar_aprovacao(self, id_disciplina):
-        media = self.calcular_media(id_disciplina)
-        aprovado_nota = media >= MEDIA_APROVACAO
-        frequencias = self.frequencias.get(id_disciplina, [])
-        total_aulas = len(frequencias)
-        total_presencas = sum(1 for f in frequencias if f['tipo'] == 'P')
-        freq_percentual = (total_presencas / total_aulas * 100) if total_aulas > 0 else 100.0
-        aprovado_frequencia = freq_percentual >= PERCENTUAL_FREQUENCIA_MINIMA
-
-        if not aprovado_frequencia:
-            return "REPROVADO POR FALTA", freq_percentual, media
-        if not aprovado_nota:
-            return "REPROVADO POR NOTA", freq_percentual, media
-        
-        return "APROVADO", freq_percentual, media
-
-# --- Gerenciamento de Dados (Simulação de DAO/Banco)
-class SistemaAcademico:
-    def __init__(self):
-        self.usuarios = {}  
-        self.alunos = {}  
-        self.professores = {} 
-        self.disciplinas = {} 
-        self.carregar_dados()
-        # Salva o estado inicial, garantindo que o arquivo seja criado com admin/secretaria se não existir
-        self.salvar_dados() 
-
-    def carregar_dados_iniciais(self):
-        # Usuários e Perfis Iniciais
-        admin = Usuario('admin', '123', 'Admin Master', 'administrador')
-        sec = Usuario('secretaria1', '123', 'Ana Secretária', 'secretaria')
-
-        self.usuarios = {u.login: u for u in [admin, sec]}
-        self.professores = {}
-        self.alunos = {}
-        self.disciplinas = {} 
-
-    def salvar_dados(self):
-        #Salva o estado atual do sistema em um arquivo JSON
-        
-        usuarios_base = {k: v for k, v in self.usuarios.items() if v.perfil in ['administrador', 'secretaria']}
-        
-        for login in list(usuarios_base.keys()):
-            if login in self.professores or login in {a.login for a in self.alunos.values()}:
-                usuarios_base.pop(login)
-                
-        data = {
-            'usuarios': usuarios_base,
-            'professores': self.professores,
-            'alunos': {k: v for k, v in self.alunos.items()},
-            'disciplinas': self.disciplinas
-        }
-        
-        try:
-            with open(ARQUIVO_DADOS, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=4, cls=CustomEncoder, ensure_ascii=False)
-            # print(f"\n[INFO] Dados salvos em {ARQUIVO_DADOS}.")
-        except Exception as e:
-            print(f"[ERRO] Falha ao salvar dados: {e}")
-
-    def carregar_dados(self):
-        #Carrega o estado do sistema a partir de um arquivo JSON
-        if not os.path.exists(ARQUIVO_DADOS):
-             print(f"[AVISO] Arquivo {ARQUIVO_DADOS} não encontrado. Iniciando com dados padrão.")
-             self.carregar_dados_iniciais()
-             return
-
-        try:
-            with open(ARQUIVO_DADOS, 'r', encoding='utf-8') as f:
-                data = json.load(f, object_hook=from_dict)
-                
-                # Reseta e popula as estruturas de dados
-                self.usuarios = {}
-                self.professores = data.get('professores', {})
-                self.alunos = data.get('alunos', {})
-                self.disciplinas = data.get('disciplinas', {})
-                
-                # 1. Popula o dicionário de usuários com Alunos e Professores
-                self.usuarios.update(self.professores) 
-                self.usuarios.update({a.login: a for a in self.alunos.values()}) 
-
-                # 2. Adiciona usuários base (Admin/Secretaria)
-                for login, user in data.get('usuarios', {}).items():
-                    self.usuarios[login] = user
-                
-            print(f"[INFO] Dados carregados de {ARQUIVO_DADOS} com sucesso.")
-            
-            # Garante que o admin/secretaria padrão estejam sempre presentes
-            if 'admin' not in self.usuarios:
-                 self.usuarios['admin'] = Usuario('admin', '123', 'Admin Master', 'administrador')
-                 self.usuarios['secretaria1'] = Usuario('secretaria1', '123', 'Ana Secretária', 'secretaria')
-                 print("[AVISO] Usuários iniciais (admin/secretaria) recriados em memória.")
-
-
-        except Exception as e:
-            print(f"[ERRO] Falha ao carregar dados: {e}. Iniciando com dados padrão.")
-            self.carregar_dados_iniciais()
-
-
-    def matricular_aluno(self, ra, id_disciplina):
-        aluno = self.alunos.get(ra)
-        disciplina = self.disciplinas.get(id_disciplina)
-
-        if aluno and disciplina and ra not in disciplina.alunos_ra:
-            disciplina.alunos_ra.append(ra)
-            aluno.cursos[id_disciplina] = {'status': 'Matriculado'}
-            self.salvar_dados() 
-            return True
-        return False
-        
-    def cancelar_matricula(self, ra, id_disciplina):
-        aluno = self.alunos.get(ra)
-        disciplina = self.disciplinas.get(id_disciplina)
-
-        if not aluno:
-            return False, "Aluno não encontrado."
-        if not disciplina:
-            return False, "Disciplina não encontrada."
-        if id_disciplina not in aluno.cursos:
-            return False, "Aluno não está matriculado nesta disciplina."
-
-        # 1. Remover do aluno (curso, frequências e notas)
-        del aluno.cursos[id_disciplina]
-        if id_disciplina in aluno.frequencias:
-            del aluno.frequencias[id_disciplina]
-        if id_disciplina in aluno.notas:
-            del aluno.notas[id_disciplina]
-
-        # 2. Remover da disciplina (lista de alunos_ra)
-        if ra in disciplina.alunos_ra:
-            disciplina.alunos_ra.remove(ra)
-            
-        self.salvar_dados() 
-        return True, "Matrícula cancelada com sucesso."
+import argparse
+import atexit
+import math
+import sys
+
+from configuracao import (ARQUIVO_BINARIO, ARQUIVO_DADOS, ARQUIVO_FRAGMENTOS, ARQUIVO_METRICAS, ARQUIVO_PERFIL,
+                          ARQUIVO_SQLITE, FORMATOS_HISTORICO, JANELA_GRAVACAO, LIMITE_VALORES_FAIXA,
+                          LIMITE_VARREDURA_BUSCA, MEDIA_APROVACAO, PERCENTUAL_FREQUENCIA_MINIMA, PORTA_SERVICO,
+                          TAMANHO_PAGINA)
+from metricas import METRICAS
+from entidades import Aluno, Disciplina, Professor, Usuario
+from armazenamento import ArmazenamentoBinario, ArmazenamentoFragmentado, ArmazenamentoJSON, ArmazenamentoSQLite
+from estatisticas import FAIXAS_FREQUENCIA, FAIXAS_NOTA, SITUACOES, SimuladorPolitica
+from indices import FILTROS_BUSCA
+from sistema_academico import (MATRICULA_CONFIRMADA, MATRICULA_EM_ESPERA, MATRICULA_RECUSADA, SistemaAcademico,
+                               converter_snapshot, migrar_json_para_sqlite)
+from exportacao import exportar_em_fluxo, exportar_historicos, texto_historico
+from servico import executar_servidor
 
 # --- Funções de Menu (Lógica de Interação)
 
 def exibir_menu(perfil):
     # Exibe o menu de acordo com o perfil do usuário
+    if METRICAS.ativo:
+        METRICAS.encerrar_acao() # A ação anterior terminou ao voltar ao menu
     print(f"\n--- Menu Principal ({perfil.upper()}) ---")
     if perfil == 'administrador':
         print("1. Gerenciar Usuários (Criar/Consultar)")
         print("2. Gerenciar Disciplinas (Criar/Atribuir Professor)")
         print("3. CANCELAR MATRÍCULA de Aluno") 
+        print("4. Verificar Consistência dos Índices")
+        print("5. Simular Política de Aprovação")
+        print("6. Métricas de Desempenho")
     elif perfil == 'secretaria':
         print("1. Cadastrar Aluno")
         print("2. Cadastrar Professor")
         print("3. Gerenciar Matrículas (Aluno em Disciplina)")
-        print("4. Listar Alunos e Professores")
+        print("4. Buscar e Listar Cadastros (Alunos, Professores, Disciplinas)")
         print("5. CANCELAR MATRÍCULA de Aluno") 
+        print("6. Relatório Estatístico de Turma")
+        print("7. Vagas e Lista de Espera de Disciplina")
+        print("8. Matrículas em Lote (CSV)")
+        print("9. Exportar Históricos Escolares de Todos os Alunos")
+        print("10. Faltas por Período (Todas as Disciplinas)")
     elif perfil == 'professor':
         print("1. Consultar Minhas Turmas e Alunos")
         print("2. Lançar Notas")
         print("3. Registrar Frequências")
+        print("4. Lançar Notas da Turma em Lote (CSV)")
+        print("5. Relatório Estatístico da Turma")
+        print("6. Faltas das Turmas por Período")
     elif perfil == 'aluno':
         print("1. Realizar Matrícula em Disciplina")
         print("2. Consultar Notas e Média")
@@ -268,7 +60,103 @@ def exibir_menu(perfil):
         print("4. Atualizar Dados Pessoais")
         print("5. Emitir Histórico Escolar")
     print("0. Sair / Fazer Logout")
-    return input("Escolha uma opção: ")
+    opcao = input("Escolha uma opção: ")
+    if METRICAS.ativo and opcao != '0':
+        METRICAS.iniciar_acao(f'menu.{perfil}.{opcao}')
+    return opcao
+
+# FUNÇÕES AUXILIARES PARA ENTRADA EM LOTE (arquivo CSV ou linhas digitadas)
+def separar_campos(texto):
+    # Aceita ';' (padrão das planilhas em português), ',' ou tabulação como separador
+    for separador in (';', '\t', ','):
+        if separador in texto:
+            return [campo.strip() for campo in texto.split(separador)]
+    return [texto.strip()]
+
+def ler_linhas_csv(caminho):
+    with open(caminho, 'r', encoding='utf-8-sig', newline='') as f:
+        conteudo = f.read().splitlines()
+    linhas = [separar_campos(texto) for texto in conteudo if texto.strip()]
+    # Ignora o cabeçalho, se houver
+    if linhas and linhas[0][0].strip().upper() == 'RA':
+        linhas = linhas[1:]
+    return linhas
+
+def ler_linhas_digitadas(formato):
+    print(f"Digite uma linha por registro ({formato}); linha vazia para terminar:")
+    linhas = []
+    while True:
+        texto = input("> ")
+        if not texto.strip():
+            return linhas
+        linhas.append(separar_campos(texto))
+
+# FUNÇÃO AUXILIAR PARA O RELATÓRIO ESTATÍSTICO DE TURMA (Professor/Secretaria)
+def exibir_relatorio_turma(sistema, disc_id):
+    relatorio = sistema.estatisticas_disciplina(disc_id)
+    if relatorio is None:
+        print("ERRO: Disciplina não encontrada.")
+        return
+    print(f"\n--- Relatório da Turma: {sistema.disciplinas[disc_id].nome} ({disc_id}) ---")
+    print(f"Alunos matriculados: {relatorio['alunos']} | Sem notas lançadas: {relatorio['sem_notas']}")
+    print(f"Média: {relatorio['media']:.2f} | Mediana: {relatorio['mediana']:.2f} | Desvio padrão: {relatorio['desvio_padrao']:.2f}")
+    print("Distribuição das médias:")
+    for i, quantidade in enumerate(relatorio['histograma_notas']):
+        print(f"   {FAIXAS_NOTA[i]:4.1f} a {FAIXAS_NOTA[i + 1]:4.1f}: {quantidade}")
+    print(f"Frequência média: {relatorio['frequencia_media']:.2f}%")
+    print("Distribuição da frequência:")
+    for i, quantidade in enumerate(relatorio['histograma_frequencia']):
+        print(f"   {FAIXAS_FREQUENCIA[i]:5.1f}% a {FAIXAS_FREQUENCIA[i + 1]:5.1f}%: {quantidade}")
+    print("Situação:")
+    for situacao, quantidade in relatorio['situacoes'].items():
+        print(f"   {situacao}: {quantidade}")
+
+# FUNÇÃO AUXILIAR PARA SIMULAÇÃO DE POLÍTICA DE APROVAÇÃO (Admin)
+def ler_faixa(texto, padrao):
+    # "inicio:fim:passo" -> lista de valores (fim incluído). Levanta ValueError se a faixa for inválida.
+    entrada = input(f"{texto} [{padrao}]: ").strip() or padrao
+    inicio, fim, passo = (float(v.replace(',', '.')) for v in entrada.split(':'))
+    if not all(math.isfinite(v) for v in (inicio, fim, passo)):
+        raise ValueError("use números finitos")
+    if passo <= 0:
+        raise ValueError("o passo deve ser maior que zero")
+    if inicio > fim:
+        raise ValueError("o início deve ser menor ou igual ao fim")
+    quantidade = int((fim - inicio) / passo + 1e-9) + 1
+    if quantidade > LIMITE_VALORES_FAIXA:
+        raise ValueError(f"a faixa teria {quantidade} valores (máximo {LIMITE_VALORES_FAIXA}); aumente o passo")
+    return [round(inicio + i * passo, 4) for i in range(quantidade)]
+
+def logica_simular_politica(sistema):
+    print("\n[Admin] Simular Política de Aprovação")
+    simulador = SimuladorPolitica(sistema)
+    print(f"{len(simulador)} matrícula(s) carregada(s). Política atual: média {MEDIA_APROVACAO} e frequência {PERCENTUAL_FREQUENCIA_MINIMA}%.")
+    print("1. Comparar uma política candidata com a atual")
+    print("2. Varredura de uma grade de limites")
+    modo = input("Escolha: ")
+
+    try:
+        if modo == '1':
+            media = float(input("Média mínima candidata: ").replace(',', '.'))
+            frequencia = float(input("Frequência mínima candidata (%): ").replace(',', '.'))
+            resultado = simulador.comparar(media, frequencia)
+            for situacao in SITUACOES:
+                print(f"   {situacao}: {resultado['atual'][situacao]} -> {resultado['candidata'][situacao]}")
+            print(f"Matrículas que mudam de situação: {resultado['mudancas']} "
+                  f"(passam a aprovar: {resultado['passam_a_aprovar']}, passam a reprovar: {resultado['passam_a_reprovar']})")
+            for id_disc, quantidade in sorted(resultado['por_disciplina'].items(), key=lambda item: -item[1]):
+                print(f"   {id_disc}: {quantidade} aluno(s) mudam de situação")
+        elif modo == '2':
+            medias = ler_faixa("Médias mínimas (inicio:fim:passo)", "5:8:0.5")
+            frequencias = ler_faixa("Frequências mínimas (inicio:fim:passo)", "60:85:5")
+            print(f"{'Média':>6} {'Freq.':>6} {'Aprov.':>8} {'Rep.Nota':>9} {'Rep.Falta':>10}")
+            for r in simulador.varrer(medias, frequencias):
+                print(f"{r['media_minima']:>6.2f} {r['frequencia_minima']:>5.1f}% {r['APROVADO']:>8} "
+                      f"{r['REPROVADO POR NOTA']:>9} {r['REPROVADO POR FALTA']:>10}")
+        else:
+            print("Opção inválida.")
+    except ValueError as e:
+        print(f"ERRO: Entrada inválida ({e}). Digite números (faixas no formato inicio:fim:passo).")
 
 # FUNÇÃO AUXILIAR PARA CANCELAR MATRÍCULA (Reutilizável)
 def logica_cancelar_matricula(sistema):
@@ -282,11 +170,113 @@ def logica_cancelar_matricula(sistema):
     else:
         print(f"ERRO: {mensagem}")
 
+def formatar_cadastro(sistema, tipo, entidade):
+    if tipo == 'aluno':
+        return f"RA: {entidade.ra} | Nome: {entidade.nome}"
+    if tipo == 'professor':
+        return f"Login: {entidade.login} | Nome: {entidade.nome} | Disciplinas: {', '.join(entidade.disciplinas_ministradas) if entidade.disciplinas_ministradas else 'Nenhuma'}"
+    prof_nome = sistema.professores[entidade.professor_login].nome if entidade.professor_login in sistema.professores else 'Não Atribuído'
+    vagas = f"{len(entidade.alunos_ra)}/{entidade.capacidade}" if entidade.capacidade is not None else len(entidade.alunos_ra)
+    espera = f" | Espera: {len(entidade.lista_espera)}" if entidade.lista_espera else ''
+    return f"ID: {entidade.id} | Nome: {entidade.nome} | Professor: {prof_nome} | Alunos: {vagas}{espera}"
+
+def logica_listar_cadastros(sistema):
+    # Listagem paginada: só a página exibida é consultada (e, nas disciplinas, só os professores dela)
+    print("\n[Secretaria] Busca e Listagem de Cadastros")
+    print(f"Cadastrados: {len(sistema.alunos)} aluno(s), {len(sistema.professores)} professor(es), "
+          f"{len(sistema.disciplinas)} disciplina(s).")
+    tipo = {'1': 'aluno', '2': 'professor', '3': 'disciplina'}.get(
+        input("Listar (1) Alunos, (2) Professores ou (3) Disciplinas: ").strip())
+    if not tipo:
+        print("ERRO: Opção inválida.")
+        return
+    consulta = input("Trecho do nome, RA, login ou ID (vazio para todos): ").strip()
+
+    filtros = list(FILTROS_BUSCA[tipo].items())
+    for i, (_, (descricao, _)) in enumerate(filtros, 1):
+        print(f"   {i}. {descricao}")
+    escolha = input("Filtro (número, vazio para nenhum): ").strip()
+    filtro = None
+    if escolha:
+        if not escolha.isdigit() or not 1 <= int(escolha) <= len(filtros):
+            print("ERRO: Filtro inválido.")
+            return
+        filtro = filtros[int(escolha) - 1][0]
+    ordem = {'1': 'cadastro', '2': 'nome', '3': 'chave'}.get(
+        input("Ordenar por (1) cadastro, (2) nome ou (3) RA/login/ID [1]: ").strip() or '1')
+    if not ordem:
+        print("ERRO: Ordem inválida.")
+        return
+
+    pagina = 0
+    while True:
+        entidades, ha_mais, parcial = sistema.buscar(tipo, consulta, filtro, ordem, pagina * TAMANHO_PAGINA, TAMANHO_PAGINA)
+        print(f"\n--- Página {pagina + 1} ---")
+        if not entidades:
+            print("Nenhum cadastro encontrado.")
+        for entidade in entidades:
+            print(formatar_cadastro(sistema, tipo, entidade))
+        if parcial:
+            print(f"[AVISO] Busca interrompida depois de {LIMITE_VARREDURA_BUSCA} cadastros descartados: "
+                  f"o resultado pode estar incompleto. Use um trecho maior ou outro filtro.")
+        comandos = ("Enter para a próxima página, " if ha_mais else "") + ("'a' para a anterior, " if pagina else "")
+        comando = input(f"{comandos}'0' para voltar: ").strip().lower()
+        if comando == '' and ha_mais:
+            pagina += 1
+        elif comando == 'a' and pagina:
+            pagina -= 1
+        else:
+            break
+
+def logica_faltas_periodo(sistema, permitidas=None):
+    # Faltas num período pelo índice de aulas por data; permitidas: disciplinas do professor (None = todas)
+    id_disc = input("ID da disciplina (vazio para todas" + (" as suas" if permitidas is not None else "") + "): ").strip()
+    if id_disc and (id_disc not in sistema.disciplinas or (permitidas is not None and id_disc not in permitidas)):
+        print("ERRO: Disciplina não encontrada" + (" ou não atribuída a você." if permitidas is not None else "."))
+        return
+    desde = input("Data inicial (AAAA-MM-DD ou DD/MM/AAAA; vazio = últimos 7 dias): ").strip()
+    ate = input("Data final, inclusive (vazio = sem limite; a mesma data inicial = um único dia): ").strip()
+
+    disciplinas = [id_disc] if id_disc else (list(permitidas) if permitidas is not None else [None])
+    aulas, faltas = [], {}
+    try:
+        for disciplina in disciplinas:
+            aulas.extend(sistema.aulas_no_periodo(desde, ate, disciplina))
+            for ra, lista in sistema.faltas_por_aluno(desde, ate, disciplina).items():
+                faltas.setdefault(ra, []).extend(lista)
+    except ValueError as e:
+        print(f"ERRO: {e}")
+        return
+
+    print(f"\n{len(aulas)} aula(s) no período, {sum(len(lista) for lista in faltas.values())} falta(s) "
+          f"de {len(faltas)} aluno(s).")
+    if not faltas:
+        return
+    # Quem mais faltou primeiro
+    ras = sorted(faltas, key=lambda ra: (-len(faltas[ra]), ra))
+    pagina = 0
+    while True:
+        print(f"\n--- Página {pagina + 1} ---")
+        for ra in ras[pagina * TAMANHO_PAGINA:(pagina + 1) * TAMANHO_PAGINA]:
+            aluno = sistema.alunos.get(ra)
+            detalhes = ', '.join(f"{id_aula} {momento:%d/%m/%Y %H:%M}" for momento, id_aula in sorted(faltas[ra]))
+            print(f"RA: {ra} | Nome: {aluno.nome if aluno else '(não encontrado)'} | {len(faltas[ra])} falta(s): {detalhes}")
+        ha_mais = (pagina + 1) * TAMANHO_PAGINA < len(ras)
+        comandos = ("Enter para a próxima página, " if ha_mais else "") + ("'a' para a anterior, " if pagina else "")
+        comando = input(f"{comandos}'0' para voltar: ").strip().lower()
+        if comando == '' and ha_mais:
+            pagina += 1
+        elif comando == 'a' and pagina:
+            pagina -= 1
+        else:
+            break
+
 
 # --- Perfis
 
 def menu_administrador(sistema):
     while True:
+        sistema.atualizar()
         opcao = exibir_menu('administrador')
         if opcao == '1':
             print("\n[Admin] Criar Novo Usuário")
@@ -302,26 +292,26 @@ def menu_administrador(sistema):
                 ra = input("RA do aluno: ")
                 
                 novo_usuario = Aluno(login, senha, nome, ra)
-                sistema.alunos[ra] = novo_usuario
             elif perfil == 'professor':
                 
                 novo_usuario = Professor(login, senha, nome)
-                sistema.professores[login] = novo_usuario
             elif perfil in ['secretaria', 'administrador']:
                 novo_usuario = Usuario(login, senha, nome, perfil)
             else:
                 print("ERRO: Perfil inválido.")
                 continue
             
-            sistema.usuarios[login] = novo_usuario
+            sistema.cadastrar_usuario(novo_usuario)
             print(f"Usuário {nome} ({perfil.upper()}) criado com sucesso.")
-            sistema.salvar_dados() 
             
         elif opcao == '2':
             print("\n[Admin] Gerenciar Disciplinas")
             id_disc = input("ID da nova disciplina (Ex: PORT101): ")
             if id_disc in sistema.disciplinas:
-                print("ERRO: Disciplina já existe.")
+                novo_nome = input(f"Disciplina já existe ({sistema.disciplinas[id_disc].nome}). Novo nome para renomeá-la (deixe vazio para manter): ")
+                if novo_nome:
+                    sistema.renomear_disciplina(id_disc, novo_nome)
+                    print(f"Disciplina {id_disc} renomeada para {novo_nome}.")
                 continue
 
             nome_disc = input("Nome da disciplina: ")
@@ -329,7 +319,6 @@ def menu_administrador(sistema):
             
             if prof_login and prof_login in sistema.professores:
                 disciplina = Disciplina(id_disc, nome_disc, prof_login)
-                sistema.professores[prof_login].disciplinas_ministradas.append(id_disc)
                 print(f"Disciplina {nome_disc} criada e atribuída a {prof_login}.")
             elif prof_login and prof_login not in sistema.professores:
                  disciplina = Disciplina(id_disc, nome_disc)
@@ -338,12 +327,33 @@ def menu_administrador(sistema):
                  disciplina = Disciplina(id_disc, nome_disc)
                  print(f"Disciplina {nome_disc} criada. Professor não atribuído.")
 
-            sistema.disciplinas[id_disc] = disciplina
-            sistema.salvar_dados() 
+            sistema.cadastrar_disciplina(disciplina)
 
         elif opcao == '3':
             logica_cancelar_matricula(sistema)
 
+        elif opcao == '4':
+            print("\n[Admin] Verificar Consistência dos Índices")
+            divergencias = sistema.indices.verificar_consistencia()
+            if not divergencias:
+                print("Índices consistentes com os dados.")
+                continue
+            for divergencia in divergencias:
+                print(f" - {divergencia}")
+            if input("Reconstruir os índices a partir dos dados (S/N)? ").upper() == 'S':
+                sistema.indices.reconstruir()
+                print("Índices reconstruídos.")
+
+        elif opcao == '5':
+            logica_simular_politica(sistema)
+
+        elif opcao == '6':
+            print("\n[Admin] Métricas de Desempenho")
+            if METRICAS.ativo:
+                METRICAS.exibir()
+            else:
+                print("[AVISO] Métricas desligadas. Inicie o sistema com --metricas para coletá-las.")
+
         elif opcao == '0':
             break
         else:
@@ -351,6 +361,7 @@ def menu_administrador(sistema):
 
 def menu_secretaria(sistema):
     while True:
+        sistema.atualizar()
         opcao = exibir_menu('secretaria')
         if opcao == '1':
             print("\n[Secretaria] Cadastrar Aluno (Criar Usuário e Objeto Aluno)")
@@ -366,10 +377,8 @@ def menu_secretaria(sistema):
             senha = input("Senha inicial: ")
             
             novo_aluno = Aluno(login, senha, nome, ra)
-            sistema.usuarios[login] = novo_aluno
-            sistema.alunos[ra] = novo_aluno
+            sistema.cadastrar_usuario(novo_aluno)
             print(f"Aluno {nome} (RA: {ra}) cadastrado com sucesso.")
-            sistema.salvar_dados() 
 
         elif opcao == '2':
             print("\n[Secretaria] Cadastrar Professor (Criar Usuário e Objeto Professor)")
@@ -381,10 +390,8 @@ def menu_secretaria(sistema):
             senha = input("Senha inicial: ")
          
             novo_professor = Professor(login, senha, nome)
-            sistema.usuarios[login] = novo_professor
-            sistema.professores[login] = novo_professor
+            sistema.cadastrar_usuario(novo_professor)
             print(f"Professor {nome} (Login: {login}) cadastrado com sucesso.")
-            sistema.salvar_dados() 
 
         elif opcao == '3':
             print("\n[Secretaria] Gerenciar Matrículas")
@@ -395,30 +402,78 @@ def menu_secretaria(sistema):
                 print("ERRO: Aluno não encontrado.")
             elif disciplina_id not in sistema.disciplinas:
                 print("ERRO: Disciplina não encontrada.")
-            elif ra in sistema.disciplinas.get(disciplina_id, {}).alunos_ra:
+            elif sistema.esta_matriculado(ra, disciplina_id):
                 print("ERRO: Aluno já matriculado nesta disciplina.")
             else:
-                if sistema.matricular_aluno(ra, disciplina_id):
+                situacao, mensagem = sistema.matricular_aluno(ra, disciplina_id)
+                if situacao == MATRICULA_CONFIRMADA:
                     print(f"Aluno {ra} matriculado na disciplina {disciplina_id} com sucesso.")
+                elif situacao == MATRICULA_EM_ESPERA:
+                    print(f"AVISO: {mensagem}")
                 else:
-                    print("ERRO: Falha na matrícula.")
+                    print(f"ERRO: {mensagem}")
             
         elif opcao == '4':
-            print("\n[Secretaria] Listagem de Cadastros:")
-            print(f"--- ALUNOS ({len(sistema.alunos)}) ---")
-            for ra, aluno in sistema.alunos.items():
-                print(f"RA: {ra} | Nome: {aluno.nome}")
-            print(f"\n--- PROFESSORES ({len(sistema.professores)}) ---")
-            for login, prof in sistema.professores.items():
-                print(f"Login: {login} | Nome: {prof.nome} | Disciplinas: {', '.join(prof.disciplinas_ministradas) if prof.disciplinas_ministradas else 'Nenhuma'}")
-            print(f"\n--- DISCIPLINAS ({len(sistema.disciplinas)}) ---")
-            for id_disc, disc in sistema.disciplinas.items():
-                 prof_nome = sistema.professores.get(disc.professor_login).nome if disc.professor_login in sistema.professores else 'Não Atribuído'
-                 print(f"ID: {id_disc} | Nome: {disc.nome} | Professor: {prof_nome} | Alunos: {len(disc.alunos_ra)}")
-
+            logica_listar_cadastros(sistema)
 
         elif opcao == '5':
             logica_cancelar_matricula(sistema)
+
+        elif opcao == '6':
+            print("\n[Secretaria] Relatório Estatístico de Turma")
+            exibir_relatorio_turma(sistema, input("ID da disciplina: "))
+
+        elif opcao == '7':
+            print("\n[Secretaria] Vagas e Lista de Espera de Disciplina")
+            disciplina_id = input("ID da disciplina: ")
+            disciplina = sistema.disciplinas.get(disciplina_id)
+            if not disciplina:
+                print("ERRO: Disciplina não encontrada.")
+                continue
+            limite = 'sem limite' if disciplina.capacidade is None else disciplina.capacidade
+            print(f"Matriculados: {len(disciplina.alunos_ra)} | Capacidade: {limite}")
+            print(f"Lista de espera ({len(disciplina.lista_espera)}): {', '.join(disciplina.lista_espera) or 'vazia'}")
+            entrada = input("Nova capacidade (número, 0 para remover o limite, vazio para manter): ").strip()
+            if not entrada:
+                continue
+            try:
+                capacidade = int(entrada) or None
+            except ValueError:
+                print("ERRO: Capacidade inválida.")
+                continue
+            sucesso, mensagem = sistema.definir_capacidade(disciplina_id, capacidade)
+            print(mensagem if sucesso else f"ERRO: {mensagem}")
+
+        elif opcao == '8':
+            print("\n[Secretaria] Matrículas em Lote")
+            caminho = input("Arquivo CSV (RA;disciplina) ou vazio para digitar as linhas: ").strip()
+            try:
+                linhas = ler_linhas_csv(caminho) if caminho else ler_linhas_digitadas("RA;disciplina")
+            except OSError as e:
+                print(f"ERRO: Não foi possível ler o arquivo: {e}")
+                continue
+
+            pares = [linha[:2] for linha in linhas if len(linha) >= 2]
+            contagem = {MATRICULA_CONFIRMADA: 0, MATRICULA_EM_ESPERA: 0, MATRICULA_RECUSADA: 0}
+            for ra, disciplina_id, situacao, mensagem in sistema.matricular_lote(pares):
+                contagem[situacao] += 1
+                if situacao != MATRICULA_CONFIRMADA:
+                    print(f"RA {ra} em {disciplina_id}: {mensagem}")
+            print(f"{contagem[MATRICULA_CONFIRMADA]} matrícula(s) realizada(s), {contagem[MATRICULA_EM_ESPERA]} em lista de espera, "
+                  f"{contagem[MATRICULA_RECUSADA] + len(linhas) - len(pares)} recusada(s).")
+
+        elif opcao == '9':
+            print("\n[Secretaria] Exportar Históricos Escolares")
+            diretorio = input("Diretório de destino: ").strip()
+            formatos = [f.strip().lower() for f in input(f"Formatos ({', '.join(FORMATOS_HISTORICO)}; vazio para todos): ").split(',') if f.strip()]
+            if not diretorio or any(f not in FORMATOS_HISTORICO for f in formatos):
+                print("ERRO: Diretório ou formato inválido.")
+                continue
+            exportar_historicos(sistema, diretorio, formatos or FORMATOS_HISTORICO)
+
+        elif opcao == '10':
+            print("\n[Secretaria] Faltas por Período")
+            logica_faltas_periodo(sistema)
             
         elif opcao == '0':
             break
@@ -432,15 +487,17 @@ def menu_professor(sistema, usuario_logado):
           return
 
     while True:
+        sistema.atualizar()
         opcao = exibir_menu('professor')
         
         if opcao == '1':
             print(f"\n[Professor] Minhas Turmas e Alunos:")
-            if not professor.disciplinas_ministradas:
+            disciplinas = sistema.disciplinas_do_professor(professor.login)
+            if not disciplinas:
                 print("Nenhuma disciplina atribuída.")
                 continue
 
-            for disc_id in professor.disciplinas_ministradas:
+            for disc_id in disciplinas:
                 disciplina = sistema.disciplinas.get(disc_id)
                 if not disciplina:
                       print(f"AVISO: Disciplina ID {disc_id} não encontrada no sistema.")
@@ -461,26 +518,22 @@ def menu_professor(sistema, usuario_logado):
         elif opcao == '2':
             print("\n[Professor] Lançar Notas")
             disc_id = input("ID da disciplina: ")
-            if disc_id not in professor.disciplinas_ministradas:
+            if not sistema.ministra(professor.login, disc_id):
                 print("ERRO: Disciplina não encontrada ou não atribuída a você.")
                 continue
             
             ra = input("RA do aluno: ")
             aluno = sistema.alunos.get(ra)
-            if not aluno or ra not in sistema.disciplinas[disc_id].alunos_ra:
+            if not aluno or not sistema.esta_matriculado(ra, disc_id):
                 print("ERRO: Aluno não encontrado ou não matriculado nesta turma.")
                 continue
 
             try:
                 nova_nota = float(input("Digite a nova nota (0.0 a 10.0): "))
                 if 0.0 <= nova_nota <= 10.0:
-                    if disc_id not in aluno.notas:
-                        aluno.notas[disc_id] = []
-                    
-                    aluno.notas[disc_id].append(nova_nota)
+                    sistema.lancar_nota(ra, disc_id, nova_nota)
                     media_atual = aluno.calcular_media(disc_id)
                     print(f"Nota {nova_nota} lançada. Média atual: {media_atual:.2f}")
-                    sistema.salvar_dados() 
                 else:
                     print("ERRO: Nota deve estar entre 0.0 e 10.0.")
             except ValueError:
@@ -489,7 +542,7 @@ def menu_professor(sistema, usuario_logado):
         elif opcao == '3':
             print("\n[Professor] Registrar Frequências")
             disc_id = input("ID da disciplina: ")
-            if disc_id not in professor.disciplinas_ministradas:
+            if not sistema.ministra(professor.login, disc_id):
                 print("ERRO: Disciplina não encontrada ou não atribuída a você.")
                 continue
             
@@ -501,28 +554,77 @@ def menu_professor(sistema, usuario_logado):
                 print("Nenhum aluno matriculado nesta disciplina.")
                 continue
 
-            frequencia_registrada = False
-            for ra in disciplina.alunos_ra:
-                aluno = sistema.alunos.get(ra)
-                if not aluno:
-                    continue 
-                while True:
-                    freq = input(f"Aluno {aluno.nome} ({ra}) - Presença (P) ou Falta (F)? ").upper()
-                    if freq in ['P', 'F']:
-                        if disc_id not in aluno.frequencias:
-                            aluno.frequencias[disc_id] = []
-                        
-                        aluno.frequencias[disc_id].append({'data': data_aula, 'tipo': freq})
-                        print(f"Frequência registrada: {freq}")
-                        frequencia_registrada = True
-                        break
-                    else:
-                        print("Entrada inválida.")
-            
-            if frequencia_registrada:
-                sistema.salvar_dados() 
-                
-            print("Registro de frequências concluído.")
+            print("1. Chamada aluno a aluno")
+            print("2. Todos presentes, exceto os RAs informados")
+            print("3. Importar chamada de arquivo CSV (RA;P/F)")
+            modo = input("Modo de registro: ")
+
+            if modo == '1':
+                presencas = {}
+                for ra in disciplina.alunos_ra:
+                    aluno = sistema.alunos.get(ra)
+                    if not aluno:
+                        continue 
+                    while True:
+                        freq = input(f"Aluno {aluno.nome} ({ra}) - Presença (P) ou Falta (F)? ").upper()
+                        if freq in ['P', 'F']:
+                            presencas[ra] = freq
+                            break
+                        else:
+                            print("Entrada inválida.")
+            elif modo == '2':
+                faltas = set(separar_campos(input("RAs ausentes (separados por ';' ou ','; vazio se todos presentes): ")))
+                faltas.discard('')
+                presencas = {ra: 'F' if ra in faltas else 'P' for ra in disciplina.alunos_ra}
+                for ra in faltas - set(presencas):
+                    print(f"AVISO: RA {ra} não está matriculado nesta disciplina e foi ignorado.")
+            elif modo == '3':
+                caminho = input("Arquivo CSV da chamada: ").strip()
+                try:
+                    presencas = [(linha[0], linha[1] if len(linha) > 1 else '') for linha in ler_linhas_csv(caminho)]
+                except OSError as e:
+                    print(f"ERRO: Não foi possível ler o arquivo: {e}")
+                    continue
+            else:
+                print("Opção inválida.")
+                continue
+
+            # A chamada inteira é aplicada de uma vez, com um único registro persistido
+            registradas, erros = sistema.registrar_frequencia_lote(disc_id, presencas, data_aula)
+            for ra, mensagem in erros:
+                print(f"RA {ra}: ERRO - {mensagem}")
+            print(f"Registro de frequências concluído: {registradas} aluno(s) registrado(s).")
+
+        elif opcao == '4':
+            print("\n[Professor] Lançar Notas da Turma em Lote")
+            disc_id = input("ID da disciplina: ")
+            if not sistema.ministra(professor.login, disc_id):
+                print("ERRO: Disciplina não encontrada ou não atribuída a você.")
+                continue
+
+            caminho = input("Arquivo CSV (RA;nota[;avaliação]) ou vazio para digitar as linhas: ").strip()
+            try:
+                linhas = ler_linhas_csv(caminho) if caminho else ler_linhas_digitadas("RA;nota[;avaliação]")
+            except OSError as e:
+                print(f"ERRO: Não foi possível ler o arquivo: {e}")
+                continue
+
+            lancadas, erros = sistema.lancar_notas_lote(disc_id, linhas)
+            for numero, mensagem in erros:
+                print(f"Linha {numero}: ERRO - {mensagem}")
+            print(f"{lancadas} nota(s) lançada(s), {len(erros)} linha(s) com erro.")
+
+        elif opcao == '5':
+            print("\n[Professor] Relatório Estatístico da Turma")
+            disc_id = input("ID da disciplina: ")
+            if not sistema.ministra(professor.login, disc_id):
+                print("ERRO: Disciplina não encontrada ou não atribuída a você.")
+                continue
+            exibir_relatorio_turma(sistema, disc_id)
+
+        elif opcao == '6':
+            print("\n[Professor] Faltas das Turmas por Período")
+            logica_faltas_periodo(sistema, sistema.disciplinas_do_professor(professor.login))
 
         elif opcao == '0':
             break
@@ -531,6 +633,8 @@ def menu_professor(sistema, usuario_logado):
 
 def menu_aluno(sistema, aluno):
     while True:
+        sistema.atualizar()
+        aluno = sistema.alunos.get(aluno.ra, aluno)
         opcao = exibir_menu('aluno')
         
         if opcao == '1':
@@ -544,10 +648,13 @@ def menu_aluno(sistema, aluno):
                 print("Você já está matriculado nesta disciplina.")
                 continue
 
-            if sistema.matricular_aluno(aluno.ra, disc_id):
+            situacao, mensagem = sistema.matricular_aluno(aluno.ra, disc_id)
+            if situacao == MATRICULA_CONFIRMADA:
                 print(f"Matrícula na disciplina {disc_id} realizada com sucesso!")
+            elif situacao == MATRICULA_EM_ESPERA:
+                print(f"AVISO: {mensagem} Você será matriculado automaticamente quando uma vaga for liberada.")
             else:
-                 print("ERRO: Falha na matrícula. Verifique se a disciplina ou seu RA estão corretos.")
+                 print(f"ERRO: Falha na matrícula. {mensagem}")
 
         elif opcao == '2':
             print("\n[Aluno] Consultar Notas e Média")
@@ -558,6 +665,9 @@ def menu_aluno(sistema, aluno):
             for disc_id in aluno.cursos.keys():
                 situacao, freq_perc, media = aluno.verificar_aprovacao(disc_id)
                 notas = aluno.notas.get(disc_id, [])
+                rotulos = aluno.avaliacoes.get(disc_id)
+                if rotulos:
+                    notas = [f"{rotulo}: {nota}" if rotulo else nota for rotulo, nota in zip(rotulos, notas)]
                 
                 print(f"\n--- {sistema.disciplinas.get(disc_id, Disciplina(disc_id, 'N/A')).nome} ({disc_id}) ---")
                 print(f"Notas Lançadas: {notas if notas else 'Nenhuma'}")
@@ -572,9 +682,7 @@ def menu_aluno(sistema, aluno):
 
             for disc_id in aluno.cursos.keys():
                 situacao, freq_perc, media = aluno.verificar_aprovacao(disc_id)
-                frequencias = aluno.frequencias.get(disc_id, [])
-                total_aulas = len(frequencias)
-                total_presencas = sum(1 for f in frequencias if f['tipo'] == 'P')
+                total_aulas, total_presencas = aluno.resumo_frequencia(disc_id)
                 total_faltas = total_aulas - total_presencas
                 
                 print(f"\n--- {sistema.disciplinas.get(disc_id, Disciplina(disc_id, 'N/A')).nome} ({disc_id}) ---")
@@ -585,19 +693,15 @@ def menu_aluno(sistema, aluno):
         elif opcao == '4':
             print("\n[Aluno] Atualizar Dados Pessoais")
             novo_nome = input(f"Nome atual ({aluno.nome}). Novo nome (deixe vazio para manter): ")
-            if novo_nome:
-                aluno.nome = novo_nome
             
             nova_senha = input("Alterar senha (deixe vazio para manter): ")
             if nova_senha:
                 aluno.senha = nova_senha 
 
             novo_end = input(f"Endereço atual ({aluno.dados_pessoais.get('endereco', 'N/A')}). Novo Endereço: ")
-            if novo_end:
-                 aluno.dados_pessoais['endereco'] = novo_end
 
+            sistema.atualizar_dados_pessoais(aluno.ra, novo_nome, novo_end)
             print("Dados pessoais atualizados com sucesso.")
-            sistema.salvar_dados() 
 
         elif opcao == '5':
             print("\n[Aluno] Emitir Histórico Escolar")
@@ -607,33 +711,7 @@ def menu_aluno(sistema, aluno):
                  print("Nenhum histórico a emitir, você não está matriculado em nenhuma disciplina.")
                  continue
 
-            aprovacoes = []
-            reprovacoes = []
-
-            for disc_id in aluno.cursos.keys():
-                situacao, freq_perc, media = aluno.verificar_aprovacao(disc_id)
-                
-                resultado = {
-                    'disciplina': sistema.disciplinas.get(disc_id).nome if sistema.disciplinas.get(disc_id) else "Disciplina Removida",
-                    'media': f"{media:.2f}",
-                    'frequencia': f"{freq_perc:.2f}%",
-                    'status': situacao
-                }
-
-                print(f"\nDisciplina: {resultado['disciplina']}")
-                print(f"   Média: {resultado['media']} | Frequência: {resultado['frequencia']}")
-                print(f"   Situação Final: {resultado['status']}")
-                
-                if situacao.startswith('REPROVADO'):
-                    reprovacoes.append(resultado)
-                else:
-                    aprovacoes.append(resultado)
-
-            if reprovacoes:
-                print("\nSituação Global: PENDÊNCIAS (Verifique reprovações)")
-                print(f"Total de reprovações: {len(reprovacoes)}")
-            else:
-                print("\nSituação Global: REGULAR")
+            print(texto_historico(sistema.historico_escolar(aluno.ra)), end='')
 
         elif opcao == '0':
             break
@@ -647,6 +725,7 @@ def login(sistema):
     usuario = input("Login: ")
     senha = input("Senha: ")
 
+    sistema.atualizar()
     usuario_logado = sistema.usuarios.get(usuario)
 
     if usuario_logado and usuario_logado.senha == senha:
@@ -654,19 +733,30 @@ def login(sistema):
         print(f"Login bem-sucedido! Perfil: {perfil.upper()}")
         
         # Chama o menu específico
-        if perfil == 'administrador':
-            menu_administrador(sistema)
-        elif perfil == 'secretaria':
-            menu_secretaria(sistema)
-        elif perfil == 'professor':
-            menu_professor(sistema, usuario_logado)
-        elif perfil == 'aluno':
-            aluno_obj = sistema.alunos.get(usuario_logado.ra)
-            if aluno_obj:
-                menu_aluno(sistema, aluno_obj)
-            else:
-                # O objeto Aluno é referenciado pelo RA
-                print("ERRO interno: Objeto Aluno não encontrado. Verifique se o RA está cadastrado.")
+        try:
+            if perfil == 'administrador':
+                menu_administrador(sistema)
+            elif perfil == 'secretaria':
+                menu_secretaria(sistema)
+            elif perfil == 'professor':
+                menu_professor(sistema, usuario_logado)
+            elif perfil == 'aluno':
+                aluno_obj = sistema.aluno_por_login(usuario_logado.login)
+                if aluno_obj:
+                    menu_aluno(sistema, aluno_obj)
+                else:
+                    # O objeto Aluno é referenciado pelo RA
+                    print("ERRO interno: Objeto Aluno não encontrado. Verifique se o RA está cadastrado.")
+        except TimeoutError as e:
+            # Outro processo segurou a trava de escrita por tempo demais
+            print(f"[ERRO] {e} Tente novamente.")
+        except OSError as e:
+            # Falha de gravação (ex.: disco cheio): a transação já descartou a alteração
+            print(f"[ERRO] Falha ao gravar os dados: {e}")
+        if sistema.gravador:
+            sistema.gravador.flush()
+        if METRICAS.ativo:
+            METRICAS.encerrar_acao()
 
         print(f"Logout realizado.")
     else:
@@ -674,12 +764,116 @@ def login(sistema):
 
 # --- Execução Principal
 if __name__ == "__main__":
-    sistema = SistemaAcademico() 
+    parser = argparse.ArgumentParser(description="Sistema Acadêmico (Trabalho PIM)")
+    parser.add_argument('--armazenamento', choices=['json', 'binario', 'fragmentado', 'sqlite'], default='json',
+                        help="Backend de persistência (padrão: json)")
+    parser.add_argument('--preguicoso', action='store_true',
+                        help="Armazenamento JSON: carrega o histórico de cada aluno apenas quando ele é acessado")
+    parser.add_argument('--servidor', action='store_true',
+                        help="Inicia o serviço HTTP/JSON local em vez do menu interativo")
+    parser.add_argument('--porta', type=int, default=PORTA_SERVICO,
+                        help=f"Porta do serviço HTTP/JSON (padrão: {PORTA_SERVICO})")
+    parser.add_argument('--janela-gravacao', type=float, default=JANELA_GRAVACAO, metavar='SEGUNDOS',
+                        help=f"Junta as regravações do snapshot feitas em segundo plano dentro desta janela "
+                             f"(padrão: {JANELA_GRAVACAO}; 0 grava na hora, sem o gravador)")
+    parser.add_argument('--metricas', nargs='?', const=ARQUIVO_METRICAS, metavar='ARQUIVO',
+                        help=f"Coleta métricas de desempenho e as grava ao sair (padrão: {ARQUIVO_METRICAS})")
+    parser.add_argument('--perfil', nargs='?', const=ARQUIVO_PERFIL, metavar='ARQUIVO',
+                        help=f"Executa sob o cProfile e grava o perfil ao sair (padrão: {ARQUIVO_PERFIL})")
+    parser.add_argument('--converter-binario', action='store_true',
+                        help=f"Converte {ARQUIVO_DADOS} para o snapshot binário {ARQUIVO_BINARIO} e encerra")
+    parser.add_argument('--converter-fragmentado', action='store_true',
+                        help=f"Converte {ARQUIVO_DADOS} para o diretório fragmentado {ARQUIVO_FRAGMENTOS} e encerra")
+    parser.add_argument('--converter-json', action='store_true',
+                        help=f"Exporta o snapshot binário {ARQUIVO_BINARIO} (ou o fragmentado, com "
+                             f"--armazenamento fragmentado) para {ARQUIVO_DADOS} e encerra")
+    parser.add_argument('--exportar-historicos', metavar='DIRETORIO',
+                        help="Gera o Histórico Escolar de todos os alunos em DIRETORIO (retoma uma exportação interrompida) e encerra")
+    parser.add_argument('--formatos', default=','.join(FORMATOS_HISTORICO),
+                        help=f"Formatos de --exportar-historicos, separados por vírgula (padrão: {','.join(FORMATOS_HISTORICO)})")
+    parser.add_argument('--processos', type=int, default=None,
+                        help="Processos de --exportar-historicos (padrão: um por núcleo)")
+    parser.add_argument('--exportar-notas', metavar='ARQUIVO',
+                        help="Exporta todas as notas em fluxo para ARQUIVO (.csv ou .jsonl) e encerra")
+    parser.add_argument('--exportar-frequencias', metavar='ARQUIVO',
+                        help="Exporta todas as marcas de frequência em fluxo para ARQUIVO (.csv ou .jsonl) e encerra")
+    parser.add_argument('--disciplinas', help="Filtro das exportações: IDs de disciplina separados por vírgula")
+    parser.add_argument('--ras', help="Filtro das exportações: RAs separados por vírgula")
+    parser.add_argument('--desde', metavar='DATA',
+                        help="Filtro de --exportar-frequencias: aulas a partir desta data (AAAA-MM-DD ou DD/MM/AAAA, com hora opcional)")
+    parser.add_argument('--ate', metavar='DATA',
+                        help="Filtro de --exportar-frequencias: aulas até esta data (inclusive, se sem hora)")
+    parser.add_argument('--migrar-sqlite', action='store_true',
+                        help=f"Converte {ARQUIVO_DADOS} para o banco {ARQUIVO_SQLITE} e encerra")
+    args = parser.parse_args()
+
+    if args.perfil:
+        METRICAS.iniciar_perfil()
+    if args.metricas:
+        METRICAS.ativar(SistemaAcademico, ArmazenamentoJSON, ArmazenamentoBinario, ArmazenamentoFragmentado,
+                        ArmazenamentoSQLite, menus=globals())
+    atexit.register(METRICAS.finalizar, args.metricas, args.perfil)
+
+    if args.migrar_sqlite:
+        sys.exit(0 if migrar_json_para_sqlite() else 1)
+    if args.converter_binario:
+        sys.exit(0 if converter_snapshot(ArmazenamentoJSON(), ArmazenamentoBinario()) else 1)
+    if args.converter_fragmentado:
+        sys.exit(0 if converter_snapshot(ArmazenamentoJSON(), ArmazenamentoFragmentado()) else 1)
+    if args.converter_json:
+        origem = ArmazenamentoFragmentado() if args.armazenamento == 'fragmentado' else ArmazenamentoBinario()
+        sys.exit(0 if converter_snapshot(origem, ArmazenamentoJSON()) else 1)
+
+    # As exportações só leem os dados: nada é gravado na partida (nem o índice do modo preguiçoso)
+    exportando = bool(args.exportar_notas or args.exportar_frequencias or args.exportar_historicos)
+    try:
+        if args.armazenamento == 'sqlite':
+            sistema = SistemaAcademico(ArmazenamentoSQLite(), exportando)
+        elif args.armazenamento == 'binario':
+            sistema = SistemaAcademico(ArmazenamentoBinario(), exportando)
+        elif args.armazenamento == 'fragmentado':
+            sistema = SistemaAcademico(ArmazenamentoFragmentado(), exportando)
+        else:
+            # As exportações em fluxo leem um aluno por vez do snapshot (modo preguiçoso)
+            em_fluxo = bool(args.exportar_notas or args.exportar_frequencias)
+            sistema = SistemaAcademico(ArmazenamentoJSON(preguicoso=args.preguicoso or em_fluxo), exportando)
+    except Exception as e:
+        # Dados ilegíveis: encerra sem gravar nada por cima deles
+        print(f"[ERRO] Não foi possível carregar os dados: {e}")
+        sys.exit(1)
+
+    if args.exportar_notas or args.exportar_frequencias:
+        filtros = {'disciplinas': [d.strip() for d in (args.disciplinas or '').split(',') if d.strip()] or None,
+                   'ras': [r.strip() for r in (args.ras or '').split(',') if r.strip()] or None}
+        sucesso = True
+        if args.exportar_notas:
+            sucesso = exportar_em_fluxo(sistema, 'notas', args.exportar_notas, **filtros) and sucesso
+        if args.exportar_frequencias:
+            sucesso = exportar_em_fluxo(sistema, 'frequencias', args.exportar_frequencias,
+                                        desde=args.desde, ate=args.ate, **filtros) and sucesso
+        sys.exit(0 if sucesso else 1)
+
+    if args.exportar_historicos:
+        formatos = [f.strip().lower() for f in args.formatos.split(',') if f.strip()]
+        if not formatos or any(f not in FORMATOS_HISTORICO for f in formatos):
+            parser.error(f"formatos válidos: {', '.join(FORMATOS_HISTORICO)}")
+        sys.exit(0 if exportar_historicos(sistema, args.exportar_historicos, formatos, args.processos) else 1)
+
+    if args.janela_gravacao > 0:
+        sistema.iniciar_gravador(args.janela_gravacao)
+
+    if args.servidor:
+        executar_servidor(sistema, args.porta)
+        sys.exit(0)
 
     while True:
         login(sistema)
         continuar = input("\nPressione Enter para tentar outro login ou 'q' para encerrar: ").lower()
         if continuar == 'q':
-            sistema.salvar_dados() # Salva o estado final antes de sair
+            try:
+                sistema.encerrar() # Salva o estado final antes de sair
+            except OSError as e:
+                print(f"[ERRO] Falha ao gravar o estado final: {e}")
+                sys.exit(1)
             print("Sistema acadêmico simulado encerrado.")
             break
\ No newline at end of file
@@ -0,0 +1,1298 @@
+# Backends de persistência: snapshot JSON + journal (também preguiçoso), binário, fragmentado e SQLite
+import json
+import io
+import os
+import pickle
+import sqlite3
+import struct
+import threading
+import time
+import weakref
+import zlib
+from array import array
+from collections.abc import MutableMapping
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+
+from configuracao import (ARQUIVO_BINARIO, ARQUIVO_DADOS, ARQUIVO_FRAGMENTOS, ARQUIVO_JOURNAL,
+                          ARQUIVO_JOURNAL_BINARIO, ARQUIVO_SQLITE, FRAGMENTOS_ALUNOS, FRAGMENTOS_DISCIPLINAS,
+                          LIMITE_JOURNAL, PROPORCAO_JOURNAL, TEMPO_ESPERA_TRAVA, TRAVA_ABANDONADA)
+from metricas import METRICAS
+from entidades import (Aluno, ConjuntoOrdenado, CustomEncoder, Disciplina, FrequenciasCompactas, Professor, Usuario,
+                       crc_arquivo, decodificar_json, situacao_curso)
+
+# --- Armazenamento (Backends de Persistência)
+
+class ControleConcorrencia:
+    # Vários processos podem usar os mesmos dados. Leitores nunca esperam: sincronizar() apenas
+    # incorpora o que outros processos gravaram. Escritores entram em transacao(), que pega a trava
+    # de escrita e sincroniza antes, de modo que a operação é validada e aplicada sobre o estado
+    # mais recente (com a sequência seguinte à do último registro gravado) em vez de sobrescrevê-lo.
+    _profundidade = 0 # Transações aninhadas no mesmo processo reaproveitam a trava
+
+    @contextmanager
+    def transacao(self, sistema):
+        primeira = self._profundidade == 0
+        if primeira:
+            self._adquirir_trava()
+        self._profundidade += 1
+        sucesso = False
+        sequencia = None
+        try:
+            if primeira:
+                self.sincronizar(sistema)
+                sequencia = sistema.sequencia
+            yield
+            sucesso = True
+        finally:
+            self._profundidade -= 1
+            if primeira:
+                self._liberar_trava_ou_descartar(sistema, sucesso, sequencia)
+
+    def _liberar_trava_ou_descartar(self, sistema, sucesso, sequencia):
+        # Uma transação que falhou depois de aplicar alterações em memória (ex.: disco cheio ao gravar o
+        # journal, commit recusado) não pode deixá-las visíveis: o estado é relido do disco, ainda sob a trava.
+        try:
+            self._liberar_trava(sucesso)
+        except Exception:
+            sucesso = False
+            raise
+        finally:
+            if not sucesso and sequencia is not None and sistema.sequencia != sequencia:
+                self.descartar_alteracoes(sistema)
+
+    def descartar_alteracoes(self, sistema):
+        print("[ERRO] A alteração não foi gravada. Recarregando os dados do disco.")
+        sistema.carregar_dados()
+
+    def desatualizado(self):
+        # Se outro processo trocou os dados desde a versão carregada (a próxima sincronização recarrega tudo)
+        return False
+
+class MapaPreguicoso(MutableMapping):
+    # Dicionário que busca cada entidade na fonte (banco ou snapshot) apenas quando ela é acessada e a mantém em cache.
+    # Hidratar altera o cache (e, nas frequências do formato antigo, as aulas das disciplinas): isso é feito sob a
+    # trava do sistema, a mesma que o gravador em segundo plano segura enquanto percorre o estado.
+    def __init__(self, carregar_item, listar_chaves, contar, existe, trava=None):
+        self._cache = {}
+        self._carregar_item = carregar_item
+        self._listar_chaves = listar_chaves
+        self._contar = contar
+        self._existe = existe
+        self._trava = trava if trava is not None else nullcontext()
+
+    def __getitem__(self, chave):
+        if chave in self._cache:
+            return self._cache[chave]
+        with self._trava:
+            if chave in self._cache: # Hidratada por outra thread enquanto esta esperava
+                return self._cache[chave]
+            item = self._carregar_item(chave)
+            if item is None:
+                raise KeyError(chave)
+            self._cache[chave] = item
+        return item
+
+    def __contains__(self, chave):
+        return chave in self._cache or self._existe(chave)
+
+    def __setitem__(self, chave, valor):
+        # A persistência é feita pelo registro da operação; aqui só atualiza o cache
+        with self._trava:
+            self._cache[chave] = valor
+
+    def __delitem__(self, chave):
+        with self._trava:
+            self._cache.pop(chave, None)
+
+    def __iter__(self):
+        # Chaves da fonte, seguidas das entidades criadas em memória que a fonte ainda não conhece
+        vistas = set()
+        for chave in self._listar_chaves():
+            vistas.add(chave)
+            yield chave
+        for chave in list(self._cache):
+            if chave not in vistas:
+                yield chave
+
+    def __len__(self):
+        return self._contar() + sum(1 for chave in self._cache if not self._existe(chave))
+
+    def carregados(self):
+        # Apenas as entidades já hidratadas, sem disparar nenhum carregamento
+        return self._cache.items()
+
+    def ler_sem_guardar(self, chave):
+        # Entidade da fonte sem guardá-la no cache (leituras em fluxo, uma entidade por vez)
+        with self._trava:
+            if chave in self._cache:
+                return self._cache[chave]
+            return self._carregar_item(chave)
+
+
+class ArmazenamentoJSON(ControleConcorrencia):
+    # Snapshot JSON (ARQUIVO_DADOS) + journal append-only (ARQUIVO_JOURNAL)
+    # No modo preguiçoso, um índice (ARQUIVO_INDICE) guarda RA -> login, nome e a posição de cada aluno
+    # no snapshot; o histórico de cada aluno só é lido do disco quando ele é acessado.
+    # Entre processos: a trava de escrita é um arquivo criado com O_EXCL; a versão de cada processo é a
+    # identidade do snapshot e do journal que ele leu mais a posição do journal até onde já reaplicou.
+    # Partida a quente: fora do modo preguiçoso, um cache (arquivo + '.cache') guarda o snapshot já
+    # desserializado em tuplas primitivas (as mesmas do armazenamento binário), validado pelo tamanho,
+    # mtime e CRC32 do snapshot JSON de onde veio; enquanto ele vale, a carga não faz o parse do JSON.
+    CABECALHO_CACHE = struct.Struct('<8sHQqIIQ') # assinatura, versão, tamanho/mtime/CRC32 do JSON, CRC32/tamanho do conteúdo
+    ASSINATURA_CACHE = b'PIMCACHE'
+    VERSAO_COMPACTA = 2 # Versão das tuplas de estado_compacto (2: disciplinas com capacidade e lista de espera)
+
+    def __init__(self, arquivo=None, journal=None, preguicoso=False):
+        self.arquivo = arquivo or ARQUIVO_DADOS
+        self.journal = journal or ARQUIVO_JOURNAL
+        self.indice = os.path.splitext(self.arquivo)[0] + '.idx'
+        self.trava = self.arquivo + '.lock'
+        self.cache = None if preguicoso else self.arquivo + '.cache'
+        self.preguicoso = preguicoso
+        self.registros_journal = 0 # Registros pendentes no journal desde a última compactação
+        self._indice_alunos = {} # RA -> [login, nome, posição, tamanho] no snapshot atual (modo preguiçoso)
+        self._login_ra = {} # login -> RA dos alunos ainda não hidratados (modo preguiçoso)
+        self._versao = None # Identidade do snapshot e do journal carregados
+        self._posicao_journal = 0 # Bytes do journal já reaplicados
+        self._origem = None # (tamanho, mtime_ns, CRC32) do snapshot JSON lido por carregar_completo
+        self._carregando = False
+        self._com_trava = False # Trava de escrita com este processo (renovada por _renovar_trava)
+        self._renovacao_iniciada = False
+
+    def _identidade(self):
+        # O snapshot e o journal são sempre substituídos (os.replace) e nunca reescritos no lugar
+        try:
+            estado = os.stat(self.arquivo)
+            snapshot = (estado.st_ino, estado.st_size, estado.st_mtime_ns)
+        except FileNotFoundError:
+            snapshot = None
+        try:
+            journal = os.stat(self.journal).st_ino
+        except FileNotFoundError:
+            journal = None
+        return snapshot, journal
+
+    def desatualizado(self):
+        return self._identidade() != self._versao
+
+    def _adquirir_trava(self):
+        limite = time.monotonic() + TEMPO_ESPERA_TRAVA
+        espera = 0.005
+        while True:
+            try:
+                descritor = os.open(self.trava, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    if self._trava_abandonada():
+                        print(f"[AVISO] Trava abandonada {self.trava} removida.")
+                        os.remove(self.trava)
+                        continue
+                except OSError:
+                    continue # Liberada enquanto era verificada
+                if time.monotonic() > limite:
+                    raise TimeoutError(f"Dados em uso por outro processo (trava {self.trava}).")
+                time.sleep(espera)
+                espera = min(espera * 2, 0.1)
+                continue
+            with os.fdopen(descritor, 'w') as f:
+                f.write(f"{os.getpid()}\n")
+            # Enquanto a trava estiver com este processo, o mtime dela é renovado (uma compactação
+            # demorada não pode ser confundida com um processo que caiu)
+            self._com_trava = True
+            if not self._renovacao_iniciada:
+                self._renovacao_iniciada = True
+                threading.Thread(target=ArmazenamentoJSON._renovar_trava, args=(weakref.ref(self),), daemon=True).start()
+            return
+
+    @staticmethod
+    def _renovar_trava(referencia):
+        # Uma thread por armazenamento, criada na primeira transação; termina junto com ele
+        while True:
+            time.sleep(TRAVA_ABANDONADA / 4)
+            armazenamento = referencia()
+            if armazenamento is None:
+                return
+            if armazenamento._com_trava:
+                try:
+                    os.utime(armazenamento.trava)
+                except OSError:
+                    pass
+            del armazenamento
+
+    def _trava_abandonada(self):
+        # Abandonada: sem renovação há mais de TRAVA_ABANDONADA e, quando dá para saber, o processo dono
+        # não existe mais. Levanta OSError se a trava sumir durante a verificação.
+        if time.time() - os.path.getmtime(self.trava) <= TRAVA_ABANDONADA:
+            return False
+        with open(self.trava, encoding='utf-8') as f:
+            conteudo = f.read().strip()
+        if not conteudo.isdigit() or os.name == 'nt':
+            return True # No Windows, os.kill(pid, 0) encerraria o processo: vale só a renovação
+        try:
+            os.kill(int(conteudo), 0)
+        except ProcessLookupError:
+            return True
+        except OSError:
+            return False # Existe, mas é de outro usuário
+        return False
+
+    def _liberar_trava(self, sucesso):
+        self._com_trava = False
+        try:
+            os.remove(self.trava)
+        except OSError:
+            pass
+
+    def sincronizar(self, sistema):
+        # Incorpora as alterações gravadas por outros processos desde a versão carregada
+        versao = self._identidade()
+        if versao != self._versao:
+            # Outro processo gravou um snapshot novo (e esvaziou o journal): relê tudo
+            print("[INFO] Dados alterados por outro processo. Recarregando.")
+            sistema.carregar_dados()
+            return
+        if versao[1] is None:
+            return
+        tamanho = os.path.getsize(self.journal)
+        if tamanho > self._posicao_journal:
+            self.registros_journal += self.reaplicar_journal(sistema, self._posicao_journal)
+        elif tamanho < self._posicao_journal:
+            sistema.carregar_dados()
+
+    def carregar(self, sistema):
+        # Sem trava: se um escritor substituir os arquivos durante a leitura, ela é refeita.
+        # Se a leitura falhar, o armazenamento volta ao estado da carga anterior e o erro sobe.
+        anterior = dict(vars(self))
+        self._carregando = True
+        try:
+            for tentativa in range(3):
+                versao = self._identidade()
+                try:
+                    self.ler_dados(sistema)
+                except Exception:
+                    if tentativa == 2 or self._identidade() == versao:
+                        raise
+                    continue
+                if self._identidade() == versao:
+                    break
+                print("[AVISO] Dados alterados por outro processo durante a leitura. Lendo novamente.")
+        except Exception:
+            vars(self).update(anterior)
+            raise
+        finally:
+            self._carregando = False
+        self._versao = versao
+
+    def ler_dados(self, sistema):
+        #Carrega o estado do sistema a partir de um arquivo JSON
+        self._posicao_journal = 0
+        if not os.path.exists(self.arquivo):
+            if self._versao and self._versao[0] is not None:
+                # O snapshot já carregado sumiu: não troca o estado atual pelos dados padrão
+                raise FileNotFoundError(f"Arquivo {self.arquivo} não encontrado.")
+            print(f"[AVISO] Arquivo {self.arquivo} não encontrado. Iniciando com dados padrão.")
+            sistema.carregar_dados_iniciais()
+            return
+
+        try:
+            inicio = time.perf_counter()
+            indice = self.ler_indice() if self.preguicoso else None
+            partida = ''
+            if indice:
+                self.carregar_preguicoso(sistema, indice)
+            elif self.ler_cache(sistema):
+                partida = 'quente'
+            else:
+                if self.preguicoso:
+                    print(f"[AVISO] Índice {self.indice} ausente ou desatualizado. Carregando o snapshot completo.")
+                    sistema.gravar_na_partida = True # Refaz o índice
+                self.carregar_completo(sistema)
+                if self.cache:
+                    partida = 'fria'
+                    self.gravar_cache(sistema, self._origem)
+            duracao = time.perf_counter() - inicio
+            if METRICAS.ativo and partida:
+                METRICAS.registrar(f'carregar.partida_{partida}', duracao)
+
+            print(f"[INFO] Dados carregados de {self.arquivo} com sucesso em {duracao * 1000:.0f} ms"
+                  f"{f' (partida a {partida})' if partida else ''}.")
+
+            # Aplica as alterações registradas no journal depois do último snapshot
+            self.registros_journal = self.reaplicar_journal(sistema)
+            
+            # Garante que o admin/secretaria padrão estejam sempre presentes
+            if 'admin' not in sistema.usuarios:
+                 sistema.usuarios['admin'] = Usuario('admin', '123', 'Admin Master', 'administrador')
+                 sistema.usuarios['secretaria1'] = Usuario('secretaria1', '123', 'Ana Secretária', 'secretaria')
+                 print("[AVISO] Usuários iniciais (admin/secretaria) recriados em memória.")
+                 sistema.gravar_na_partida = True
+
+
+        except Exception as e:
+            # Nunca cai nos dados padrão aqui: o próximo salvamento sobrescreveria o snapshot real
+            print(f"[ERRO] Falha ao carregar dados de {self.arquivo}: {e}")
+            raise
+
+    def carregar_completo(self, sistema):
+        with open(self.arquivo, 'rb') as f:
+            conteudo = f.read()
+            if self.cache:
+                # Origem exata do que foi lido, para o cache de partida gravado a partir dele
+                estado = os.fstat(f.fileno())
+                self._origem = (estado.st_size, estado.st_mtime_ns, zlib.crc32(conteudo))
+            data = decodificar_json(conteudo, 'carregar.snapshot')
+            
+            # Reseta e popula as estruturas de dados
+            sistema.usuarios = {}
+            sistema.professores = data.get('professores', {})
+            sistema.alunos = data.get('alunos', {})
+            sistema.disciplinas = data.get('disciplinas', {})
+            sistema.sequencia = data.get('sequencia', 0)
+            
+            # 1. Popula o dicionário de usuários com Alunos e Professores
+            sistema.usuarios.update(sistema.professores) 
+            sistema.usuarios.update({a.login: a for a in sistema.alunos.values()}) 
+
+            # 2. Adiciona usuários base (Admin/Secretaria)
+            for login, user in data.get('usuarios', {}).items():
+                sistema.usuarios[login] = user
+
+            for aluno in sistema.alunos.values():
+                sistema.vincular_aluno(aluno)
+
+    def carregar_preguicoso(self, sistema, indice):
+        # Só as seções pequenas (usuários, professores, disciplinas) são lidas agora
+        with open(self.arquivo, 'rb') as f:
+            secoes = {}
+            for nome, (posicao, tamanho) in indice['secoes'].items():
+                f.seek(posicao)
+                secoes[nome] = decodificar_json(f.read(tamanho), 'carregar.secao')
+
+        self._indice_alunos = {ra: entrada for ra, *entrada in indice['alunos']}
+        self._login_ra = {entrada[0]: ra for ra, entrada in self._indice_alunos.items()}
+
+        sistema.professores = secoes['professores']
+        sistema.disciplinas = secoes['disciplinas']
+        sistema.sequencia = indice['sequencia']
+        sistema.alunos = MapaPreguicoso(
+            lambda ra: self._carregar_aluno(sistema, ra),
+            lambda: list(self._indice_alunos),
+            lambda: len(self._indice_alunos),
+            lambda ra: ra in self._indice_alunos,
+            sistema.matriculas.trava)
+
+        base = secoes['usuarios']
+        sistema.usuarios = MapaPreguicoso(
+            lambda login: self._carregar_usuario(sistema, login),
+            lambda: list(self._login_ra),
+            lambda: len(self._login_ra),
+            lambda login: login in self._login_ra,
+            sistema.matriculas.trava)
+        # Usuários base e professores ficam sempre hidratados (são poucos)
+        for login, usuario in list(sistema.professores.items()) + list(base.items()):
+            sistema.usuarios[login] = usuario
+
+    def _carregar_aluno(self, sistema, ra):
+        if not self._carregando and self._identidade()[0] != self._versao[0]:
+            # Snapshot substituído por outro processo: as posições do índice não valem mais
+            sistema.carregar_dados()
+            return sistema.alunos.get(ra)
+        entrada = self._indice_alunos.get(ra)
+        if not entrada:
+            return None
+        _, _, posicao, tamanho = entrada
+        with open(self.arquivo, 'rb') as f:
+            f.seek(posicao)
+            return sistema.vincular_aluno(decodificar_json(f.read(tamanho), 'carregar.aluno'))
+
+    def _carregar_usuario(self, sistema, login):
+        ra = self._login_ra.get(login)
+        return sistema.alunos.get(ra) if ra else None
+
+    def nomes_alunos(self, sistema):
+        # (RA, login, nome) de cada aluno; no modo preguiçoso vêm do índice, sem hidratar os alunos
+        if not isinstance(sistema.alunos, MapaPreguicoso):
+            return [(ra, aluno.login, aluno.nome) for ra, aluno in sistema.alunos.items()]
+        carregados = dict(sistema.alunos.carregados())
+        return [(ra, carregados[ra].login, carregados[ra].nome) if ra in carregados else (ra, *self._indice_alunos[ra][:2])
+                for ra in sistema.alunos]
+
+    def pares_login_ra(self, sistema):
+        if isinstance(sistema.alunos, MapaPreguicoso):
+            pares = dict(self._login_ra)
+            pares.update((aluno.login, ra) for ra, aluno in sistema.alunos.carregados())
+            return pares.items()
+        return [(aluno.login, ra) for ra, aluno in sistema.alunos.items()]
+
+    def ler_indice(self):
+        # O índice só vale para o snapshot exato que o gerou (tamanho e data de modificação)
+        if not os.path.exists(self.indice):
+            return None
+        try:
+            with open(self.indice, 'r', encoding='utf-8') as f:
+                indice = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        estado = os.stat(self.arquivo)
+        if indice.get('tamanho') != estado.st_size or indice.get('mtime_ns') != estado.st_mtime_ns:
+            return None
+        return indice
+
+    def salvar(self, sistema):
+        #Salva o estado atual do sistema em um arquivo JSON (snapshot) e compacta o journal
+        with self.transacao(sistema):
+            self.escrever_dados(sistema)
+
+    def escrever_dados(self, sistema):
+        preguicoso = isinstance(sistema.alunos, MapaPreguicoso)
+        if preguicoso and self.registros_journal == 0 and self.ler_indice():
+            # Nada pendente: o snapshot e o índice em disco já representam o estado atual
+            return
+
+        usuarios_base = self.usuarios_base(sistema)
+        try:
+            # Escreve em arquivo temporário e substitui, para nunca deixar um snapshot pela metade
+            temporario = self.arquivo + '.tmp'
+            with open(temporario, 'wb') as f:
+                indice = self.escrever_snapshot(f, sistema, usuarios_base)
+            os.replace(temporario, self.arquivo)
+
+            estado = os.stat(self.arquivo)
+            if METRICAS.ativo:
+                METRICAS.grandeza('salvar.bytes_gravados', estado.st_size)
+            indice.update({'tamanho': estado.st_size, 'mtime_ns': estado.st_mtime_ns, 'sequencia': sistema.sequencia})
+            with open(self.indice + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(indice, f, ensure_ascii=False)
+            os.replace(self.indice + '.tmp', self.indice)
+
+            if preguicoso:
+                self._indice_alunos = {ra: entrada for ra, *entrada in indice['alunos']}
+                self._login_ra = {entrada[0]: ra for ra, entrada in self._indice_alunos.items()}
+            elif self.cache:
+                # Sob a trava de escrita: o snapshot em disco é o que acabou de ser gravado
+                self.gravar_cache(sistema, (estado.st_size, estado.st_mtime_ns, crc_arquivo(self.arquivo)))
+
+            self.reiniciar_journal()
+            # print(f"\n[INFO] Dados salvos em {self.arquivo}.")
+        except Exception as e:
+            # A falha sobe para quem pediu a gravação; o journal só é esvaziado depois de tudo gravado, então
+            # as alterações continuam nele
+            print(f"[ERRO] Falha ao salvar dados: {e}")
+            raise
+
+    def ler_cache(self, sistema):
+        # Carrega o cache de partida se ele corresponde ao snapshot JSON atual; senão devolve False
+        if not self.cache or not os.path.exists(self.cache):
+            return False
+        try:
+            with open(self.cache, 'rb') as f:
+                cabecalho = f.read(self.CABECALHO_CACHE.size)
+                conteudo = f.read()
+            if len(cabecalho) < self.CABECALHO_CACHE.size:
+                return False
+            assinatura, versao, tamanho, mtime_ns, crc_json, crc, tamanho_conteudo = self.CABECALHO_CACHE.unpack(cabecalho)
+            estado = os.stat(self.arquivo)
+            if (assinatura != self.ASSINATURA_CACHE or versao != self.VERSAO_COMPACTA
+                    or (tamanho, mtime_ns) != (estado.st_size, estado.st_mtime_ns)
+                    or len(conteudo) != tamanho_conteudo or zlib.crc32(conteudo) != crc
+                    or crc_arquivo(self.arquivo) != crc_json):
+                return False
+            self.restaurar_estado_compacto(sistema, LeitorSnapshotBinario(io.BytesIO(conteudo)).load())
+        except Exception as e:
+            print(f"[AVISO] Cache de partida {self.cache} ignorado: {e}")
+            return False
+        if METRICAS.ativo:
+            METRICAS.grandeza('carregar.cache.bytes_lidos', len(conteudo))
+        return True
+
+    def gravar_cache(self, sistema, origem):
+        # origem: (tamanho, mtime_ns, CRC32) do snapshot JSON que o estado em memória representa
+        # (chamado logo após lê-lo ou gravá-lo, antes de qualquer registro do journal ser aplicado)
+        try:
+            conteudo = pickle.dumps(self.estado_compacto(sistema), protocol=pickle.HIGHEST_PROTOCOL)
+            with open(self.cache + '.tmp', 'wb') as f:
+                f.write(self.CABECALHO_CACHE.pack(self.ASSINATURA_CACHE, self.VERSAO_COMPACTA, *origem,
+                                                  zlib.crc32(conteudo), len(conteudo)))
+                f.write(conteudo)
+            os.replace(self.cache + '.tmp', self.cache)
+        except Exception as e:
+            print(f"[AVISO] Falha ao gravar o cache de partida {self.cache}: {e}")
+
+    def estado_compacto(self, sistema):
+        # O estado só com tipos primitivos, uma tupla por entidade (snapshot binário e cache de partida)
+        return {
+            'sequencia': sistema.sequencia,
+            'usuarios': [(u.login, u.nome, u.perfil) for u in self.usuarios_base(sistema).values()],
+            'professores': [(p.login, p.nome, p.disciplinas_ministradas) for p in sistema.professores.values()],
+            'alunos': [(a.ra, a.login, a.nome, a.cursos, a.notas, a.dados_pessoais, a.agregados, a.avaliacoes,
+                        {id_disc: (inicio, codigos.tobytes()) for id_disc, (inicio, codigos) in a.frequencias.marcas.items()},
+                        a.frequencias.pendentes)
+                       for a in sistema.alunos.values()],
+            'disciplinas': [(d.id, d.nome, d.professor_login, list(d.alunos_ra), d.sessoes, d.capacidade, list(d.lista_espera))
+                            for d in sistema.disciplinas.values()],
+        }
+
+    def restaurar_estado_compacto(self, sistema, dados):
+        sistema.usuarios = {}
+        sistema.professores = {}
+        sistema.alunos = {}
+        sistema.disciplinas = {}
+        sistema.sequencia = dados['sequencia']
+
+        for id_disc, nome, professor_login, alunos_ra, sessoes, *vagas in dados['disciplinas']:
+            disciplina = Disciplina(id_disc, nome, professor_login)
+            disciplina.alunos_ra = ConjuntoOrdenado(alunos_ra)
+            disciplina.sessoes = sessoes
+            if vagas: # Versão 1 não tinha capacidade nem lista de espera
+                disciplina.capacidade = vagas[0]
+                disciplina.lista_espera = ConjuntoOrdenado(vagas[1])
+            sistema.disciplinas[id_disc] = disciplina
+
+        for login, nome, disciplinas_ministradas in dados['professores']:
+            professor = Professor(login, '123', nome)
+            professor.disciplinas_ministradas = disciplinas_ministradas
+            sistema.professores[login] = sistema.usuarios[login] = professor
+
+        for (ra, login, nome, cursos, notas, dados_pessoais, agregados, avaliacoes,
+             marcas, pendentes) in dados['alunos']:
+            aluno = Aluno(login, '123', nome, ra)
+            aluno.cursos = cursos
+            aluno.notas = notas
+            aluno.dados_pessoais = dados_pessoais
+            aluno.agregados = agregados
+            aluno.avaliacoes = avaliacoes
+            aluno.frequencias.marcas = {id_disc: [inicio_marcas, array('B', codigos)]
+                                        for id_disc, (inicio_marcas, codigos) in marcas.items()}
+            aluno.frequencias.pendentes = pendentes
+            sistema.alunos[ra] = sistema.usuarios[login] = sistema.vincular_aluno(aluno)
+
+        for login, nome, perfil in dados['usuarios']:
+            sistema.usuarios[login] = Usuario(login, '123', nome, perfil)
+
+    def usuarios_base(self, sistema):
+        # Admin/secretaria; professores e alunos são gravados nas próprias seções
+        # No modo preguiçoso, usuários base e professores estão sempre hidratados; evita carregar todos os alunos
+        usuarios = sistema.usuarios.carregados() if isinstance(sistema.usuarios, MapaPreguicoso) else sistema.usuarios.items()
+        usuarios_base = {k: v for k, v in usuarios if v.perfil in ['administrador', 'secretaria']}
+        # Durante a carga (cache de partida) os índices ainda não existem
+        logins_alunos = sistema.indices.ra_por_login if sistema.indices else {a.login for a in sistema.alunos.values()}
+        
+        for login in list(usuarios_base.keys()):
+            if login in sistema.professores or login in logins_alunos:
+                usuarios_base.pop(login)
+        return usuarios_base
+
+    def reiniciar_journal(self):
+        # O snapshot já contém todas as alterações do journal, que é trocado por um vazio
+        # (arquivo novo, para que os outros processos percebam a troca)
+        with open(self.journal + '.tmp', 'wb'):
+            pass
+        os.replace(self.journal + '.tmp', self.journal)
+        self.registros_journal = 0
+        self._posicao_journal = 0
+        self._versao = self._identidade()
+
+    def exportar(self, sistema):
+        # Grava um snapshot completo neste armazenamento a partir de um sistema carregado por outro
+        self._adquirir_trava()
+        try:
+            self.escrever_dados(sistema)
+        finally:
+            self._liberar_trava(True)
+
+    def escrever_snapshot(self, f, sistema, usuarios_base):
+        # Gera o mesmo JSON de json.dump(indent=4), registrando a posição de cada seção e de cada aluno
+        posicao = 0
+        secoes = {}
+        alunos = []
+
+        def escrever(texto):
+            nonlocal posicao
+            dados = texto.encode('utf-8')
+            f.write(dados)
+            posicao += len(dados)
+            return len(dados)
+
+        def valor(obj, nivel):
+            return json.dumps(obj, indent=4, cls=CustomEncoder, ensure_ascii=False).replace('\n', '\n' + ' ' * nivel)
+
+        escrever('{\n')
+        for nome, conteudo in (('usuarios', usuarios_base), ('professores', sistema.professores)):
+            escrever(f'    "{nome}": ')
+            secoes[nome] = [posicao, escrever(valor(conteudo, 4))]
+            escrever(',\n')
+
+        escrever('    "alunos": ')
+        if not len(sistema.alunos):
+            escrever('{}')
+        else:
+            preguicoso = isinstance(sistema.alunos, MapaPreguicoso)
+            carregados = dict(sistema.alunos.carregados()) if preguicoso else sistema.alunos
+            with open(self.arquivo, 'rb') if preguicoso else nullcontext() as antigo:
+                separador = '{\n'
+                for ra in sistema.alunos:
+                    escrever(separador + '        ' + json.dumps(ra, ensure_ascii=False) + ': ')
+                    separador = ',\n'
+                    aluno = carregados.get(ra)
+                    if aluno is not None:
+                        inicio, tamanho = posicao, escrever(valor(aluno, 8))
+                        alunos.append([ra, aluno.login, aluno.nome, inicio, tamanho])
+                    else:
+                        # Aluno nunca hidratado: copia o trecho original do snapshot sem decodificar
+                        login, nome, origem, tamanho = self._indice_alunos[ra]
+                        antigo.seek(origem)
+                        alunos.append([ra, login, nome, posicao, tamanho])
+                        f.write(antigo.read(tamanho))
+                        posicao += tamanho
+            escrever('\n    }')
+        escrever(',\n')
+
+        escrever('    "disciplinas": ')
+        secoes['disciplinas'] = [posicao, escrever(valor(sistema.disciplinas, 4))]
+        escrever(f',\n    "sequencia": {sistema.sequencia}\n}}')
+        return {'secoes': secoes, 'alunos': alunos}
+
+    def registrar(self, sistema, registro):
+        self.registrar_lote(sistema, [registro])
+
+    def registrar_lote(self, sistema, registros):
+        # Acrescenta uma linha por registro ao journal numa única escrita, sem reescrever o snapshot
+        # (sempre dentro de uma transação)
+        linha = ''.join(json.dumps(registro, cls=CustomEncoder, ensure_ascii=False) + '\n'
+                        for registro in registros).encode('utf-8')
+        # Uma falha aqui sobe para a transação, que descarta as alterações já aplicadas em memória
+        criando = not os.path.exists(self.journal)
+        with open(self.journal, 'ab', buffering=0) as f:
+            inicio = f.tell()
+            if inicio > self._posicao_journal:
+                # Resto de uma escrita interrompida por queda: fecha a linha para não corromper esta
+                linha = b'\n' + linha
+            try:
+                restante = memoryview(linha)
+                while restante:
+                    restante = restante[f.write(restante):]
+            except OSError as e:
+                # Escrita parcial (ex.: disco cheio): o journal volta ao tamanho anterior
+                print(f"[ERRO] Falha ao registrar alteração no journal: {e}")
+                f.truncate(inicio)
+                raise
+            self._posicao_journal = f.tell()
+        if METRICAS.ativo:
+            METRICAS.grandeza('journal.bytes_gravados', len(linha))
+        if criando:
+            self._versao = self._identidade()
+        self.registros_journal += len(registros)
+
+        # Compactação periódica: dobra o journal dentro do snapshot. Com um snapshot grande, reescrevê-lo
+        # a cada LIMITE_JOURNAL registros dominaria o custo das alterações (ex.: período de matrícula);
+        # o journal cresce até uma fração do snapshot, o que mantém o replay na carga proporcional a ela.
+        # Com o gravador em segundo plano ativo, a reescrita sai do caminho da operação.
+        snapshot = self._versao[0] if self._versao else None
+        if (self.registros_journal >= LIMITE_JOURNAL
+                and self._posicao_journal >= (snapshot[1] if snapshot else 0) * PROPORCAO_JOURNAL):
+            try:
+                sistema.agendar_gravacao()
+            except OSError:
+                # A operação já está gravada no journal; a compactação é tentada de novo no próximo registro
+                print("[AVISO] Compactação do journal adiada.")
+
+    def tamanho_snapshot(self):
+        return os.path.getsize(self.arquivo)
+
+    def registro_aplicado(self, registro):
+        pass # Ponto de extensão: o armazenamento fragmentado marca aqui o que precisa regravar
+
+    def reaplicar_journal(self, sistema, inicio=0):
+        # Reaplica sobre o estado carregado as operações registradas depois dele, a partir do byte `inicio`.
+        # Devolve quantas foram aplicadas.
+        self._posicao_journal = inicio
+        if not os.path.exists(self.journal):
+            return 0
+
+        aplicados = 0
+        with open(self.journal, 'rb') as f:
+            f.seek(inicio)
+            for linha in f:
+                if not linha.endswith(b'\n'):
+                    break # Linha ainda sendo escrita por outro processo (ou interrompida por uma queda)
+                posicao = self._posicao_journal
+                self._posicao_journal += len(linha)
+                if not linha.strip():
+                    continue
+                try:
+                    registro = json.loads(linha)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    # Uma linha truncada (queda durante a escrita) é descartada
+                    print(f"[AVISO] Registro corrompido na posição {posicao} do journal foi ignorado.")
+                    continue
+
+                # Registros já incorporados ao snapshot (compactação interrompida) são ignorados
+                if registro.get('seq', 0) <= sistema.sequencia:
+                    continue
+                try:
+                    sistema.aplicar_registro(registro)
+                except (KeyError, ValueError) as e:
+                    print(f"[AVISO] Registro {registro.get('seq')} do journal não pôde ser aplicado: {e}")
+                    continue
+                self.registro_aplicado(registro)
+                sistema.sequencia = registro['seq']
+                aplicados += 1
+
+        if aplicados:
+            print(f"[INFO] {aplicados} alteração(ões) reaplicada(s) a partir de {self.journal}.")
+        return aplicados
+
+
+class LeitorSnapshotBinario(pickle.Unpickler):
+    # O snapshot binário só contém tipos primitivos: qualquer referência a classe ou função é recusada
+    def find_class(self, modulo, nome):
+        raise pickle.UnpicklingError(f"Snapshot binário inválido: referência a {modulo}.{nome}.")
+
+
+class ArmazenamentoBinario(ArmazenamentoJSON):
+    # Snapshot binário compacto + o mesmo journal e controle de concorrência do armazenamento JSON.
+    # Arquivo: cabeçalho (assinatura, versão do formato, CRC32 e tamanho do conteúdo) seguido de um
+    # pickle apenas de tuplas, listas, dicts, str, bytes e números (uma tupla por entidade).
+    # Não tem modo preguiçoso; o JSON continua sendo o formato de exportação e inspeção.
+    ASSINATURA = b'PIMSNAP\x00'
+    VERSAO = ArmazenamentoJSON.VERSAO_COMPACTA
+    CABECALHO = struct.Struct('<8sHIQ')
+
+    def __init__(self, arquivo=None, journal=None):
+        super().__init__(arquivo or ARQUIVO_BINARIO, journal or ARQUIVO_JOURNAL_BINARIO)
+        self.cache = None # O próprio snapshot já está no formato do cache de partida
+
+    def carregar_completo(self, sistema):
+        with open(self.arquivo, 'rb') as f:
+            cabecalho = f.read(self.CABECALHO.size)
+            conteudo = f.read()
+        if len(cabecalho) < self.CABECALHO.size:
+            raise ValueError("snapshot binário truncado")
+        assinatura, versao, crc, tamanho = self.CABECALHO.unpack(cabecalho)
+        if assinatura != self.ASSINATURA:
+            raise ValueError(f"{self.arquivo} não é um snapshot binário do sistema")
+        if versao > self.VERSAO:
+            raise ValueError(f"snapshot binário na versão {versao}, mais nova que a suportada ({self.VERSAO})")
+        if len(conteudo) != tamanho or zlib.crc32(conteudo) != crc:
+            raise ValueError("snapshot binário corrompido (tamanho ou CRC não conferem)")
+
+        inicio = time.perf_counter()
+        dados = LeitorSnapshotBinario(io.BytesIO(conteudo)).load()
+        meio = time.perf_counter()
+        self.restaurar_estado_compacto(sistema, dados)
+
+        if METRICAS.ativo:
+            METRICAS.registrar('carregar.binario.parse', meio - inicio)
+            METRICAS.registrar('carregar.binario.reconstrucao', time.perf_counter() - meio)
+            METRICAS.grandeza('carregar.binario.bytes_lidos', len(conteudo))
+
+    def escrever_dados(self, sistema):
+        dados = self.estado_compacto(sistema)
+        try:
+            conteudo = pickle.dumps(dados, protocol=pickle.HIGHEST_PROTOCOL)
+            temporario = self.arquivo + '.tmp'
+            with open(temporario, 'wb') as f:
+                f.write(self.CABECALHO.pack(self.ASSINATURA, self.VERSAO, zlib.crc32(conteudo), len(conteudo)))
+                f.write(conteudo)
+            os.replace(temporario, self.arquivo)
+            if METRICAS.ativo:
+                METRICAS.grandeza('salvar.bytes_gravados', self.CABECALHO.size + len(conteudo))
+            self.reiniciar_journal()
+        except Exception as e:
+            print(f"[ERRO] Falha ao salvar dados: {e}")
+            raise
+
+
+class ArmazenamentoFragmentado(ArmazenamentoJSON):
+    # Snapshot dividido em fragmentos JSON dentro de um diretório: os alunos em FRAGMENTOS_ALUNOS grupos
+    # (pelo RA), as disciplinas em FRAGMENTOS_DISCIPLINAS grupos (pelo ID) e um fragmento 'base' com os
+    # usuários base e os professores. O manifesto aponta para o arquivo atual de cada fragmento. Salvar
+    # regrava só os fragmentos tocados desde o último snapshot, em arquivos novos, e depois troca o
+    # manifesto de uma vez: uma queda no meio deixa o snapshot anterior intacto.
+    # Journal e controle de concorrência são os do armazenamento JSON (o manifesto faz o papel do snapshot).
+    ALTERAM_DISCIPLINA = {'matricula', 'cancelamento', 'espera', 'capacidade', 'renomear_disciplina',
+                          'frequencia', 'frequencia_lote'}
+
+    def __init__(self, diretorio=None):
+        self.diretorio = diretorio or ARQUIVO_FRAGMENTOS
+        os.makedirs(self.diretorio, exist_ok=True)
+        super().__init__(os.path.join(self.diretorio, 'manifesto.json'), os.path.join(self.diretorio, 'journal'))
+        self.cache = None
+        self.divisoes = {'alunos': FRAGMENTOS_ALUNOS, 'disciplinas': FRAGMENTOS_DISCIPLINAS}
+        self.sujos = set() # Fragmentos alterados desde o último snapshot
+        self.geracao = None # Geração do manifesto carregado
+
+    def fragmento(self, tipo, chave):
+        # crc32 (e não hash()) para o grupo ser o mesmo em todos os processos
+        return f"{tipo}.{zlib.crc32(str(chave).encode('utf-8')) % self.divisoes[tipo]:03d}"
+
+    def todos_fragmentos(self):
+        return ['base'] + [f"{tipo}.{i:03d}" for tipo, quantidade in self.divisoes.items() for i in range(quantidade)]
+
+    def registro_aplicado(self, registro):
+        # Marca os fragmentos que a operação alterou (mesma lógica de invalidar_historicos)
+        op = registro['op']
+        if op == 'usuario':
+            dados = registro['dados']
+            self.sujos.add(self.fragmento('alunos', dados['ra']) if dados.get('perfil') == 'aluno' else 'base')
+        elif op == 'disciplina':
+            # O professor atribuído também muda (disciplinas_ministradas)
+            self.sujos.update((self.fragmento('disciplinas', registro['dados']['id']), 'base'))
+        elif op == 'notas_lote':
+            self.sujos.update(self.fragmento('alunos', ra) for ra, _, _ in registro['notas'])
+        elif op == 'frequencia_lote':
+            self.sujos.update(self.fragmento('alunos', ra) for ra in registro['presencas'])
+        elif 'ra' in registro:
+            self.sujos.add(self.fragmento('alunos', registro['ra']))
+        if op in self.ALTERAM_DISCIPLINA:
+            self.sujos.add(self.fragmento('disciplinas', registro['disciplina']))
+
+    def registrar_lote(self, sistema, registros):
+        for registro in registros:
+            self.registro_aplicado(registro)
+        super().registrar_lote(sistema, registros)
+
+    def tamanho_snapshot(self):
+        manifesto = self.ler_manifesto()
+        return os.path.getsize(self.arquivo) + sum(
+            os.path.getsize(os.path.join(self.diretorio, arquivo)) for arquivo in manifesto['fragmentos'].values())
+
+    def ler_manifesto(self):
+        with open(self.arquivo, 'rb') as f:
+            return json.loads(f.read())
+
+    def ler_dados(self, sistema):
+        self.sujos = set()
+        self.geracao = None
+        super().ler_dados(sistema)
+
+    def carregar_completo(self, sistema):
+        manifesto = self.ler_manifesto()
+        self.divisoes = manifesto['divisoes']
+        self.geracao = manifesto['geracao']
+        arquivos = list(manifesto['fragmentos'].values())
+
+        def ler(arquivo):
+            with open(os.path.join(self.diretorio, arquivo), 'rb') as f:
+                return f.read()
+
+        # A leitura dos arquivos é feita em paralelo; a decodificação depende do GIL e segue em ordem
+        with ThreadPoolExecutor(max_workers=min(8, len(arquivos) or 1)) as executor:
+            conteudos = list(executor.map(ler, arquivos))
+
+        sistema.usuarios = {}
+        sistema.professores = {}
+        sistema.alunos = {}
+        sistema.disciplinas = {}
+        sistema.sequencia = manifesto['sequencia']
+        for conteudo in conteudos:
+            dados = decodificar_json(conteudo, 'carregar.fragmento')
+            sistema.usuarios.update(dados.get('usuarios', {}))
+            sistema.professores.update(dados.get('professores', {}))
+            sistema.alunos.update(dados.get('alunos', {}))
+            sistema.disciplinas.update(dados.get('disciplinas', {}))
+
+        sistema.usuarios.update(sistema.professores)
+        for aluno in sistema.alunos.values():
+            sistema.usuarios[aluno.login] = sistema.vincular_aluno(aluno)
+
+    def escrever_dados(self, sistema):
+        # Sob a trava: o manifesto em disco é o atual, e só este processo grava fragmentos agora
+        anterior = self.ler_manifesto() if os.path.exists(self.arquivo) else None
+        if anterior and anterior['geracao'] == self.geracao:
+            nomes = sorted(self.sujos)
+            fragmentos = dict(anterior['fragmentos'])
+        else:
+            nomes = self.todos_fragmentos() # Primeiro snapshot (ou exportação): grava tudo
+            fragmentos = {}
+        if anterior and not nomes:
+            return
+        geracao = (anterior['geracao'] + 1) if anterior else 1
+
+        # Agrupa só os tipos de fragmento que serão regravados
+        conteudos = {nome: {} for nome in nomes}
+        if 'base' in conteudos:
+            conteudos['base'] = {'usuarios': self.usuarios_base(sistema), 'professores': sistema.professores}
+        for tipo, entidades in (('alunos', sistema.alunos), ('disciplinas', sistema.disciplinas)):
+            if any(nome.startswith(tipo) for nome in nomes):
+                for chave, entidade in entidades.items():
+                    grupo = conteudos.get(self.fragmento(tipo, chave))
+                    if grupo is not None:
+                        grupo.setdefault(tipo, {})[chave] = entidade
+
+        try:
+            gravados = 0
+            for nome, conteudo in conteudos.items():
+                arquivo = f"{nome}.{geracao}.json"
+                dados = json.dumps(conteudo, cls=CustomEncoder, ensure_ascii=False).encode('utf-8')
+                with open(os.path.join(self.diretorio, arquivo), 'wb') as f:
+                    f.write(dados)
+                fragmentos[nome] = arquivo
+                gravados += len(dados)
+
+            manifesto = {'geracao': geracao, 'sequencia': sistema.sequencia, 'divisoes': self.divisoes, 'fragmentos': fragmentos}
+            temporario = self.arquivo + '.tmp'
+            with open(temporario, 'w', encoding='utf-8') as f:
+                json.dump(manifesto, f, ensure_ascii=False)
+            os.replace(temporario, self.arquivo)
+            if METRICAS.ativo:
+                METRICAS.grandeza('salvar.bytes_gravados', gravados)
+                METRICAS.grandeza('salvar.fragmentos_gravados', len(conteudos))
+
+            # Fragmentos substituídos (e sobras de um salvamento interrompido) não são mais referenciados
+            atuais = set(fragmentos.values())
+            for arquivo in os.listdir(self.diretorio):
+                if arquivo.endswith('.json') and arquivo != os.path.basename(self.arquivo) and arquivo not in atuais:
+                    os.remove(os.path.join(self.diretorio, arquivo))
+
+            self.sujos = set()
+            self.geracao = geracao
+            self.reiniciar_journal()
+        except Exception as e:
+            print(f"[ERRO] Falha ao salvar dados: {e}")
+            raise
+
+
+class FalhaBanco(OSError):
+    # Erro do SQLite ao gravar (commit recusado, disco cheio, banco corrompido): quem chama trata como
+    # as falhas de E/S dos armazenamentos em arquivo
+    pass
+
+
+class ArmazenamentoSQLite(ControleConcorrencia):
+    # Banco SQLite local com tabelas normalizadas; as entidades são carregadas sob demanda
+    # Entre processos: modo WAL (leitores não esperam escritores), BEGIN IMMEDIATE como trava de escrita
+    # e a sequência gravada em metadados como versão.
+    ESQUEMA = """
+        CREATE TABLE IF NOT EXISTS metadados (chave TEXT PRIMARY KEY, valor TEXT);
+        CREATE TABLE IF NOT EXISTS usuarios (
+            login TEXT PRIMARY KEY,
+            nome TEXT NOT NULL,
+            perfil TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS alunos (
+            ra TEXT PRIMARY KEY,
+            login TEXT NOT NULL REFERENCES usuarios(login),
+            dados_pessoais TEXT NOT NULL DEFAULT '{}'
+        );
+        CREATE TABLE IF NOT EXISTS disciplinas (
+            id TEXT PRIMARY KEY,
+            nome TEXT NOT NULL,
+            professor_login TEXT,
+            capacidade INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS matriculas (
+            ra TEXT NOT NULL REFERENCES alunos(ra),
+            disciplina_id TEXT NOT NULL REFERENCES disciplinas(id),
+            status TEXT NOT NULL DEFAULT 'Matriculado',
+            PRIMARY KEY (ra, disciplina_id)
+        );
+        CREATE TABLE IF NOT EXISTS lista_espera (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            disciplina_id TEXT NOT NULL REFERENCES disciplinas(id),
+            ra TEXT NOT NULL,
+            UNIQUE (disciplina_id, ra)
+        );
+        CREATE TABLE IF NOT EXISTS notas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ra TEXT NOT NULL,
+            disciplina_id TEXT NOT NULL,
+            nota REAL NOT NULL,
+            avaliacao TEXT
+        );
+        CREATE TABLE IF NOT EXISTS frequencias (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ra TEXT NOT NULL,
+            disciplina_id TEXT NOT NULL,
+            data TEXT NOT NULL,
+            tipo TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS aulas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            disciplina_id TEXT NOT NULL,
+            data TEXT NOT NULL,
+            UNIQUE (disciplina_id, data)
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_alunos_login ON alunos(login);
+        CREATE INDEX IF NOT EXISTS idx_usuarios_perfil ON usuarios(perfil);
+        CREATE INDEX IF NOT EXISTS idx_disciplinas_professor ON disciplinas(professor_login);
+        CREATE INDEX IF NOT EXISTS idx_matriculas_disciplina ON matriculas(disciplina_id);
+        CREATE INDEX IF NOT EXISTS idx_notas_aluno ON notas(ra, disciplina_id);
+        CREATE INDEX IF NOT EXISTS idx_frequencias_aluno ON frequencias(ra, disciplina_id);
+    """
+    # Uma marca por aluno, disciplina e aula: remarcar a presença troca o tipo da linha existente (que mantém
+    # o id, e com ele a posição da aula na tabela de aulas da disciplina)
+    INSERIR_FREQUENCIA = ("INSERT INTO frequencias (ra, disciplina_id, data, tipo) VALUES (?, ?, ?, ?) "
+                          "ON CONFLICT (ra, disciplina_id, data) DO UPDATE SET tipo = excluded.tipo")
+    # A tabela de aulas de cada disciplina (Disciplina.sessoes), na ordem de registro: é ela que dá a ordem
+    # das frequências, como no snapshot JSON
+    INSERIR_AULA = "INSERT OR IGNORE INTO aulas (disciplina_id, data) VALUES (?, ?)"
+
+    def __init__(self, arquivo=None):
+        self.arquivo = arquivo or ARQUIVO_SQLITE
+        # O modo serviço usa a conexão a partir de várias threads, sempre sob o lock do serviço
+        self.conexao = sqlite3.connect(self.arquivo, timeout=TEMPO_ESPERA_TRAVA, check_same_thread=False)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.executescript(self.ESQUEMA)
+        # Bancos criados antes do rótulo de avaliação
+        colunas = [c[1] for c in self.conexao.execute("PRAGMA table_info(notas)")]
+        if 'avaliacao' not in colunas:
+            self.conexao.execute("ALTER TABLE notas ADD COLUMN avaliacao TEXT")
+        # Bancos criados antes da capacidade das turmas
+        colunas = [c[1] for c in self.conexao.execute("PRAGMA table_info(disciplinas)")]
+        if 'capacidade' not in colunas:
+            self.conexao.execute("ALTER TABLE disciplinas ADD COLUMN capacidade INTEGER")
+        # Bancos criados antes da marca única por aula: as remarcações viraram linhas repetidas. Fica a
+        # primeira linha de cada aula, com o tipo da última.
+        indices = [i[1] for i in self.conexao.execute("PRAGMA index_list(frequencias)")]
+        if 'idx_frequencias_aula' not in indices:
+            with self.conexao:
+                self.conexao.execute("""
+                    UPDATE frequencias SET tipo = (
+                        SELECT f.tipo FROM frequencias f WHERE f.ra = frequencias.ra
+                        AND f.disciplina_id = frequencias.disciplina_id AND f.data = frequencias.data
+                        ORDER BY f.id DESC LIMIT 1)
+                    WHERE id IN (SELECT MIN(id) FROM frequencias GROUP BY ra, disciplina_id, data HAVING COUNT(*) > 1)""")
+                self.conexao.execute("DELETE FROM frequencias WHERE id NOT IN "
+                                     "(SELECT MIN(id) FROM frequencias GROUP BY ra, disciplina_id, data)")
+                self.conexao.execute("CREATE UNIQUE INDEX idx_frequencias_aula ON frequencias(ra, disciplina_id, data)")
+        # Bancos criados antes da tabela de aulas: a ordem possível é a da primeira marca de cada aula
+        if (self.conexao.execute("SELECT 1 FROM aulas LIMIT 1").fetchone() is None
+                and self.conexao.execute("SELECT 1 FROM frequencias LIMIT 1").fetchone() is not None):
+            with self.conexao:
+                self.conexao.execute("INSERT INTO aulas (disciplina_id, data) SELECT disciplina_id, data FROM frequencias "
+                                     "GROUP BY disciplina_id, data ORDER BY MIN(id)")
+
+    def _adquirir_trava(self):
+        try:
+            self.conexao.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError as e:
+            raise TimeoutError(f"Banco {self.arquivo} em uso por outro processo ({e}).")
+
+    def _liberar_trava(self, sucesso):
+        if self.conexao.in_transaction:
+            if sucesso:
+                try:
+                    self.conexao.commit()
+                except sqlite3.Error as e:
+                    # Commit recusado: desfaz a transação; a memória é recarregada por transacao()
+                    self.conexao.rollback()
+                    raise FalhaBanco(f"Commit recusado pelo banco {self.arquivo}: {e}") from e
+            else:
+                self.conexao.rollback()
+
+    def sincronizar(self, sistema):
+        # Outro processo gravou desde a nossa versão: descarta as entidades em cache e volta a consultar o banco
+        linha = self.conexao.execute("SELECT valor FROM metadados WHERE chave = 'sequencia'").fetchone()
+        if (int(linha[0]) if linha else 0) != sistema.sequencia:
+            print("[INFO] Dados alterados por outro processo. Recarregando.")
+            sistema.carregar_dados()
+
+    def carregar(self, sistema):
+        # Nada é hidratado aqui: os dicionários do sistema consultam o banco linha a linha
+        sistema.alunos = MapaPreguicoso(
+            lambda ra: self._carregar_aluno(sistema, ra),
+            lambda: [r[0] for r in self.conexao.execute("SELECT ra FROM alunos ORDER BY rowid")],
+            lambda: self.conexao.execute("SELECT COUNT(*) FROM alunos").fetchone()[0],
+            lambda ra: self.conexao.execute("SELECT 1 FROM alunos WHERE ra = ?", (ra,)).fetchone() is not None,
+            sistema.matriculas.trava)
+        sistema.professores = MapaPreguicoso(
+            self._carregar_professor,
+            lambda: [r[0] for r in self.conexao.execute("SELECT login FROM usuarios WHERE perfil = 'professor' ORDER BY rowid")],
+            lambda: self.conexao.execute("SELECT COUNT(*) FROM usuarios WHERE perfil = 'professor'").fetchone()[0],
+            lambda login: self.conexao.execute("SELECT 1 FROM usuarios WHERE login = ? AND perfil = 'professor'", (login,)).fetchone() is not None,
+            sistema.matriculas.trava)
+        sistema.disciplinas = MapaPreguicoso(
+            self._carregar_disciplina,
+            lambda: [r[0] for r in self.conexao.execute("SELECT id FROM disciplinas ORDER BY rowid")],
+            lambda: self.conexao.execute("SELECT COUNT(*) FROM disciplinas").fetchone()[0],
+            lambda id_disc: self.conexao.execute("SELECT 1 FROM disciplinas WHERE id = ?", (id_disc,)).fetchone() is not None,
+            sistema.matriculas.trava)
+        sistema.usuarios = MapaPreguicoso(
+            lambda login: self._carregar_usuario(sistema, login),
+            lambda: [r[0] for r in self.conexao.execute("SELECT login FROM usuarios ORDER BY rowid")],
+            lambda: self.conexao.execute("SELECT COUNT(*) FROM usuarios").fetchone()[0],
+            lambda login: self.conexao.execute("SELECT 1 FROM usuarios WHERE login = ?", (login,)).fetchone() is not None,
+            sistema.matriculas.trava)
+
+        linha = self.conexao.execute("SELECT valor FROM metadados WHERE chave = 'sequencia'").fetchone()
+        sistema.sequencia = int(linha[0]) if linha else 0
+
+        # Banco novo: cria os usuários iniciais (admin/secretaria)
+        if 'admin' not in sistema.usuarios:
+            sistema.cadastrar_usuario(Usuario('admin', '123', 'Admin Master', 'administrador'))
+            sistema.cadastrar_usuario(Usuario('secretaria1', '123', 'Ana Secretária', 'secretaria'))
+            print("[AVISO] Usuários iniciais (admin/secretaria) criados no banco.")
+
+        print(f"[INFO] Banco {self.arquivo} aberto com sucesso.")
+
+    def nomes_alunos(self, sistema):
+        carregados = dict(sistema.alunos.carregados())
+        return [(ra, carregados[ra].login, carregados[ra].nome) if ra in carregados else (ra, login, nome)
+                for ra, login, nome in self.conexao.execute(
+                    "SELECT a.ra, a.login, u.nome FROM alunos a JOIN usuarios u ON u.login = a.login ORDER BY a.rowid")]
+
+    def pares_login_ra(self, sistema):
+        pares = dict(self.conexao.execute("SELECT login, ra FROM alunos"))
+        pares.update((aluno.login, ra) for ra, aluno in sistema.alunos.carregados())
+        return pares.items()
+
+    def salvar(self, sistema):
+        # Cada operação já é gravada na transação de transacao(); um commit aqui a encerraria antes da hora
+        pass
+
+    def registrar(self, sistema, registro):
+        self.registrar_lote(sistema, [registro])
+
+    def registrar_lote(self, sistema, registros):
+        # Sempre dentro da transação aberta por _adquirir_trava (BEGIN IMMEDIATE): o lote inteiro vai para
+        # o banco no commit de _liberar_trava, sem liberar a trava antes do fim da operação
+        try:
+            for registro in registros:
+                self.gravar_registro(sistema, registro)
+            self.conexao.execute("INSERT OR REPLACE INTO metadados (chave, valor) VALUES ('sequencia', ?)",
+                                 (str(registros[-1]['seq']),))
+        except sqlite3.Error as e:
+            raise FalhaBanco(f"Falha ao gravar no banco {self.arquivo}: {e}") from e
+
+    def gravar_registro(self, sistema, registro):
+        # Traduz a operação em comandos que tocam apenas as linhas afetadas
+        op = registro['op']
+        if op == 'usuario':
+            self.inserir_usuario(registro['dados'])
+        elif op == 'disciplina':
+            self.inserir_disciplina(registro['dados'])
+        elif op == 'matricula':
+            self.conexao.execute("INSERT OR IGNORE INTO matriculas (ra, disciplina_id) VALUES (?, ?)",
+                                 (registro['ra'], registro['disciplina']))
+            self.conexao.execute("DELETE FROM lista_espera WHERE ra = ? AND disciplina_id = ?",
+                                 (registro['ra'], registro['disciplina']))
+        elif op == 'espera':
+            self.conexao.execute("INSERT OR IGNORE INTO lista_espera (disciplina_id, ra) VALUES (?, ?)",
+                                 (registro['disciplina'], registro['ra']))
+        elif op == 'capacidade':
+            self.conexao.execute("UPDATE disciplinas SET capacidade = ? WHERE id = ?",
+                                 (registro['capacidade'], registro['disciplina']))
+        elif op == 'cancelamento':
+            chave = (registro['ra'], registro['disciplina'])
+            self.conexao.execute("DELETE FROM lista_espera WHERE ra = ? AND disciplina_id = ?", chave)
+            self.conexao.execute("DELETE FROM matriculas WHERE ra = ? AND disciplina_id = ?", chave)
+            self.conexao.execute("DELETE FROM notas WHERE ra = ? AND disciplina_id = ?", chave)
+            self.conexao.execute("DELETE FROM frequencias WHERE ra = ? AND disciplina_id = ?", chave)
+        elif op == 'nota':
+            self.conexao.execute("INSERT INTO notas (ra, disciplina_id, nota, avaliacao) VALUES (?, ?, ?, ?)",
+                                 (registro['ra'], registro['disciplina'], registro['nota'], registro.get('avaliacao')))
+        elif op == 'notas_lote':
+            self.conexao.executemany("INSERT INTO notas (ra, disciplina_id, nota, avaliacao) VALUES (?, ?, ?, ?)",
+                                     [(ra, registro['disciplina'], nota, avaliacao) for ra, nota, avaliacao in registro['notas']])
+        elif op == 'frequencia':
+            self.conexao.execute(self.INSERIR_AULA, (registro['disciplina'], registro['data']))
+            self.conexao.execute(self.INSERIR_FREQUENCIA,
+                                 (registro['ra'], registro['disciplina'], registro['data'], registro['tipo']))
+        elif op == 'frequencia_lote':
+            self.conexao.execute(self.INSERIR_AULA, (registro['disciplina'], registro['data']))
+            self.conexao.executemany(self.INSERIR_FREQUENCIA,
+                                     [(ra, registro['disciplina'], registro['data'], tipo) for ra, tipo in registro['presencas'].items()])
+        elif op == 'renomear_disciplina':
+            self.conexao.execute("UPDATE disciplinas SET nome = ? WHERE id = ?", (registro['nome'], registro['disciplina']))
+        elif op == 'dados_pessoais':
+            aluno = sistema.alunos[registro['ra']]
+            self.conexao.execute("UPDATE usuarios SET nome = ? WHERE login = ?", (aluno.nome, aluno.login))
+            self.conexao.execute("UPDATE alunos SET dados_pessoais = ? WHERE ra = ?",
+                                 (json.dumps(aluno.dados_pessoais, ensure_ascii=False), aluno.ra))
+        else:
+            raise ValueError(f"Operação desconhecida: {op}")
+
+    # Inserção de entidades completas (usada no cadastro e na migração)
+
+    def inserir_usuario(self, dados):
+        self.conexao.execute("INSERT OR REPLACE INTO usuarios (login, nome, perfil) VALUES (?, ?, ?)",
+                             (dados['login'], dados['nome'], dados['perfil']))
+        if dados['perfil'] != 'aluno':
+            return
+
+        ra = dados['ra']
+        self.conexao.execute("INSERT OR REPLACE INTO alunos (ra, login, dados_pessoais) VALUES (?, ?, ?)",
+                             (ra, dados['login'], json.dumps(dados.get('dados_pessoais', {}), ensure_ascii=False)))
+        self.conexao.executemany("INSERT OR REPLACE INTO matriculas (ra, disciplina_id, status) VALUES (?, ?, ?)",
+                                 [(ra, d, c.get('status', 'Matriculado')) for d, c in dados.get('cursos', {}).items()])
+        avaliacoes = dados.get('avaliacoes', {})
+        self.conexao.executemany("INSERT INTO notas (ra, disciplina_id, nota, avaliacao) VALUES (?, ?, ?, ?)",
+                                 [(ra, d, n, avaliacoes[d][i] if d in avaliacoes else None)
+                                  for d, notas in dados.get('notas', {}).items() for i, n in enumerate(notas)])
+
+    def inserir_frequencias(self, aluno):
+        # Frequências no formato de linhas (data/hora por marca), lidas pela visão compatível do aluno
+        self.conexao.executemany(self.INSERIR_FREQUENCIA,
+                                 [(aluno.ra, d, f['data'], f['tipo']) for d, freqs in aluno.frequencias.items() for f in freqs])
+
+    def inserir_disciplina(self, dados):
+        self.conexao.execute("INSERT OR REPLACE INTO disciplinas (id, nome, professor_login, capacidade) VALUES (?, ?, ?, ?)",
+                             (dados['id'], dados['nome'], dados.get('professor_login'), dados.get('capacidade')))
+        self.conexao.executemany("INSERT OR IGNORE INTO matriculas (ra, disciplina_id) VALUES (?, ?)",
+                                 [(ra, dados['id']) for ra in dados.get('alunos_ra', [])])
+        self.conexao.executemany("INSERT OR IGNORE INTO lista_espera (disciplina_id, ra) VALUES (?, ?)",
+                                 [(dados['id'], ra) for ra in dados.get('lista_espera', [])])
+        self.conexao.executemany(self.INSERIR_AULA, [(dados['id'], data) for data in dados.get('sessoes', [])])
+
+    # Carregamento sob demanda
+
+    def _carregar_usuario(self, sistema, login):
+        linha = self.conexao.execute("SELECT nome, perfil FROM usuarios WHERE login = ?", (login,)).fetchone()
+        if not linha:
+            return None
+        nome, perfil = linha
+        if perfil == 'aluno':
+            ra = self.conexao.execute("SELECT ra FROM alunos WHERE login = ?", (login,)).fetchone()
+            return sistema.alunos.get(ra[0]) if ra else None
+        if perfil == 'professor':
+            return sistema.professores.get(login)
+        return Usuario(login, '123', nome, perfil)
+
+    def _carregar_professor(self, login):
+        linha = self.conexao.execute("SELECT nome FROM usuarios WHERE login = ? AND perfil = 'professor'", (login,)).fetchone()
+        if not linha:
+            return None
+        professor = Professor(login, '123', linha[0])
+        professor.disciplinas_ministradas = [r[0] for r in self.conexao.execute(
+            "SELECT id FROM disciplinas WHERE professor_login = ? ORDER BY rowid", (login,))]
+        return professor
+
+    def _carregar_aluno(self, sistema, ra):
+        linha = self.conexao.execute(
+            "SELECT a.login, u.nome, a.dados_pessoais FROM alunos a JOIN usuarios u ON u.login = a.login WHERE a.ra = ?",
+            (ra,)).fetchone()
+        if not linha:
+            return None
+        login, nome, dados_pessoais = linha
+        aluno = Aluno(login, '123', nome, ra)
+        aluno.dados_pessoais = json.loads(dados_pessoais)
+        for id_disc, status in self.conexao.execute(
+                "SELECT disciplina_id, status FROM matriculas WHERE ra = ? ORDER BY rowid", (ra,)):
+            aluno.cursos[id_disc] = situacao_curso(status)
+        for id_disc, nota, avaliacao in self.conexao.execute(
+                "SELECT disciplina_id, nota, avaliacao FROM notas WHERE ra = ? ORDER BY id", (ra,)):
+            aluno.registrar_nota(id_disc, nota, avaliacao)
+        frequencias = {}
+        for id_disc, data, tipo in self.conexao.execute(
+                "SELECT disciplina_id, data, tipo FROM frequencias WHERE ra = ? ORDER BY id", (ra,)):
+            frequencias.setdefault(id_disc, []).append({'data': data, 'tipo': tipo})
+        aluno.frequencias = FrequenciasCompactas.de_json(frequencias)
+        sistema.vincular_aluno(aluno)
+        aluno.recalcular_agregados()
+        return aluno
+
+    def _carregar_disciplina(self, id_disciplina):
+        linha = self.conexao.execute("SELECT nome, professor_login, capacidade FROM disciplinas WHERE id = ?",
+                                     (id_disciplina,)).fetchone()
+        if not linha:
+            return None
+        disciplina = Disciplina(id_disciplina, *linha)
+        disciplina.alunos_ra = ConjuntoOrdenado(r[0] for r in self.conexao.execute(
+            "SELECT ra FROM matriculas WHERE disciplina_id = ? ORDER BY rowid", (id_disciplina,)))
+        disciplina.lista_espera = ConjuntoOrdenado(r[0] for r in self.conexao.execute(
+            "SELECT ra FROM lista_espera WHERE disciplina_id = ? ORDER BY id", (id_disciplina,)))
+        disciplina.sessoes = [r[0] for r in self.conexao.execute(
+            "SELECT data FROM aulas WHERE disciplina_id = ? ORDER BY id", (id_disciplina,))]
+        return disciplina
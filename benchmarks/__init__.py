@@ -0,0 +1,20 @@
+# Benchmarks do Sistema Acadêmico e gerador de instituições sintéticas.
+#   python -m benchmarks.gerador --alunos 10000 --saida dados_10k.json
+#   python -m benchmarks.executar --tamanhos 1000 10000 100000
+import importlib.util
+import os
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CAMINHO_SISTEMA = os.path.join(RAIZ, 'Trabalho PIM.py')
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ) # Módulos do sistema (entidades, armazenamento, ...) ficam ao lado do script
+
+def carregar_sistema():
+    # O script principal tem espaço no nome; é importado pelo caminho (uma única vez)
+    if 'trabalho_pim' not in sys.modules:
+        spec = importlib.util.spec_from_file_location('trabalho_pim', CAMINHO_SISTEMA)
+        modulo = importlib.util.module_from_spec(spec)
+        sys.modules['trabalho_pim'] = modulo
+        spec.loader.exec_module(modulo)
+    return sys.modules['trabalho_pim']
@@ -0,0 +1,210 @@
+# Benchmarks repetíveis das operações principais em instituições sintéticas de vários tamanhos.
+# Os resultados vão para um JSON, para comparar versões:
+#   python -m benchmarks.executar --tamanhos 1000 10000 --saida resultados_benchmark.json
+#   python -m benchmarks.executar --comparar antes.json depois.json
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime
+
+from benchmarks import CAMINHO_SISTEMA, carregar_sistema
+from benchmarks.gerador import arquivos_da_base, gerar_instituicao
+from estatisticas import np
+
+VERSAO_FORMATO = 1
+
+def resumir(amostras):
+    # amostras em segundos -> estatísticas em milissegundos
+    ordenadas = sorted(amostras)
+    return {
+        'execucoes': len(ordenadas),
+        'total_s': round(sum(ordenadas), 6),
+        'media_ms': round(statistics.fmean(ordenadas) * 1000, 6),
+        'mediana_ms': round(statistics.median(ordenadas) * 1000, 6),
+        'p95_ms': round(ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * 0.95))] * 1000, 6),
+        'minimo_ms': round(ordenadas[0] * 1000, 6),
+    }
+
+def cronometrar(funcao, argumentos):
+    # Mede cada chamada separadamente
+    amostras = []
+    for args in argumentos:
+        inicio = time.perf_counter()
+        funcao(*args)
+        amostras.append(time.perf_counter() - inicio)
+    return amostras
+
+def tamanho_objeto(obj):
+    # Tamanho do próprio objeto, mais o __dict__ de instância quando a classe não usa __slots__
+    return sys.getsizeof(obj) + (sys.getsizeof(obj.__dict__) if hasattr(obj, '__dict__') else 0)
+
+def medir_memoria(pim, armazenamento):
+    # Memória retida pelo sistema recém-carregado e quanto dela são os objetos de entidade em si
+    gc.collect()
+    tracemalloc.start()
+    with redirect_stdout(io.StringIO()):
+        sistema = pim.SistemaAcademico(armazenamento)
+    retida, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    entidades = sum(tamanho_objeto(aluno) + tamanho_objeto(aluno.frequencias) for aluno in sistema.alunos.values())
+    entidades += sum(tamanho_objeto(obj) for obj in list(sistema.professores.values()) + list(sistema.disciplinas.values()))
+    alunos = max(1, len(sistema.alunos))
+    return {
+        'retida_bytes': retida,
+        'por_aluno_bytes': round(retida / alunos, 1),
+        'por_100k_alunos_mb': round(retida / alunos * 100000 / 2**20, 1),
+        'objetos_entidade_bytes': entidades,
+    }
+
+def executar_tamanho(pim, diretorio, alunos, repeticoes, operacoes, semente, formato='json'):
+    caminho = os.path.join(diretorio, f'instituicao_{alunos}.json')
+    inicio = time.perf_counter()
+    dados = gerar_instituicao(caminho, alunos, semente=semente)
+    dados['geracao_s'] = round(time.perf_counter() - inicio, 3)
+
+    aleatorio = random.Random(semente)
+    resultados = {}
+    with redirect_stdout(io.StringIO()):
+        armazenamento = pim.ArmazenamentoJSON(*arquivos_da_base(caminho))
+        if formato == 'binario':
+            binario = pim.ArmazenamentoBinario(caminho + '.pimb', caminho + '.pimb.journal')
+            pim.converter_snapshot(armazenamento, binario)
+            armazenamento = binario
+            dados['arquivo_bytes'] = os.path.getsize(binario.arquivo)
+    memoria = medir_memoria(pim, armazenamento)
+    with redirect_stdout(io.StringIO()):
+        sistema = pim.SistemaAcademico(armazenamento)
+
+        resultados['carregar_dados'] = resumir(cronometrar(sistema.carregar_dados, [()] * repeticoes))
+        resultados['salvar_dados'] = resumir(cronometrar(sistema.salvar_dados, [()] * repeticoes))
+        if armazenamento.cache:
+            # Inicialização completa sem o cache de partida (fria) e com ele válido (quente)
+            def partida(fria):
+                if fria and os.path.exists(armazenamento.cache):
+                    os.remove(armazenamento.cache)
+                pim.SistemaAcademico(pim.ArmazenamentoJSON(*arquivos_da_base(caminho)))
+            resultados['partida_fria'] = resumir(cronometrar(partida, [(True,)] * repeticoes))
+            resultados['partida_quente'] = resumir(cronometrar(partida, [(False,)] * repeticoes))
+
+        ras = list(sistema.alunos)
+        disciplinas = list(sistema.disciplinas)
+        matriculas = [(ra, id_disc) for ra in aleatorio.sample(ras, min(len(ras), operacoes))
+                      for id_disc in sistema.alunos[ra].cursos]
+
+        resultados['verificar_aprovacao'] = resumir(cronometrar(
+            lambda ra, id_disc: sistema.alunos[ra].verificar_aprovacao(id_disc),
+            [aleatorio.choice(matriculas) for _ in range(operacoes * 10)]))
+
+        sistema.cache_historicos.limpar()
+        consultas = [(aleatorio.choice(ras),) for _ in range(operacoes)]
+        resultados['historico_escolar'] = resumir(cronometrar(sistema.historico_escolar, consultas))
+        resultados['historico_escolar_cache'] = resumir(cronometrar(sistema.historico_escolar, consultas))
+
+        novas = set()
+        while len(novas) < operacoes * 11:
+            ra, id_disc = aleatorio.choice(ras), aleatorio.choice(disciplinas)
+            if id_disc not in sistema.alunos[ra].cursos:
+                novas.add((ra, id_disc))
+        novas = sorted(novas)
+        resultados['matricular_aluno'] = resumir(cronometrar(sistema.matricular_aluno, novas[:operacoes]))
+        # Pedidos em lotes de 100 pelo motor de matrículas (um commit por lote)
+        lotes = [(novas[i:i + 100],) for i in range(operacoes, len(novas), 100)]
+        resultados['matricular_lote_100'] = resumir(cronometrar(sistema.matricular_lote, lotes))
+        resultados['cancelar_matricula'] = resumir(cronometrar(
+            sistema.cancelar_matricula, aleatorio.sample(matriculas, min(len(matriculas), operacoes))))
+    return {'dados': dados, 'memoria': memoria, 'benchmarks': resultados}
+
+def commit_atual():
+    try:
+        saida = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(CAMINHO_SISTEMA),
+                               capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return saida.stdout.strip() or None
+
+def comparar(arquivo_base, arquivo_novo):
+    # Mostra, para cada tamanho e operação, a mediana antes/depois e a variação
+    with open(arquivo_base, encoding='utf-8') as f:
+        base = json.load(f)
+    with open(arquivo_novo, encoding='utf-8') as f:
+        novo = json.load(f)
+    print(f"Base: {base.get('commit')} ({base['data']}) | Novo: {novo.get('commit')} ({novo['data']})")
+    for tamanho, resultado in novo['resultados'].items():
+        anterior = base['resultados'].get(tamanho)
+        if not anterior:
+            continue
+        print(f"\n--- {tamanho} alunos (mediana em ms) ---")
+        if 'memoria' in anterior and 'memoria' in resultado:
+            antes, depois = anterior['memoria']['retida_bytes'], resultado['memoria']['retida_bytes']
+            print(f"{'memoria retida (MB)':<25} {antes / 2**20:>12.1f} {depois / 2**20:>12.1f} {(depois / antes - 1) * 100:>+8.1f}%")
+        for nome, medidas in resultado['benchmarks'].items():
+            medida_base = anterior['benchmarks'].get(nome)
+            if not medida_base:
+                continue
+            antes, depois = medida_base['mediana_ms'], medidas['mediana_ms']
+            variacao = (depois / antes - 1) * 100 if antes else 0.0
+            print(f"{nome:<25} {antes:>12.4f} {depois:>12.4f} {variacao:>+8.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do Sistema Acadêmico")
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help="Quantidades de alunos das instituições sintéticas")
+    parser.add_argument('--repeticoes', type=int, default=3, help="Repetições de carregar/salvar")
+    parser.add_argument('--operacoes', type=int, default=1000, help="Operações medidas por benchmark")
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--formato', choices=['json', 'binario'], default='json', help="Formato do snapshot")
+    parser.add_argument('--saida', default='resultados_benchmark.json')
+    parser.add_argument('--comparar', nargs=2, metavar=('BASE', 'NOVO'),
+                        help="Compara dois arquivos de resultados em vez de executar")
+    args = parser.parse_args()
+
+    if args.comparar:
+        comparar(*args.comparar)
+        return 0
+
+    pim = carregar_sistema()
+    relatorio = {
+        'versao_formato': VERSAO_FORMATO,
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit_atual(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'numpy': np is not None,
+        'parametros': {'repeticoes': args.repeticoes, 'operacoes': args.operacoes, 'semente': args.semente,
+                       'formato': args.formato},
+        'resultados': {},
+    }
+    diretorio = tempfile.mkdtemp(prefix='benchmark_pim_')
+    try:
+        for alunos in args.tamanhos:
+            print(f"[INFO] Gerando e medindo instituição com {alunos} alunos...")
+            resultado = executar_tamanho(pim, diretorio, alunos, args.repeticoes, args.operacoes, args.semente, args.formato)
+            relatorio['resultados'][str(alunos)] = resultado
+            memoria = resultado['memoria']
+            print(f"   memória retida {memoria['retida_bytes'] / 2**20:.1f} MB | {memoria['por_aluno_bytes']:.0f} bytes por aluno | "
+                  f"{memoria['por_100k_alunos_mb']:.1f} MB por 100k alunos | objetos de entidade {memoria['objetos_entidade_bytes'] / 2**20:.1f} MB")
+            for nome, medidas in resultado['benchmarks'].items():
+                print(f"   {nome:<25} mediana {medidas['mediana_ms']:>12.4f} ms | p95 {medidas['p95_ms']:>12.4f} ms")
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, indent=4, ensure_ascii=False)
+    print(f"[INFO] Resultados gravados em {args.saida}.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+# Gera uma instituição sintética (alunos, professores, disciplinas, matrículas, notas e frequências)
+# no mesmo formato de ARQUIVO_DADOS, usando as próprias classes do sistema para serializar.
+import argparse
+import io
+import os
+import random
+import sys
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+
+from benchmarks import carregar_sistema
+from entidades import FrequenciasCompactas
+from indices import IndicesAcademicos
+
+NOMES = ['Ana', 'Bruno', 'Carla', 'Daniel', 'Eduarda', 'Felipe', 'Gabriela', 'Henrique', 'Isabela', 'João',
+         'Larissa', 'Lucas', 'Mariana', 'Mateus', 'Natália', 'Otávio', 'Paula', 'Rafael', 'Sofia', 'Thiago']
+SOBRENOMES = ['Almeida', 'Barbosa', 'Cardoso', 'Costa', 'Ferreira', 'Gomes', 'Lima', 'Martins', 'Oliveira',
+              'Pereira', 'Ribeiro', 'Rodrigues', 'Santos', 'Silva', 'Souza']
+AREAS = ['Algoritmos', 'Banco de Dados', 'Cálculo', 'Engenharia de Software', 'Estatística', 'Estruturas de Dados',
+         'Ética', 'Programação Web', 'Redes de Computadores', 'Sistemas Operacionais']
+AVALIACOES = ['P1', 'P2', 'Trabalho']
+INICIO_SEMESTRE = datetime(2025, 2, 3, 19, 0)
+
+def nome_aleatorio(aleatorio):
+    return f"{aleatorio.choice(NOMES)} {aleatorio.choice(SOBRENOMES)} {aleatorio.choice(SOBRENOMES)}"
+
+def arquivos_da_base(caminho):
+    base = os.path.splitext(caminho)[0]
+    return caminho, base + '.journal'
+
+def gerar_instituicao(caminho, alunos=1000, professores=None, disciplinas=None, por_aluno=5, aulas=16, semente=42):
+    # Grava a instituição em `caminho` (e o índice .idx ao lado) e devolve um resumo do que foi gerado
+    pim = carregar_sistema()
+    aleatorio = random.Random(semente)
+    professores = professores or max(1, alunos // 100)
+    disciplinas = disciplinas or max(por_aluno, alunos // 40)
+    por_aluno = min(por_aluno, disciplinas)
+
+    arquivo, journal = arquivos_da_base(caminho)
+    for existente in (arquivo, journal, os.path.splitext(caminho)[0] + '.idx'):
+        if os.path.exists(existente):
+            os.remove(existente)
+    with redirect_stdout(io.StringIO()):
+        sistema = pim.SistemaAcademico(pim.ArmazenamentoJSON(arquivo, journal))
+
+    lista_professores = []
+    for i in range(professores):
+        professor = pim.Professor(f'prof{i}', '123', nome_aleatorio(aleatorio))
+        sistema.professores[professor.login] = sistema.usuarios[professor.login] = professor
+        lista_professores.append(professor)
+
+    # Uma aula por semana; todas as turmas têm o mesmo número de aulas registradas
+    lista_disciplinas = []
+    for i in range(disciplinas):
+        professor = lista_professores[i % professores]
+        disciplina = pim.Disciplina(f'D{i:05d}', f"{AREAS[i % len(AREAS)]} - Turma {i // len(AREAS) + 1}", professor.login)
+        inicio = INICIO_SEMESTRE + timedelta(days=i % 5, hours=(i // 5) % 3)
+        disciplina.sessoes = [(inicio + timedelta(weeks=k)).strftime("%Y-%m-%d %H:%M:%S") for k in range(aulas)]
+        professor.disciplinas_ministradas.append(disciplina.id)
+        sistema.disciplinas[disciplina.id] = disciplina
+        lista_disciplinas.append(disciplina)
+
+    matriculas = 0
+    for i in range(alunos):
+        ra = str(2025000000 + i)
+        aluno = pim.Aluno(f'aluno{i}', '123', nome_aleatorio(aleatorio), ra)
+        aluno.dados_pessoais = {'endereco': f"Rua {aleatorio.choice(SOBRENOMES)}, {aleatorio.randint(1, 2000)}"}
+        # Cada aluno tem uma assiduidade e um desempenho próprios, que valem para todas as suas turmas
+        assiduidade = aleatorio.betavariate(8, 1.5)
+        desempenho = aleatorio.gauss(7.0, 1.5)
+        frequencias = {}
+        for disciplina in aleatorio.sample(lista_disciplinas, por_aluno):
+            aluno.cursos[disciplina.id] = {'status': 'Matriculado'}
+            disciplina.alunos_ra.append(ra)
+            # Cerca de 10% entram na turma depois das primeiras aulas
+            inicio = aleatorio.randint(1, max(1, aulas // 3)) if aleatorio.random() < 0.1 else 0
+            frequencias[disciplina.id] = {
+                'inicio': inicio,
+                'marcas': ''.join('P' if aleatorio.random() < assiduidade else 'F' for _ in range(inicio, aulas))}
+            for avaliacao in AVALIACOES[:aleatorio.randint(1, len(AVALIACOES))]:
+                nota = min(10.0, max(0.0, round(aleatorio.gauss(desempenho, 1.2), 1)))
+                aluno.registrar_nota(disciplina.id, nota, avaliacao)
+            matriculas += 1
+        aluno.frequencias = FrequenciasCompactas.de_json(frequencias)
+        aluno.recalcular_agregados()
+        sistema.alunos[ra] = sistema.usuarios[aluno.login] = sistema.vincular_aluno(aluno)
+
+    sistema.indices = IndicesAcademicos(sistema)
+    with redirect_stdout(io.StringIO()):
+        sistema.salvar_dados()
+    return {
+        'alunos': alunos,
+        'professores': professores,
+        'disciplinas': disciplinas,
+        'matriculas': matriculas,
+        'aulas_por_disciplina': aulas,
+        'semente': semente,
+        'arquivo_bytes': os.path.getsize(arquivo),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera uma instituição sintética no formato do Sistema Acadêmico")
+    parser.add_argument('--saida', required=True, help="Arquivo JSON a gerar (substituído se existir)")
+    parser.add_argument('--alunos', type=int, default=1000)
+    parser.add_argument('--professores', type=int, help="Padrão: 1 para cada 100 alunos")
+    parser.add_argument('--disciplinas', type=int, help="Padrão: 1 para cada 40 alunos")
+    parser.add_argument('--por-aluno', type=int, default=5, help="Disciplinas por aluno")
+    parser.add_argument('--aulas', type=int, default=16, help="Aulas registradas por disciplina")
+    parser.add_argument('--semente', type=int, default=42)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    resumo = gerar_instituicao(args.saida, args.alunos, args.professores, args.disciplinas,
+                               args.por_aluno, args.aulas, args.semente)
+    print(f"[INFO] {resumo['alunos']} alunos, {resumo['professores']} professores, {resumo['disciplinas']} disciplinas e "
+          f"{resumo['matriculas']} matrículas gravados em {args.saida} "
+          f"({resumo['arquivo_bytes'] / 1e6:.1f} MB, {time.perf_counter() - inicio:.1f}s).")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+# Cliente de teste de carga para o modo serviço do Sistema Acadêmico.
+# Uso: python "Trabalho PIM.py" --servidor   (em outro terminal)
+#      python cliente_carga.py --clientes 200 --requisicoes 50
+#      python cliente_carga.py --cenario matricula --disciplinas MAT101,PORT101   (rajada de matrículas)
+import argparse
+import http.client
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+
+
+def requisitar(conexao, metodo, caminho, corpo=None, token=None):
+    cabecalhos = {'Content-Type': 'application/json'}
+    if token:
+        cabecalhos['Authorization'] = f'Bearer {token}'
+    dados = json.dumps(corpo).encode('utf-8') if corpo is not None else None
+    conexao.request(metodo, caminho, body=dados, headers=cabecalhos)
+    resposta = conexao.getresponse()
+    return resposta.status, json.loads(resposta.read() or b'{}')
+
+def operacao(args, conexao, token, ras):
+    # Uma requisição do cenário escolhido; devolve se a resposta foi a esperada
+    if args.cenario == 'matricula':
+        # Turma lotada (lista de espera) ou aluno já matriculado também são respostas válidas
+        status, corpo = requisitar(conexao, 'POST', '/matricula',
+                                   {'ra': random.choice(ras), 'disciplina': random.choice(args.disciplinas)}, token=token)
+        return status == 200 or (status == 400 and 'situacao' in corpo)
+    status, _ = requisitar(conexao, 'GET', f'/historico?ra={random.choice(ras)}', token=token)
+    return status == 200
+
+def cliente(args, ras, latencias, erros, lock):
+    # Cada cliente abre a própria conexão (keep-alive), faz login e executa as requisições do cenário
+    conexao = http.client.HTTPConnection(args.host, args.porta, timeout=30)
+    minhas_latencias = []
+    meus_erros = 0
+    try:
+        status, corpo = requisitar(conexao, 'POST', '/login', {'login': args.login, 'senha': args.senha})
+        if status != 200:
+            meus_erros += args.requisicoes
+            return
+        token = corpo['token']
+        for _ in range(args.requisicoes):
+            inicio = time.perf_counter()
+            try:
+                sucesso = operacao(args, conexao, token, ras)
+            except (OSError, http.client.HTTPException):
+                conexao.close()
+                conexao = http.client.HTTPConnection(args.host, args.porta, timeout=30)
+                sucesso = False
+            minhas_latencias.append(time.perf_counter() - inicio)
+            if not sucesso:
+                meus_erros += 1
+        requisitar(conexao, 'POST', '/logout', token=token)
+    except (OSError, http.client.HTTPException):
+        meus_erros += args.requisicoes - len(minhas_latencias)
+    finally:
+        conexao.close()
+        with lock:
+            latencias.extend(minhas_latencias)
+            erros[0] += meus_erros
+
+def percentil(valores, p):
+    return valores[min(len(valores) - 1, int(len(valores) * p / 100))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do serviço HTTP/JSON do Sistema Acadêmico")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8080)
+    parser.add_argument('--login', default='secretaria1')
+    parser.add_argument('--senha', default='123')
+    parser.add_argument('--clientes', type=int, default=100, help="Clientes simultâneos")
+    parser.add_argument('--requisicoes', type=int, default=20, help="Requisições por cliente")
+    parser.add_argument('--cenario', choices=['historico', 'matricula'], default='historico',
+                        help="historico: consultas de histórico; matricula: pedidos de matrícula simultâneos")
+    parser.add_argument('--disciplinas', default='', help="IDs das disciplinas do cenário matricula, separados por vírgula")
+    args = parser.parse_args()
+    args.disciplinas = [d.strip() for d in args.disciplinas.split(',') if d.strip()]
+    if args.cenario == 'matricula' and not args.disciplinas:
+        parser.error("o cenário matricula exige --disciplinas")
+
+    # Descobre alguns RAs para consultar usando uma sessão de secretaria
+    conexao = http.client.HTTPConnection(args.host, args.porta, timeout=30)
+    try:
+        status, corpo = requisitar(conexao, 'POST', '/login', {'login': args.login, 'senha': args.senha})
+        if status != 200:
+            print(f"[ERRO] Login falhou: {corpo.get('erro')}")
+            return 1
+        _, corpo = requisitar(conexao, 'GET', '/alunos?quantidade=1000', token=corpo['token'])
+    except OSError as e:
+        print(f"[ERRO] Serviço indisponível em {args.host}:{args.porta}: {e}")
+        return 1
+    finally:
+        conexao.close()
+    ras = corpo.get('alunos') or []
+    if not ras:
+        print("[AVISO] Nenhum aluno cadastrado para consultar.")
+        return 1
+
+    latencias, erros, lock = [], [0], threading.Lock()
+    threads = [threading.Thread(target=cliente, args=(args, ras, latencias, erros, lock)) for _ in range(args.clientes)]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    duracao = time.perf_counter() - inicio
+
+    latencias.sort()
+    print(f"Clientes: {args.clientes} | Requisições: {len(latencias)} | Erros: {erros[0]}")
+    print(f"Duração: {duracao:.2f}s | Vazão: {len(latencias) / duracao:.1f} req/s")
+    if latencias:
+        print(f"Latência (ms) média {statistics.fmean(latencias) * 1000:.2f} | "
+              f"p50 {percentil(latencias, 50) * 1000:.2f} | p95 {percentil(latencias, 95) * 1000:.2f} | "
+              f"p99 {percentil(latencias, 99) * 1000:.2f}")
+    return 0 if erros[0] == 0 else 2
+
+if __name__ == "__main__":
+    sys.exit(main())
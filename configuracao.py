@@ -0,0 +1,28 @@
+# Configurações globais do Sistema Acadêmico (limites de aprovação, arquivos, tamanhos e prazos)
+MEDIA_APROVACAO = 7.0
+PERCENTUAL_FREQUENCIA_MINIMA = 75.0
+LIMITE_VALORES_FAIXA = 50 # Valores por eixo na varredura de políticas de aprovação (menu do administrador)
+ARQUIVO_DADOS = 'sistema_academico_dados.json' # Nome do arquivo para armazenamento
+ARQUIVO_JOURNAL = 'sistema_academico_dados.journal' # Registro incremental das alterações (uma linha JSON por operação)
+LIMITE_JOURNAL = 500 # Quantidade de registros no journal antes da compactação automática no snapshot
+PROPORCAO_JOURNAL = 0.1 # ... e tamanho mínimo do journal em relação ao snapshot (a compactação reescreve o snapshot inteiro)
+ARQUIVO_SQLITE = 'sistema_academico_dados.db' # Banco usado pelo armazenamento SQLite
+ARQUIVO_BINARIO = 'sistema_academico_dados.pimb' # Snapshot do armazenamento binário
+ARQUIVO_JOURNAL_BINARIO = 'sistema_academico_dados.pimb.journal'
+ARQUIVO_FRAGMENTOS = 'sistema_academico_dados.fragmentos' # Diretório do armazenamento fragmentado (manifesto + fragmentos)
+FRAGMENTOS_ALUNOS = 256 # Grupos de alunos (por RA) do armazenamento fragmentado
+FRAGMENTOS_DISCIPLINAS = 16 # Grupos de disciplinas (por ID)
+JANELA_GRAVACAO = 2.0 # Segundos em que pedidos de gravação do snapshot se juntam numa só (gravador em segundo plano)
+TAMANHO_LOTE_MATRICULAS = 500 # Pedidos de matrícula decididos e gravados juntos (um único commit por lote)
+TAMANHO_PAGINA = 20 # Linhas por página nas listagens e buscas da secretaria
+LIMITE_VARREDURA_BUSCA = 20000 # Candidatos descartados por uma busca antes de ela parar e ser marcada como parcial
+TAMANHO_LOTE_EXPORTACAO = 500 # Históricos por tarefa na exportação em paralelo
+FORMATOS_HISTORICO = ('txt', 'json', 'csv') # Arquivos gerados por aluno na exportação dos históricos
+ARQUIVO_PROGRESSO_EXPORTACAO = '.progresso_exportacao.jsonl' # No diretório da exportação, enquanto ela não termina
+CAPACIDADE_CACHE_HISTORICOS = 1000 # Históricos escolares mantidos em memória (LRU)
+PORTA_SERVICO = 8080 # Porta do modo serviço (HTTP/JSON em localhost)
+VALIDADE_SESSAO = 30 * 60 # Segundos de inatividade até o token de sessão expirar
+TEMPO_ESPERA_TRAVA = 10.0 # Segundos esperando outro processo liberar a trava de escrita
+TRAVA_ABANDONADA = 60.0 # Trava de escrita mais antiga que isso é de um processo que caiu
+ARQUIVO_METRICAS = 'metricas_desempenho.json' # Destino padrão de --metricas
+ARQUIVO_PERFIL = 'perfil_desempenho.prof' # Destino padrão de --perfil (lido com pstats)
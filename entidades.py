@@ -0,0 +1,485 @@
+# Entidades do Sistema Acadêmico (usuários, alunos, professores, disciplinas), frequências compactas
+# e a conversão de/para JSON usada pelos armazenamentos
+from datetime import datetime, timedelta
+import json
+import sys
+import time
+import zlib
+from array import array
+from collections.abc import Mapping, Sequence
+
+from configuracao import MEDIA_APROVACAO, PERCENTUAL_FREQUENCIA_MINIMA
+from metricas import METRICAS
+
+# --- Funções Auxiliares de Conversão
+
+def to_dict(obj):
+    #Converte um objeto de classe em um dicionário para JSON
+    if isinstance(obj, (Usuario, Professor, Aluno, Disciplina)):
+        # Campos declarados na classe (CAMPOS), na ordem do formato JSON; a senha nunca é gravada
+        data = {campo: getattr(obj, campo) for campo in obj.CAMPOS}
+        data['__class__'] = obj.__class__.__name__
+             
+        # Lógica especial para classes filhas
+        if isinstance(obj, Aluno):
+            data['frequencias'] = obj.frequencias.para_json()
+        elif isinstance(obj, Disciplina):
+            data['alunos_ra'] = list(obj.alunos_ra)
+            data['lista_espera'] = list(obj.lista_espera)
+        
+        return data
+    raise TypeError(f"Objeto do tipo {type(obj)} não é serializável em JSON.")
+
+def from_dict(data):
+    #Converte um dicionário de volta para um objeto de classe
+    if '__class__' in data:
+        class_name = data.pop('__class__')
+     
+        # Reconstrução dos objetos
+        if class_name == 'Usuario':
+            # Usuários genéricos (admin/secretaria)
+            return Usuario(data['login'], '123', data['nome'], data['perfil'])
+        
+        elif class_name == 'Professor':
+            # Professor
+            professor = Professor(data['login'], '123', data['nome'])
+            professor.disciplinas_ministradas = data.get('disciplinas_ministradas', [])
+            return professor
+        
+        elif class_name == 'Aluno':
+            # Aluno
+            aluno = Aluno(data['login'], '123', data['nome'], data['ra'])
+            aluno.cursos = data.get('cursos', {})
+            aluno.frequencias = FrequenciasCompactas.de_json(data.get('frequencias', {}))
+            aluno.notas = data.get('notas', {})
+            aluno.dados_pessoais = data.get('dados_pessoais', {})
+            aluno.avaliacoes = data.get('avaliacoes', {})
+            if 'agregados' in data:
+                aluno.agregados = data['agregados']
+            else:
+                # Arquivos antigos não têm os agregados: calcula uma única vez a partir do histórico
+                aluno.recalcular_agregados()
+            return aluno
+            
+        elif class_name == 'Disciplina':
+            # Disciplina
+            disc = Disciplina(data['id'], data['nome'], data.get('professor_login'))
+            disc.alunos_ra = ConjuntoOrdenado(data.get('alunos_ra', []))
+            disc.sessoes = data.get('sessoes', [])
+            disc.capacidade = data.get('capacidade')
+            disc.lista_espera = ConjuntoOrdenado(data.get('lista_espera', []))
+            return disc
+            
+    return data # Retorna o dicionário se não for um objeto de classe conhecido
+
+# --- JSON Encoder Customizado para lidar com classes
+class CustomEncoder(json.JSONEncoder):
+    def default(self, obj):
+        try:
+            # Tenta usar a função de conversão customizada
+            return to_dict(obj)
+        except TypeError:
+            # Fallback para o comportamento padrão do JSONEncoder
+            return json.JSONEncoder.default(self, obj)
+
+def reconstruir_objetos(valor):
+    # Aplica from_dict de baixo para cima, como o object_hook do json faria durante o parse
+    if isinstance(valor, dict):
+        for chave, item in valor.items():
+            if isinstance(item, (dict, list)):
+                valor[chave] = reconstruir_objetos(item)
+        return from_dict(valor)
+    if isinstance(valor, list):
+        for i, item in enumerate(valor):
+            if isinstance(item, (dict, list)):
+                valor[i] = reconstruir_objetos(item)
+    return valor
+
+def decodificar_json(texto, nome):
+    # json.loads + from_dict; com as métricas ligadas, mede separadamente o parse e a reconstrução dos objetos
+    if not METRICAS.ativo:
+        return json.loads(texto, object_hook=from_dict)
+    inicio = time.perf_counter()
+    dados = json.loads(texto)
+    meio = time.perf_counter()
+    dados = reconstruir_objetos(dados)
+    METRICAS.registrar(f'{nome}.parse', meio - inicio)
+    METRICAS.registrar(f'{nome}.from_dict', time.perf_counter() - meio)
+    METRICAS.grandeza(f'{nome}.bytes_lidos', len(texto))
+    return dados
+
+def crc_arquivo(caminho, bloco=1 << 20):
+    # CRC32 do arquivo inteiro, lido em blocos (sem carregar o snapshot todo na memória)
+    crc = 0
+    with open(caminho, 'rb') as f:
+        for parte in iter(lambda: f.read(bloco), b''):
+            crc = zlib.crc32(parte, crc)
+    return crc
+
+# --- Frequências Compactas
+# Cada disciplina guarda a data/hora de cada aula uma única vez (Disciplina.sessoes). Para cada aluno,
+# a frequência numa disciplina é um array de bytes alinhado a essa tabela, a partir da aula 'inicio':
+# 'P' presença, 'F' falta e '.' aula sem registro para o aluno.
+
+PRESENCA, FALTA, SEM_REGISTRO = ord('P'), ord('F'), ord('.')
+FORMATOS_DATA_AULA = ('%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%d/%m/%Y') # Além do ISO (AAAA-MM-DD[ HH:MM[:SS]])
+
+def interpretar_data_aula(texto):
+    # Data/hora de uma aula (ou de um filtro de período) como datetime; None se não for reconhecida
+    texto = str(texto).strip()
+    try:
+        return datetime.fromisoformat(texto)
+    except ValueError:
+        pass
+    for formato in FORMATOS_DATA_AULA:
+        try:
+            return datetime.strptime(texto, formato)
+        except ValueError:
+            continue
+    return None
+
+def periodo_consulta(desde=None, ate=None, dias_padrao=7):
+    # Filtro de período -> [inicio, fim) em datetime. Sem 'desde', os últimos dias_padrao dias (sem limite
+    # se dias_padrao for None); sem 'ate', sem limite; 'ate' só com a data inclui o próprio dia.
+    # Levanta ValueError se inválido.
+    if desde:
+        inicio = interpretar_data_aula(desde)
+    elif dias_padrao is not None:
+        inicio = datetime.combine(datetime.now().date(), datetime.min.time()) - timedelta(days=dias_padrao)
+    else:
+        inicio = None
+    fim = interpretar_data_aula(ate) if ate else None
+    if (desde and inicio is None) or (ate and fim is None):
+        raise ValueError(f"Data inválida: '{desde if desde and inicio is None else ate}' (use AAAA-MM-DD ou DD/MM/AAAA).")
+    if fim is not None and ':' not in ate:
+        fim += timedelta(days=1)
+    return inicio, fim
+
+class ListaFrequencias(Sequence):
+    # Visão somente leitura no formato antigo: [{'data': ..., 'tipo': 'P'/'F'}, ...]
+    def __init__(self, sessoes, inicio, marcas):
+        self._sessoes = sessoes
+        self._inicio = inicio
+        self._marcas = marcas
+
+    def __iter__(self):
+        for deslocamento, codigo in enumerate(self._marcas):
+            if codigo != SEM_REGISTRO:
+                yield {'data': self._sessoes[self._inicio + deslocamento], 'tipo': chr(codigo)}
+
+    def __len__(self):
+        return len(self._marcas) - self._marcas.count(SEM_REGISTRO)
+
+    def __getitem__(self, posicao):
+        return list(self)[posicao]
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class FrequenciasCompactas(Mapping):
+    # Substitui o antigo dict disciplina -> lista de dicts, mantendo a mesma leitura
+    __slots__ = ('marcas', 'pendentes', '_sessoes')
+
+    def __init__(self):
+        self.marcas = {} # disciplina -> [inicio, array('B')]
+        self.pendentes = {} # disciplina -> lista no formato antigo, aguardando a tabela de aulas
+        self._sessoes = lambda id_disciplina: []
+
+    @classmethod
+    def de_json(cls, dados):
+        # Aceita o formato compacto e o antigo (lista de {'data', 'tipo'})
+        frequencias = cls()
+        for id_disciplina, valor in dados.items():
+            if isinstance(valor, list):
+                frequencias.pendentes[id_disciplina] = valor
+            else:
+                frequencias.marcas[id_disciplina] = [valor['inicio'], array('B', valor['marcas'].encode('ascii'))]
+        return frequencias
+
+    def para_json(self):
+        dados = {id_disc: {'inicio': inicio, 'marcas': marcas.tobytes().decode('ascii')}
+                 for id_disc, (inicio, marcas) in self.marcas.items()}
+        dados.update(self.pendentes)
+        return dados
+
+    def vincular(self, sessoes, registrar_sessao):
+        # Liga as marcas à tabela de aulas das disciplinas e converte registros no formato antigo
+        self._sessoes = sessoes
+        for id_disciplina in list(self.pendentes):
+            antigos = self.pendentes.pop(id_disciplina)
+            for f in antigos:
+                indice = registrar_sessao(id_disciplina, f['data'])
+                if indice is None:
+                    # Disciplina inexistente: mantém o histórico antigo como está
+                    self.pendentes[id_disciplina] = antigos
+                    self.marcas.pop(id_disciplina, None)
+                    break
+                self.registrar(id_disciplina, indice, f['tipo'])
+
+    def registrar(self, id_disciplina, indice, tipo):
+        # Marca a aula 'indice' e devolve o código anterior (SEM_REGISTRO se não havia marca)
+        entrada = self.marcas.get(id_disciplina)
+        if entrada is None:
+            entrada = self.marcas[id_disciplina] = [indice, array('B')]
+        inicio, marcas = entrada
+        if indice < inicio:
+            marcas[0:0] = array('B', bytes([SEM_REGISTRO]) * (inicio - indice))
+            entrada[0] = inicio = indice
+        posicao = indice - inicio
+        if posicao >= len(marcas):
+            marcas.extend(bytes([SEM_REGISTRO]) * (posicao - len(marcas) + 1))
+        anterior = marcas[posicao]
+        marcas[posicao] = ord(tipo)
+        return anterior
+
+    def marca(self, id_disciplina, indice):
+        # Código da marca na aula 'indice' da disciplina (SEM_REGISTRO se não há)
+        entrada = self.marcas.get(id_disciplina)
+        if not entrada:
+            return SEM_REGISTRO
+        posicao = indice - entrada[0]
+        return entrada[1][posicao] if 0 <= posicao < len(entrada[1]) else SEM_REGISTRO
+
+    def contagem(self, id_disciplina):
+        # (aulas registradas, presenças)
+        if id_disciplina in self.pendentes:
+            antigos = self.pendentes[id_disciplina]
+            return len(antigos), sum(1 for f in antigos if f['tipo'] == 'P')
+        entrada = self.marcas.get(id_disciplina)
+        if not entrada:
+            return 0, 0
+        marcas = entrada[1]
+        return len(marcas) - marcas.count(SEM_REGISTRO), marcas.count(PRESENCA)
+
+    def pop(self, id_disciplina, padrao=None):
+        entrada = self.marcas.pop(id_disciplina, None)
+        antigos = self.pendentes.pop(id_disciplina, None)
+        return entrada or antigos or padrao
+
+    def __getitem__(self, id_disciplina):
+        if id_disciplina in self.pendentes:
+            return self.pendentes[id_disciplina]
+        inicio, marcas = self.marcas[id_disciplina]
+        return ListaFrequencias(self._sessoes(id_disciplina), inicio, marcas)
+
+    def __iter__(self):
+        yield from self.marcas
+        yield from self.pendentes
+
+    def __len__(self):
+        return len(self.marcas) + len(self.pendentes)
+
+# Situações de matrícula compartilhadas: os valores de Aluno.cursos nunca são alterados no lugar
+# (sempre substituídos), então milhares de matrículas podem apontar para o mesmo dict
+SITUACOES_CURSO = {}
+
+def situacao_curso(status):
+    situacao = SITUACOES_CURSO.get(status)
+    if situacao is None:
+        situacao = SITUACOES_CURSO[status] = {'status': status}
+    return situacao
+
+class ConjuntoOrdenado(dict):
+    # RAs de uma turma ou da lista de espera: dict com valores None (ordem de inserção), que dá pertinência e
+    # remoção O(1) com a interface de lista usada pelo sistema. Vai para o JSON e para o snapshot como lista
+    # e é igual à lista com os mesmos itens na mesma ordem.
+    __slots__ = ()
+
+    def __init__(self, itens=()):
+        super().__init__(dict.fromkeys(itens))
+
+    def append(self, item):
+        self[item] = None
+
+    def remove(self, item):
+        del self[item]
+
+    def primeiro(self):
+        return next(iter(self))
+
+    def posicao(self, item):
+        # Posição (a partir de 1) na ordem de inserção; percorre só os itens anteriores
+        for posicao, atual in enumerate(self, 1):
+            if atual == item:
+                return posicao
+        raise ValueError(f"{item!r} não está no conjunto")
+
+    def __eq__(self, outro):
+        if isinstance(outro, (list, tuple)):
+            return len(self) == len(outro) and all(a == b for a, b in zip(self, outro))
+        return dict.__eq__(self, outro)
+
+    def __ne__(self, outro):
+        return not self == outro
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({list(self)!r})"
+
+# --- Classes de Entidades
+
+class Usuario:
+    # Entidades usam __slots__ (sem __dict__ por instância); CAMPOS lista o que vai para o JSON, em ordem
+    __slots__ = ('login', 'senha', 'nome', 'perfil')
+    CAMPOS = ('login', 'nome', 'perfil')
+
+    def __init__(self, login, senha, nome, perfil):
+        self.login = login
+        self.senha = senha
+        self.nome = nome
+        self.perfil = perfil
+
+class Disciplina:
+    __slots__ = ('id', 'nome', 'professor_login', 'alunos_ra', 'sessoes', 'capacidade', 'lista_espera', '_posicao_sessoes')
+    CAMPOS = ('id', 'nome', 'professor_login', 'alunos_ra', 'sessoes', 'capacidade', 'lista_espera')
+
+    def __init__(self, id_disciplina, nome, professor_login=None, capacidade=None):
+        self.id = id_disciplina
+        self.nome = nome
+        self.professor_login = professor_login
+        self.alunos_ra = ConjuntoOrdenado()
+        self.sessoes = [] # Data/hora de cada aula com frequência registrada, na ordem de registro
+        self.capacidade = capacidade # Vagas da turma (None = sem limite)
+        self.lista_espera = ConjuntoOrdenado() # RAs aguardando vaga, na ordem dos pedidos
+        self._posicao_sessoes = None # data/hora -> índice em sessoes (montado sob demanda)
+
+    def vagas(self):
+        # Vagas livres (None = sem limite)
+        if self.capacidade is None:
+            return None
+        return max(self.capacidade - len(self.alunos_ra), 0)
+
+    def registrar_sessao(self, data):
+        # Devolve o índice da aula na tabela de sessões, criando-a se ainda não existir
+        if self._posicao_sessoes is None:
+            self._posicao_sessoes = {d: i for i, d in enumerate(self.sessoes)}
+        indice = self._posicao_sessoes.get(data)
+        if indice is None:
+            indice = self._posicao_sessoes[data] = len(self.sessoes)
+            self.sessoes.append(data)
+        return indice
+
+class Professor(Usuario):
+    __slots__ = ('disciplinas_ministradas',)
+    CAMPOS = Usuario.CAMPOS + __slots__
+
+    # Chama o construtor da classe base (Usuario) passando o perfil 'professor'.
+    def __init__(self, login, senha, nome):
+        super().__init__(login, senha, nome, 'professor')
+        self.disciplinas_ministradas = []
+
+class Aluno(Usuario):
+    __slots__ = ('ra', 'cursos', 'frequencias', 'notas', 'dados_pessoais', 'agregados', 'avaliacoes')
+    CAMPOS = Usuario.CAMPOS + __slots__
+
+    #Chama o construtor da classe base (Usuario) passando o perfil 'aluno'.
+    def __init__(self, login, senha, nome, ra):
+        super().__init__(login, senha, nome, 'aluno') 
+        self.ra = ra
+        self.cursos = {} 
+        self.frequencias = FrequenciasCompactas() 
+        self.notas = {} 
+        self.dados_pessoais = {} 
+        self.agregados = {} # Por disciplina: quantidade e soma das notas, aulas registradas e presenças
+        self.avaliacoes = {} # Por disciplina: rótulo de cada nota (mesma posição em notas), só se algum foi informado
+
+    def _agregado(self, id_disciplina):
+        return self.agregados.setdefault(id_disciplina, {'qtd_notas': 0, 'soma_notas': 0.0, 'aulas': 0, 'presencas': 0})
+
+    def recalcular_agregados(self):
+        # Reconstrói os totais a partir do histórico completo (arquivos antigos ou verificação)
+        self.agregados = {}
+        for id_disciplina, notas in self.notas.items():
+            agregado = self._agregado(id_disciplina)
+            for nota in notas:
+                agregado['qtd_notas'] += 1
+                agregado['soma_notas'] += nota
+        for id_disciplina in self.frequencias:
+            agregado = self._agregado(id_disciplina)
+            agregado['aulas'], agregado['presencas'] = self.frequencias.contagem(id_disciplina)
+
+    def registrar_nota(self, id_disciplina, nota, avaliacao=None):
+        notas = self.notas.setdefault(id_disciplina, [])
+        notas.append(nota)
+        rotulos = self.avaliacoes.get(id_disciplina)
+        if avaliacao and rotulos is None:
+            rotulos = self.avaliacoes[id_disciplina] = [None] * (len(notas) - 1)
+        if rotulos is not None:
+            rotulos.append(avaliacao or None)
+        agregado = self._agregado(id_disciplina)
+        agregado['qtd_notas'] += 1
+        agregado['soma_notas'] += nota
+
+    def registrar_frequencia(self, id_disciplina, indice_sessao, tipo):
+        anterior = self.frequencias.registrar(id_disciplina, indice_sessao, tipo)
+        agregado = self._agregado(id_disciplina)
+        # Uma nova marca na mesma aula substitui a anterior
+        agregado['aulas'] += anterior == SEM_REGISTRO
+        agregado['presencas'] += (tipo == 'P') - (anterior == PRESENCA)
+
+    def compactar(self):
+        # Reaproveita situações e rótulos repetidos entre alunos (o JSON gravado não muda)
+        for id_disciplina, situacao in self.cursos.items():
+            if len(situacao) == 1 and 'status' in situacao:
+                self.cursos[id_disciplina] = situacao_curso(situacao['status'])
+        for rotulos in self.avaliacoes.values():
+            rotulos[:] = [sys.intern(r) if isinstance(r, str) else r for r in rotulos]
+
+    def remover_disciplina(self, id_disciplina):
+        # Cancelamento: descarta curso, histórico e totais da disciplina
+        self.cursos.pop(id_disciplina, None)
+        self.frequencias.pop(id_disciplina, None)
+        self.notas.pop(id_disciplina, None)
+        self.agregados.pop(id_disciplina, None)
+        self.avaliacoes.pop(id_disciplina, None)
+
+    def resumo_frequencia(self, id_disciplina):
+        # (aulas registradas, presenças) em O(1)
+        agregado = self.agregados.get(id_disciplina)
+        if not agregado:
+            return 0, 0
+        return agregado['aulas'], agregado['presencas']
+
+    def calcular_media(self, id_disciplina):
+        agregado = self.agregados.get(id_disciplina)
+        if agregado and agregado['qtd_notas']:
+            return agregado['soma_notas'] / agregado['qtd_notas']
+        return 0.0
+
+    def verificar_aprovacao(self, id_disciplina):
+        media = self.calcular_media(id_disciplina)
+        aprovado_nota = media >= MEDIA_APROVACAO
+        total_aulas, total_presencas = self.resumo_frequencia(id_disciplina)
+        freq_percentual = (total_presencas / total_aulas * 100) if total_aulas > 0 else 100.0
+        aprovado_frequencia = freq_percentual >= PERCENTUAL_FREQUENCIA_MINIMA
+
+        if not aprovado_frequencia:
+            return "REPROVADO POR FALTA", freq_percentual, media
+        if not aprovado_nota:
+            return "REPROVADO POR NOTA", freq_percentual, media
+        
+        return "APROVADO", freq_percentual, media
+
+def montar_historico(aluno, nome_disciplina):
+    # Histórico Escolar pelas matrículas e agregados do aluno; nome_disciplina(id) devolve o nome ou None.
+    # Só depende do aluno: os processos da exportação o montam sem o sistema carregado
+    disciplinas = []
+    for disc_id in aluno.cursos.keys():
+        situacao, freq_perc, media = aluno.verificar_aprovacao(disc_id)
+        nome = nome_disciplina(disc_id)
+        disciplinas.append({
+            'id': disc_id,
+            'disciplina': nome if nome is not None else "Disciplina Removida",
+            'media': f"{media:.2f}",
+            'frequencia': f"{freq_perc:.2f}%",
+            'status': situacao
+        })
+    historico = {
+        'ra': aluno.ra,
+        'nome': aluno.nome,
+        'disciplinas': disciplinas,
+        'reprovacoes': sum(1 for d in disciplinas if d['status'].startswith('REPROVADO'))
+    }
+    return historico
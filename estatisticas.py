@@ -0,0 +1,176 @@
+# Estatísticas de turma e simulação de política de aprovação (vetorizadas com NumPy quando disponível)
+import statistics
+from bisect import bisect_right
+from array import array
+
+try:
+    import numpy as np # Opcional (requirements-opcionais.txt): vetoriza as estatísticas de turma e a simulação de política
+except ImportError:
+    np = None
+
+from configuracao import MEDIA_APROVACAO, PERCENTUAL_FREQUENCIA_MINIMA
+
+# --- Estatísticas de Turma (vetorizadas com NumPy quando disponível)
+
+FAIXAS_NOTA = [float(n) for n in range(11)] # 0-1, 1-2, ..., 9-10 (a última inclui 10)
+FAIXAS_FREQUENCIA = [0.0, 50.0, 75.0, 90.0, 100.0]
+
+def _histograma(valores, limites):
+    # Contagem por faixa [limite_i, limite_i+1); a última faixa inclui o limite superior (como no NumPy)
+    contagens = [0] * (len(limites) - 1)
+    for valor in valores:
+        faixa = min(max(bisect_right(limites, valor) - 1, 0), len(contagens) - 1)
+        contagens[faixa] += 1
+    return contagens
+
+def calcular_estatisticas_turma(soma_notas, qtd_notas, aulas, presencas):
+    # Recebe colunas alinhadas (uma posição por aluno) e devolve o resumo da turma.
+    # Mesmas regras de Aluno.verificar_aprovacao: sem aulas = 100% de frequência, sem notas = média 0.
+    if np is not None:
+        soma_notas = np.asarray(soma_notas, dtype=float)
+        qtd_notas = np.asarray(qtd_notas, dtype=float)
+        aulas = np.asarray(aulas, dtype=float)
+        presencas = np.asarray(presencas, dtype=float)
+
+        tem_notas = qtd_notas > 0
+        medias = np.divide(soma_notas, qtd_notas, out=np.zeros_like(soma_notas), where=tem_notas)
+        frequencias = np.divide(presencas, aulas, out=np.ones_like(aulas), where=aulas > 0) * 100
+        avaliadas = medias[tem_notas]
+
+        reprovado_falta = frequencias < PERCENTUAL_FREQUENCIA_MINIMA
+        reprovado_nota = ~reprovado_falta & (medias < MEDIA_APROVACAO)
+        return {
+            'alunos': int(medias.size),
+            'sem_notas': int(medias.size - avaliadas.size),
+            'media': float(avaliadas.mean()) if avaliadas.size else 0.0,
+            'mediana': float(np.median(avaliadas)) if avaliadas.size else 0.0,
+            'desvio_padrao': float(avaliadas.std()) if avaliadas.size else 0.0,
+            'histograma_notas': np.histogram(avaliadas, bins=FAIXAS_NOTA)[0].tolist(),
+            'frequencia_media': float(frequencias.mean()) if frequencias.size else 0.0,
+            'histograma_frequencia': np.histogram(frequencias, bins=FAIXAS_FREQUENCIA)[0].tolist(),
+            'situacoes': {
+                'APROVADO': int((~reprovado_falta & ~reprovado_nota).sum()),
+                'REPROVADO POR NOTA': int(reprovado_nota.sum()),
+                'REPROVADO POR FALTA': int(reprovado_falta.sum()),
+            },
+        }
+
+    # Sem NumPy: mesmo resultado com a biblioteca padrão
+    medias = [s / q if q else 0.0 for s, q in zip(soma_notas, qtd_notas)]
+    frequencias = [p / a * 100 if a else 100.0 for p, a in zip(presencas, aulas)]
+    avaliadas = [m for m, q in zip(medias, qtd_notas) if q]
+
+    situacoes = {'APROVADO': 0, 'REPROVADO POR NOTA': 0, 'REPROVADO POR FALTA': 0}
+    for media, frequencia in zip(medias, frequencias):
+        if frequencia < PERCENTUAL_FREQUENCIA_MINIMA:
+            situacoes['REPROVADO POR FALTA'] += 1
+        elif media < MEDIA_APROVACAO:
+            situacoes['REPROVADO POR NOTA'] += 1
+        else:
+            situacoes['APROVADO'] += 1
+    return {
+        'alunos': len(medias),
+        'sem_notas': len(medias) - len(avaliadas),
+        'media': statistics.fmean(avaliadas) if avaliadas else 0.0,
+        'mediana': statistics.median(avaliadas) if avaliadas else 0.0,
+        'desvio_padrao': statistics.pstdev(avaliadas) if avaliadas else 0.0,
+        'histograma_notas': _histograma(avaliadas, FAIXAS_NOTA),
+        'frequencia_media': statistics.fmean(frequencias) if frequencias else 0.0,
+        'histograma_frequencia': _histograma(frequencias, FAIXAS_FREQUENCIA),
+        'situacoes': situacoes,
+    }
+
+# --- Simulação de Política de Aprovação
+
+SITUACOES = ('APROVADO', 'REPROVADO POR NOTA', 'REPROVADO POR FALTA')
+
+class SimuladorPolitica:
+    # Carrega uma única vez a média e a frequência de cada par (aluno, disciplina) em colunas e
+    # reclassifica a instituição inteira sob outros limites, sem alterar MEDIA_APROVACAO nem os dados.
+    caminho_informado = False # O caminho em uso (com ou sem NumPy) é informado uma vez por execução
+
+    def __init__(self, sistema):
+        if not SimuladorPolitica.caminho_informado:
+            SimuladorPolitica.caminho_informado = True
+            if np is not None:
+                print(f"[INFO] Simulação de política vetorizada com NumPy {np.__version__}.")
+            else:
+                print("[INFO] Simulação de política sem NumPy (biblioteca padrão). "
+                      "Para a versão vetorizada: pip install -r requirements-opcionais.txt")
+        codigos_disciplina = {}
+        medias, frequencias, disciplinas = [], [], []
+        for aluno in sistema.alunos.values():
+            for id_disc in aluno.cursos:
+                agregado = aluno.agregados.get(id_disc) or {}
+                qtd, aulas = agregado.get('qtd_notas', 0), agregado.get('aulas', 0)
+                medias.append(agregado['soma_notas'] / qtd if qtd else 0.0)
+                frequencias.append(agregado['presencas'] / aulas * 100 if aulas else 100.0)
+                disciplinas.append(codigos_disciplina.setdefault(id_disc, len(codigos_disciplina)))
+
+        self.disciplinas = list(codigos_disciplina) # código -> ID da disciplina
+        if np is not None:
+            self.medias = np.array(medias, dtype=float)
+            self.frequencias = np.array(frequencias, dtype=float)
+            self.codigos = np.array(disciplinas, dtype=np.int64)
+        else:
+            self.medias = array('d', medias)
+            self.frequencias = array('d', frequencias)
+            self.codigos = array('q', disciplinas)
+
+    def __len__(self):
+        return len(self.medias)
+
+    def classificar(self, media_minima, frequencia_minima):
+        # Índice em SITUACOES para cada par, com a mesma precedência de Aluno.verificar_aprovacao
+        if np is not None:
+            falta = self.frequencias < frequencia_minima
+            return np.where(falta, 2, np.where(self.medias < media_minima, 1, 0)).astype(np.int8)
+        return array('b', [2 if f < frequencia_minima else 1 if m < media_minima else 0
+                           for m, f in zip(self.medias, self.frequencias)])
+
+    def contar(self, situacoes):
+        if np is not None:
+            contagens = np.bincount(situacoes, minlength=len(SITUACOES)).tolist()
+        else:
+            contagens = [situacoes.count(i) for i in range(len(SITUACOES))]
+        return dict(zip(SITUACOES, contagens))
+
+    def comparar(self, media_minima, frequencia_minima, media_atual=None, frequencia_atual=None):
+        # Impacto de trocar a política atual (globais, por padrão) pela candidata
+        media_atual = MEDIA_APROVACAO if media_atual is None else media_atual
+        frequencia_atual = PERCENTUAL_FREQUENCIA_MINIMA if frequencia_atual is None else frequencia_atual
+        atual = self.classificar(media_atual, frequencia_atual)
+        candidata = self.classificar(media_minima, frequencia_minima)
+
+        if np is not None:
+            mudou = atual != candidata
+            por_disciplina = np.bincount(self.codigos[mudou], minlength=len(self.disciplinas)).tolist()
+            passam_a_aprovar = int((mudou & (candidata == 0)).sum())
+            passam_a_reprovar = int((mudou & (atual == 0)).sum())
+        else:
+            por_disciplina = [0] * len(self.disciplinas)
+            passam_a_aprovar = passam_a_reprovar = 0
+            for codigo, antes, depois in zip(self.codigos, atual, candidata):
+                if antes != depois:
+                    por_disciplina[codigo] += 1
+                    passam_a_aprovar += depois == 0
+                    passam_a_reprovar += antes == 0
+
+        return {
+            'atual': self.contar(atual),
+            'candidata': self.contar(candidata),
+            'mudancas': sum(por_disciplina),
+            'passam_a_aprovar': passam_a_aprovar,
+            'passam_a_reprovar': passam_a_reprovar,
+            'por_disciplina': {self.disciplinas[c]: n for c, n in enumerate(por_disciplina) if n},
+        }
+
+    def varrer(self, medias_minimas, frequencias_minimas):
+        # Grade de políticas: uma passada vetorizada por combinação (média, frequência)
+        resultados = []
+        for media_minima in medias_minimas:
+            for frequencia_minima in frequencias_minimas:
+                resultado = {'media_minima': media_minima, 'frequencia_minima': frequencia_minima}
+                resultado.update(self.contar(self.classificar(media_minima, frequencia_minima)))
+                resultados.append(resultado)
+        return resultados
@@ -0,0 +1,264 @@
+# Exportações: históricos escolares em paralelo e notas/frequências em fluxo
+import csv
+import json
+import os
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from configuracao import ARQUIVO_PROGRESSO_EXPORTACAO, FORMATOS_HISTORICO, TAMANHO_LOTE_EXPORTACAO
+from entidades import Aluno, interpretar_data_aula, montar_historico, periodo_consulta
+from armazenamento import MapaPreguicoso
+
+# --- Exportação dos Históricos Escolares (fim de semestre)
+
+def texto_historico(historico):
+    # Corpo do Histórico Escolar, como no menu do aluno
+    linhas = []
+    for resultado in historico['disciplinas']:
+        linhas += ["", f"Disciplina: {resultado['disciplina']}",
+                   f"   Média: {resultado['media']} | Frequência: {resultado['frequencia']}",
+                   f"   Situação Final: {resultado['status']}"]
+    if historico['reprovacoes']:
+        linhas += ["", "Situação Global: PENDÊNCIAS (Verifique reprovações)", f"Total de reprovações: {historico['reprovacoes']}"]
+    else:
+        linhas += ["", "Situação Global: REGULAR"]
+    return '\n'.join(linhas) + '\n'
+
+def nome_arquivo_historico(ra):
+    # O RA vira nome de arquivo: letras, dígitos e '-' ficam; qualquer outro caractere (inclusive o '_')
+    # vira '_<código hexadecimal>_'. Dois RAs diferentes nunca dão o mesmo arquivo ('A/1' -> 'A_2f_1',
+    # 'A_1' -> 'A_5f_1'); RAs só com letras e dígitos ficam como estão.
+    return ''.join(c if c.isalnum() or c == '-' else f'_{ord(c):x}_' for c in str(ra))
+
+def dados_historico(aluno):
+    # O que o processo do pool precisa para montar o histórico: RA, nome, disciplinas e agregados delas
+    return (aluno.ra, aluno.nome, list(aluno.cursos),
+            {id_disc: aluno.agregados[id_disc] for id_disc in aluno.cursos if id_disc in aluno.agregados})
+
+def gravar_historicos(diretorio, formatos, nomes_disciplinas, alunos):
+    # Executada nos processos do pool: monta os históricos de um lote (alunos: tuplas de dados_historico),
+    # grava os arquivos e devolve as linhas do índice
+    linhas = []
+    for ra, nome, cursos, agregados in alunos:
+        aluno = Aluno(None, None, nome, ra)
+        aluno.cursos = dict.fromkeys(cursos)
+        aluno.agregados = agregados
+        historico = montar_historico(aluno, nomes_disciplinas.get)
+        base = os.path.join(diretorio, nome_arquivo_historico(historico['ra']))
+        if 'txt' in formatos:
+            with open(base + '.txt', 'w', encoding='utf-8') as f:
+                f.write(f"--- Histórico Escolar de {historico['nome']} (RA: {historico['ra']}) ---\n")
+                f.write(texto_historico(historico))
+        if 'json' in formatos:
+            with open(base + '.json', 'w', encoding='utf-8') as f:
+                json.dump(historico, f, indent=4, ensure_ascii=False)
+        if 'csv' in formatos:
+            with open(base + '.csv', 'w', encoding='utf-8', newline='') as f:
+                escritor = csv.writer(f, delimiter=';')
+                escritor.writerow(['ID', 'Disciplina', 'Média', 'Frequência', 'Situação'])
+                escritor.writerows([d['id'], d['disciplina'], d['media'], d['frequencia'], d['status']]
+                                   for d in historico['disciplinas'])
+        linhas.append([historico['ra'], historico['nome'], len(historico['disciplinas']), historico['reprovacoes'],
+                       'PENDÊNCIAS' if historico['reprovacoes'] else 'REGULAR'])
+    return linhas
+
+def ignorar_interrupcao():
+    # Nos processos do pool: o Ctrl+C é tratado só pelo processo principal, que cancela os lotes restantes
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def ler_progresso_exportacao(caminho, cabecalho):
+    # Linhas do índice dos lotes já concluídos numa exportação interrompida com os mesmos dados e formatos
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, 'r', encoding='utf-8') as f:
+        linhas = f.read().splitlines()
+    try:
+        anterior = json.loads(linhas[0]) if linhas else None
+    except ValueError:
+        anterior = None
+    if anterior != cabecalho:
+        print("[AVISO] Exportação anterior feita com outros dados ou formatos; recomeçando do início.")
+        return {}
+    concluidos = {}
+    for linha in linhas[1:]:
+        try:
+            lote = json.loads(linha)
+        except ValueError:
+            break # Última linha cortada pela interrupção: esse lote é refeito
+        concluidos.update((registro[0], registro) for registro in lote)
+    return concluidos
+
+def exportar_historicos(sistema, diretorio, formatos=FORMATOS_HISTORICO, processos=None,
+                        tamanho_lote=TAMANHO_LOTE_EXPORTACAO):
+    # Gera o Histórico Escolar de todos os alunos (um arquivo por formato) e o índice indice.csv.
+    # Este processo só lê os alunos (um lote por vez, sem guardá-los no armazenamento preguiçoso) e entrega
+    # a um pool de processos os RAs, nomes, matrículas e agregados de cada lote, com os nomes das disciplinas
+    # envolvidas; os processos montam os históricos, formatam e gravam os arquivos. Cada lote concluído vai
+    # para o arquivo de progresso, e uma exportação interrompida (Ctrl+C, queda) continua de onde parou se os
+    # dados não mudaram desde então.
+    sistema.atualizar()
+    os.makedirs(diretorio, exist_ok=True)
+    caminho_progresso = os.path.join(diretorio, ARQUIVO_PROGRESSO_EXPORTACAO)
+    cabecalho = {'sequencia': sistema.sequencia, 'formatos': sorted(formatos)}
+    concluidos = ler_progresso_exportacao(caminho_progresso, cabecalho)
+    if concluidos:
+        print(f"[INFO] Retomando a exportação: {len(concluidos)} histórico(s) já gravado(s).")
+    # Reescreve o progresso só com os lotes completos, para os próximos serem acrescentados depois deles
+    with open(caminho_progresso, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(cabecalho) + '\n')
+        if concluidos:
+            f.write(json.dumps(list(concluidos.values()), ensure_ascii=False) + '\n')
+
+    ras = list(sistema.alunos)
+    pendentes = [ra for ra in ras if ra not in concluidos]
+    processos = processos or os.cpu_count() or 1
+    total, feitos, ja_feitos = len(ras), len(concluidos), len(concluidos)
+    inicio = ultimo_aviso = time.perf_counter()
+    print(f"[INFO] Exportando {len(pendentes)} histórico(s) para {diretorio} com {processos} processo(s)...")
+
+    with open(caminho_progresso, 'a', encoding='utf-8') as progresso, ProcessPoolExecutor(processos, initializer=ignorar_interrupcao) as pool:
+        def concluir(tarefas):
+            nonlocal feitos, ultimo_aviso
+            if not tarefas:
+                return
+            for tarefa in tarefas:
+                lote = tarefa.result()
+                progresso.write(json.dumps(lote, ensure_ascii=False) + '\n')
+                progresso.flush()
+                concluidos.update((registro[0], registro) for registro in lote)
+                feitos += len(lote)
+            agora = time.perf_counter()
+            if agora - ultimo_aviso >= 1 or feitos == total:
+                ultimo_aviso = agora
+                print(f"[INFO] {feitos}/{total} históricos ({feitos / total:.0%}) | "
+                      f"{(feitos - ja_feitos) / (agora - inicio):.0f}/s")
+
+        em_andamento = set()
+        try:
+            for i in range(0, len(pendentes), tamanho_lote):
+                alunos = [dados_historico(aluno) for aluno in alunos_em_fluxo(sistema, pendentes[i:i + tamanho_lote])]
+                nomes = {id_disc: sistema.nome_disciplina(id_disc) for _, _, cursos, _ in alunos for id_disc in cursos}
+                em_andamento.add(pool.submit(gravar_historicos, diretorio, formatos, nomes, alunos))
+                if len(em_andamento) >= 2 * processos:
+                    # Poucos lotes à frente dos processos: a memória não cresce com o tamanho da instituição
+                    prontas, em_andamento = wait(em_andamento, return_when=FIRST_COMPLETED)
+                    concluir(prontas)
+            concluir(wait(em_andamento)[0])
+        except (KeyboardInterrupt, BrokenProcessPool, OSError) as e:
+            pool.shutdown(cancel_futures=True)
+            motivo = "interrompida" if isinstance(e, KeyboardInterrupt) else f"com falha ({e})"
+            print(f"\n[AVISO] Exportação {motivo} em {feitos}/{total}. Execute de novo para continuar de onde parou.")
+            return False
+
+    with open(os.path.join(diretorio, 'indice.csv'), 'w', encoding='utf-8', newline='') as f:
+        escritor = csv.writer(f, delimiter=';')
+        escritor.writerow(['RA', 'Nome', 'Disciplinas', 'Reprovações', 'Situação'])
+        escritor.writerows(concluidos[ra] for ra in ras)
+    os.remove(caminho_progresso)
+    pendencias = sum(1 for ra in ras if concluidos[ra][3])
+    print(f"[INFO] {total} histórico(s) exportado(s) em {time.perf_counter() - inicio:.1f}s "
+          f"({pendencias} com pendências). Índice: {os.path.join(diretorio, 'indice.csv')}")
+    return True
+
+# --- Exportações em Fluxo (notas e frequências, para credenciamento e BI)
+# Geradores encadeados: alunos -> linhas -> arquivo. Cada linha é gravada assim que é produzida e, com o
+# armazenamento preguiçoso (JSON com índice ou SQLite), cada aluno é lido do disco e descartado depois de
+# usado: o histórico dos alunos não fica em memória. O que fica é O(N) no número de alunos: a lista de RAs
+# percorrida e, no JSON preguiçoso, o índice (.idx) com RA, login, nome e posição de cada aluno. Sem o
+# índice, a carga é completa (todos os alunos em memória) e ele não é refeito, pois a exportação abre os
+# dados sem gravar nada na partida.
+
+CAMPOS_EXPORTACAO = {
+    'notas': ['ra', 'disciplina', 'ordem', 'avaliacao', 'nota'],
+    'frequencias': ['ra', 'disciplina', 'data', 'tipo'],
+}
+
+def alunos_em_fluxo(sistema, ras=None):
+    alunos = sistema.alunos
+    ler = alunos.ler_sem_guardar if isinstance(alunos, MapaPreguicoso) else alunos.get
+    for ra in (alunos if ras is None else ras):
+        aluno = ler(ra)
+        if aluno is not None:
+            yield aluno
+
+def linhas_notas(alunos, disciplinas=None):
+    for aluno in alunos:
+        for id_disc, notas in aluno.notas.items():
+            if disciplinas and id_disc not in disciplinas:
+                continue
+            rotulos = aluno.avaliacoes.get(id_disc) or ()
+            for i, nota in enumerate(notas):
+                yield {'ra': aluno.ra, 'disciplina': id_disc, 'ordem': i + 1,
+                       'avaliacao': rotulos[i] if i < len(rotulos) else None, 'nota': nota}
+
+def linhas_frequencias(alunos, disciplinas=None, inicio=None, fim=None):
+    # inicio/fim: período [inicio, fim) de periodo_consulta. A data de cada aula é interpretada como no
+    # índice temporal (interpretar_data_aula), uma vez por data distinta; com filtro, aulas sem data
+    # reconhecível ficam de fora, como nas consultas por período.
+    momentos = {}
+    for aluno in alunos:
+        for id_disc in aluno.frequencias:
+            if disciplinas and id_disc not in disciplinas:
+                continue
+            for registro in aluno.frequencias[id_disc]:
+                data = registro['data']
+                if inicio is not None or fim is not None:
+                    if data not in momentos:
+                        momentos[data] = interpretar_data_aula(data)
+                    momento = momentos[data]
+                    if momento is None or (inicio is not None and momento < inicio) or (fim is not None and momento >= fim):
+                        continue
+                yield {'ra': aluno.ra, 'disciplina': id_disc, 'data': data, 'tipo': registro['tipo']}
+
+def gravar_em_fluxo(linhas, caminho, campos, formato):
+    # CSV (';') ou JSON Lines; grava num temporário e o renomeia no fim. Devolve quantas linhas gravou.
+    quantidade = 0
+    with open(caminho + '.tmp', 'w', encoding='utf-8', newline='') as f:
+        if formato == 'csv':
+            escritor = csv.DictWriter(f, fieldnames=campos, delimiter=';')
+            escritor.writeheader()
+            for linha in linhas:
+                escritor.writerow(linha)
+                quantidade += 1
+        else:
+            for linha in linhas:
+                f.write(json.dumps(linha, ensure_ascii=False) + '\n')
+                quantidade += 1
+    os.replace(caminho + '.tmp', caminho)
+    return quantidade
+
+def exportar_em_fluxo(sistema, tipo, caminho, disciplinas=None, ras=None, desde=None, ate=None):
+    # tipo: 'notas' ou 'frequencias'; o formato vem da extensão (.jsonl/.json: JSON Lines, senão CSV)
+    formato = 'jsonl' if caminho.lower().endswith(('.jsonl', '.json')) else 'csv'
+    try:
+        inicio_periodo, fim_periodo = periodo_consulta(desde, ate, dias_padrao=None)
+    except ValueError as e:
+        print(f"[ERRO] {e}")
+        return False
+    sistema.atualizar()
+    candidatos = None
+    if disciplinas:
+        # Só os alunos matriculados nas disciplinas pedidas são lidos (as notas saem junto com a matrícula)
+        selecionados = set()
+        for id_disc in disciplinas:
+            selecionados.update(sistema.indices.alunos_por_disciplina[id_disc])
+        candidatos = [ra for ra in (ras or sistema.alunos) if ra in selecionados]
+    elif ras:
+        candidatos = ras
+    alunos = alunos_em_fluxo(sistema, candidatos)
+    if tipo == 'notas':
+        linhas = linhas_notas(alunos, disciplinas)
+    else:
+        linhas = linhas_frequencias(alunos, disciplinas, inicio_periodo, fim_periodo)
+
+    inicio = time.perf_counter()
+    try:
+        quantidade = gravar_em_fluxo(linhas, caminho, CAMPOS_EXPORTACAO[tipo], formato)
+    except OSError as e:
+        print(f"[ERRO] Falha ao exportar {tipo} para {caminho}: {e}")
+        return False
+    print(f"[INFO] {quantidade} linha(s) de {tipo} exportada(s) para {caminho} ({formato}) "
+          f"em {time.perf_counter() - inicio:.1f}s.")
+    return True
@@ -0,0 +1,429 @@
+# Índices secundários: matrículas, listas de espera, busca por trecho e aulas por data
+import unicodedata
+from bisect import bisect_left, bisect_right, insort
+from array import array
+
+from configuracao import LIMITE_VARREDURA_BUSCA, TAMANHO_PAGINA
+from entidades import Aluno, Professor, interpretar_data_aula
+
+# --- Índices Secundários
+
+class IndiceSobDemanda(dict):
+    # Dicionário cujas entradas são montadas a partir dos dados primários no primeiro acesso
+    def __init__(self, montar):
+        super().__init__()
+        self._montar = montar
+
+    def __missing__(self, chave):
+        valor = self._montar(chave)
+        if valor is None:
+            # Entidade inexistente: responde vazio sem guardar a chave
+            return {}
+        self[chave] = valor
+        return valor
+
+
+def normalizar_busca(texto):
+    # Minúsculas e sem acentos, para que "José" e "jose" se encontrem
+    texto = unicodedata.normalize('NFKD', str(texto).casefold())
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+class IndiceBusca:
+    # Busca por trecho em nomes, RAs, logins e IDs de disciplina. Cada entidade recebe um número na ordem de
+    # cadastro e cada trigrama guarda (array em ordem crescente) os números das entidades do tipo que o contêm.
+    # Uma consulta percorre a lista do trigrama mais raro, confere o trecho no texto da entidade e para assim
+    # que a página está completa. As listas ordenadas por nome e por chave permitem paginar nessas ordens sem
+    # ordenar a instituição inteira a cada consulta. Trechos curtos (sem trigrama) e filtros pouco seletivos
+    # podem descartar quase todos os cadastros antes de completar a página: a varredura para depois de
+    # LIMITE_VARREDURA_BUSCA descartes e o resultado é marcado como parcial.
+    TIPOS = ('aluno', 'professor', 'disciplina')
+    ORDENS = ('cadastro', 'nome', 'chave')
+
+    def __init__(self):
+        self.chaves = [] # número -> chave (RA, login ou ID)
+        self.textos = [] # número -> campos normalizados separados por '\0' (um trecho nunca atravessa campos)
+        self.nomes = [] # número -> nome normalizado
+        self.numeros = {tipo: {} for tipo in self.TIPOS} # tipo -> chave -> número (em ordem de cadastro)
+        self.trigramas = {tipo: {} for tipo in self.TIPOS} # tipo -> trigrama -> array de números
+        self.por_nome = {tipo: [] for tipo in self.TIPOS} # tipo -> [(nome, chave, número)] ordenada
+        self.por_chave = {tipo: [] for tipo in self.TIPOS} # tipo -> [(chave, número)] ordenada
+
+    @staticmethod
+    def _trigramas(texto):
+        # Trigramas de cada campo; os que atravessariam a separação entre campos não existem
+        return {campo[i:i + 3] for campo in texto.split('\0') for i in range(len(campo) - 2)}
+
+    def montar(self, entradas):
+        # Carga inicial: acumula em listas e converte para arrays no fim (mais rápido que inserir um a um)
+        listas = {tipo: {} for tipo in self.TIPOS}
+        for tipo, chave, campos in entradas:
+            if chave in self.numeros[tipo]:
+                continue
+            numero = self._novo_numero(tipo, chave, campos)
+            for trigrama in self._trigramas(self.textos[numero]):
+                listas[tipo].setdefault(trigrama, []).append(numero)
+        for tipo in self.TIPOS:
+            self.trigramas[tipo] = {trigrama: array('i', numeros) for trigrama, numeros in listas[tipo].items()}
+            self.por_nome[tipo] = sorted((self.nomes[n], chave, n) for chave, n in self.numeros[tipo].items())
+            self.por_chave[tipo] = sorted((chave, n) for chave, n in self.numeros[tipo].items())
+        return self
+
+    def _novo_numero(self, tipo, chave, campos):
+        numero = len(self.chaves)
+        self.chaves.append(chave)
+        self.textos.append('\0'.join(normalizar_busca(campo) for campo in campos))
+        self.nomes.append(normalizar_busca(campos[-1]))
+        self.numeros[tipo][chave] = numero
+        return numero
+
+    def adicionar(self, tipo, chave, campos):
+        # Entidade nova ou alterada (campos: chave, login..., nome por último)
+        numero = self.numeros[tipo].get(chave)
+        if numero is None:
+            numero = self._novo_numero(tipo, chave, campos)
+            for trigrama in self._trigramas(self.textos[numero]):
+                self.trigramas[tipo].setdefault(trigrama, array('i')).append(numero) # O maior número: continua em ordem
+            insort(self.por_nome[tipo], (self.nomes[numero], chave, numero))
+            insort(self.por_chave[tipo], (chave, numero))
+            return
+        texto = '\0'.join(normalizar_busca(campo) for campo in campos)
+        if texto == self.textos[numero]:
+            return
+        antigos, novos = self._trigramas(self.textos[numero]), self._trigramas(texto)
+        for trigrama in antigos - novos:
+            lista = self.trigramas[tipo][trigrama]
+            del lista[bisect_left(lista, numero)]
+        for trigrama in novos - antigos:
+            lista = self.trigramas[tipo].setdefault(trigrama, array('i'))
+            lista.insert(bisect_left(lista, numero), numero)
+        por_nome = self.por_nome[tipo]
+        del por_nome[bisect_left(por_nome, (self.nomes[numero], chave, numero))]
+        self.textos[numero] = texto
+        self.nomes[numero] = normalizar_busca(campos[-1])
+        insort(por_nome, (self.nomes[numero], chave, numero))
+
+    def pesquisar(self, tipo, consulta='', aceitar=None, ordem='cadastro', inicio=0, quantidade=TAMANHO_PAGINA,
+                  limite=LIMITE_VARREDURA_BUSCA):
+        # Devolve (chaves da página, se há mais resultados, se a busca parou no limite de descartes).
+        # aceitar(chave) aplica um filtro a cada candidato (sem hidratar a entidade: ver FILTROS_BUSCA).
+        consulta = normalizar_busca(consulta).strip()
+        lista = None
+        if len(consulta) >= 3:
+            lista = min((self.trigramas[tipo].get(trigrama, ()) for trigrama in self._trigramas(consulta)), key=len)
+        if lista is not None and (ordem == 'cadastro' or len(lista) <= limite):
+            candidatos = lista
+            if ordem != 'cadastro':
+                # Trecho e ordem ao mesmo tempo: ordena só a lista do trigrama mais raro (no máximo `limite` números)
+                chave_ordem = (lambda n: (self.nomes[n], self.chaves[n])) if ordem == 'nome' else self.chaves.__getitem__
+                candidatos = sorted(candidatos, key=chave_ordem)
+        elif ordem == 'nome':
+            # Trecho comum demais para ordenar: percorre a lista já ordenada
+            candidatos = (numero for _, _, numero in self.por_nome[tipo])
+        elif ordem == 'chave':
+            candidatos = (numero for _, numero in self.por_chave[tipo])
+        else:
+            candidatos = self.numeros[tipo].values()
+
+        pagina, encontrados, descartados = [], 0, 0
+        for numero in candidatos:
+            if consulta in self.textos[numero] and (aceitar is None or aceitar(self.chaves[numero])):
+                encontrados += 1
+                if encontrados > inicio:
+                    pagina.append(numero)
+                    if len(pagina) > quantidade:
+                        break
+            else:
+                descartados += 1
+                if descartados > limite:
+                    return [self.chaves[numero] for numero in pagina], False, True
+        return [self.chaves[numero] for numero in pagina[:quantidade]], len(pagina) > quantidade, False
+
+    def conteudo(self):
+        # Textos e trigramas por chave (independente da numeração), para a verificação de consistência
+        return ({tipo: {chave: self.textos[n] for chave, n in self.numeros[tipo].items()} for tipo in self.TIPOS},
+                {tipo: {trigrama: {self.chaves[n] for n in lista} for trigrama, lista in self.trigramas[tipo].items() if lista}
+                 for tipo in self.TIPOS})
+
+class IndiceTemporal:
+    # Aulas com frequência registrada (Disciplina.sessoes) ordenadas pela data/hora interpretada, no geral e
+    # por disciplina. Cada lista guarda as datas (para o bisect) e, na mesma posição, (disciplina, índice da
+    # aula). Uma consulta por período localiza as duas pontas por busca binária e devolve só o trecho entre
+    # elas, sem percorrer o histórico de nenhum aluno. Datas não reconhecidas ficam em sem_data.
+    def __init__(self):
+        self.geral = ([], [])
+        self.por_disciplina = {} # disciplina -> ([datas], [(disciplina, índice)])
+        self.indexadas = {} # disciplina -> aulas da tabela já indexadas
+        self.sem_data = [] # (disciplina, índice, texto)
+
+    def montar(self, disciplinas):
+        # Carga: junta tudo e ordena uma vez (inserir aula a aula seria quadrático)
+        entradas = []
+        for disciplina in disciplinas:
+            entradas.extend(self._entradas(disciplina))
+        entradas.sort(key=lambda entrada: entrada[0])
+        for momento, aula in entradas:
+            for datas, aulas in (self.geral, self.por_disciplina.setdefault(aula[0], ([], []))):
+                datas.append(momento)
+                aulas.append(aula)
+        return self
+
+    def _entradas(self, disciplina):
+        # Aulas da tabela ainda não indexadas, como (data/hora, (disciplina, índice))
+        inicio = self.indexadas.get(disciplina.id, 0)
+        self.indexadas[disciplina.id] = len(disciplina.sessoes)
+        for indice in range(inicio, len(disciplina.sessoes)):
+            momento = interpretar_data_aula(disciplina.sessoes[indice])
+            if momento is None:
+                self.sem_data.append((disciplina.id, indice, disciplina.sessoes[indice]))
+            else:
+                yield momento, (disciplina.id, indice)
+
+    def sincronizar(self, disciplina):
+        # Indexa as aulas acrescentadas à tabela da disciplina (em geral, uma só e no fim das listas)
+        for momento, aula in self._entradas(disciplina):
+            for datas, aulas in (self.geral, self.por_disciplina.setdefault(disciplina.id, ([], []))):
+                posicao = bisect_right(datas, momento)
+                datas.insert(posicao, momento)
+                aulas.insert(posicao, aula)
+
+    def substituir(self, disciplina):
+        # Disciplina (re)cadastrada: descarta as aulas da versão anterior e indexa a tabela atual
+        if disciplina.id in self.indexadas:
+            del self.indexadas[disciplina.id]
+            self.por_disciplina.pop(disciplina.id, None)
+            manter = [i for i, aula in enumerate(self.geral[1]) if aula[0] != disciplina.id]
+            self.geral = ([self.geral[0][i] for i in manter], [self.geral[1][i] for i in manter])
+            self.sem_data = [entrada for entrada in self.sem_data if entrada[0] != disciplina.id]
+        self.sincronizar(disciplina)
+
+    def aulas(self, inicio=None, fim=None, id_disciplina=None):
+        # [(data/hora, disciplina, índice)] das aulas em [inicio, fim), em ordem cronológica
+        datas, aulas = self.geral if id_disciplina is None else self.por_disciplina.get(id_disciplina, ([], []))
+        primeira = bisect_left(datas, inicio) if inicio is not None else 0
+        ultima = bisect_left(datas, fim) if fim is not None else len(datas)
+        return [(datas[i], *aulas[i]) for i in range(primeira, ultima)]
+
+    def conteudo(self):
+        # Para a verificação de consistência
+        return (sorted(zip(*self.geral)), {id_disc: sorted(zip(*listas)) for id_disc, listas in self.por_disciplina.items() if listas[0]},
+                sorted(self.sem_data))
+
+# Filtros das buscas: tipo -> nome -> (descrição, função(sistema, entidade))
+def _alunos_sem_matricula(sistema):
+    # Pelo índice RA -> quantidade de matrículas, sem ler o histórico de nenhum aluno
+    matriculados = sistema.indices.alunos_matriculados()
+    return lambda ra: ra not in matriculados
+
+# Filtro -> (descrição, preparar(sistema) -> condição sobre a chave do cadastro). Os filtros de alunos
+# respondem pelos índices; os de professores e disciplinas leem entidades que já ficam em memória.
+FILTROS_BUSCA = {
+    'aluno': {
+        'sem_matricula': ("Alunos sem nenhuma matrícula", _alunos_sem_matricula),
+    },
+    'professor': {
+        'sem_disciplina': ("Professores sem disciplina",
+                           lambda sistema: lambda login: not sistema.professores[login].disciplinas_ministradas),
+    },
+    'disciplina': {
+        'sem_professor': ("Disciplinas sem professor",
+                          lambda sistema: lambda id_disc: sistema.disciplinas[id_disc].professor_login not in sistema.professores),
+        'lotadas': ("Disciplinas lotadas", lambda sistema: lambda id_disc: sistema.disciplinas[id_disc].vagas() == 0),
+        'com_espera': ("Disciplinas com lista de espera",
+                       lambda sistema: lambda id_disc: bool(sistema.indices.espera_por_disciplina[id_disc])),
+    },
+}
+
+
+class IndicesAcademicos:
+    # Índices mantidos incrementalmente pelas operações do sistema. Os conjuntos são dicts com
+    # valores None (conjunto ordenado), o que dá pertinência e remoção O(1) preservando a ordem.
+    def __init__(self, sistema):
+        self.sistema = sistema
+        self.reconstruir()
+
+    def reconstruir(self):
+        sistema = self.sistema
+        self.ra_por_login = dict(sistema.armazenamento.pares_login_ra(sistema))
+        self.alunos_por_disciplina = IndiceSobDemanda(self._montar_alunos_da_disciplina)
+        self.disciplinas_por_professor = IndiceSobDemanda(self._montar_disciplinas_do_professor)
+        self.espera_por_disciplina = IndiceSobDemanda(self._montar_espera_da_disciplina)
+        self.matriculados = None # RA -> em quantas turmas está matriculado, montado no primeiro filtro por matrícula
+        self.busca = None # IndiceBusca, montado na primeira pesquisa
+        self.aulas = None # IndiceTemporal, montado na primeira consulta por período
+
+    def _entradas_busca(self):
+        sistema = self.sistema
+        for ra, login, nome in sistema.armazenamento.nomes_alunos(sistema):
+            yield 'aluno', ra, (ra, login, nome)
+        for login, professor in sistema.professores.items():
+            yield 'professor', login, (login, professor.nome)
+        for id_disc, disciplina in sistema.disciplinas.items():
+            yield 'disciplina', id_disc, (id_disc, disciplina.nome)
+
+    def _montar_alunos_da_disciplina(self, id_disciplina):
+        disciplina = self.sistema.disciplinas.get(id_disciplina)
+        return dict.fromkeys(disciplina.alunos_ra) if disciplina else None
+
+    def _montar_espera_da_disciplina(self, id_disciplina):
+        disciplina = self.sistema.disciplinas.get(id_disciplina)
+        return dict.fromkeys(disciplina.lista_espera) if disciplina else None
+
+    def _montar_disciplinas_do_professor(self, login):
+        professor = self.sistema.professores.get(login)
+        return dict.fromkeys(professor.disciplinas_ministradas) if professor else None
+
+    # Consultas
+
+    def matriculado(self, ra, id_disciplina):
+        return ra in self.alunos_por_disciplina[id_disciplina]
+
+    def em_espera(self, ra, id_disciplina):
+        return ra in self.espera_por_disciplina[id_disciplina]
+
+    def ministra(self, login, id_disciplina):
+        return id_disciplina in self.disciplinas_por_professor[login]
+
+    def disciplinas_do_professor(self, login):
+        return list(self.disciplinas_por_professor[login])
+
+    def aluno_por_login(self, login):
+        ra = self.ra_por_login.get(login)
+        return self.sistema.alunos.get(ra) if ra is not None else None
+
+    def alunos_matriculados(self):
+        if self.matriculados is None:
+            self.matriculados = self._contar_matriculas()
+        return self.matriculados
+
+    def _contar_matriculas(self):
+        # Pelas turmas das disciplinas (poucas e sempre em memória); monta todas as entradas de alunos_por_disciplina
+        contagem = {}
+        for id_disc in self.sistema.disciplinas:
+            for ra in self.alunos_por_disciplina[id_disc]:
+                contagem[ra] = contagem.get(ra, 0) + 1
+        return contagem
+
+    def _contar(self, ras, delta):
+        for ra in ras:
+            quantidade = self.matriculados.get(ra, 0) + delta
+            if quantidade:
+                self.matriculados[ra] = quantidade
+            else:
+                del self.matriculados[ra]
+
+    def indice_busca(self):
+        if self.busca is None:
+            self.busca = IndiceBusca().montar(self._entradas_busca())
+        return self.busca
+
+    def indice_aulas(self):
+        if self.aulas is None:
+            self.aulas = IndiceTemporal().montar(self.sistema.disciplinas.values())
+        return self.aulas
+
+    # Atualizações incrementais (só tocam entradas já montadas; as demais serão lidas dos dados primários)
+
+    def adicionar_usuario(self, usuario):
+        if isinstance(usuario, Aluno):
+            self.ra_por_login[usuario.login] = usuario.ra
+            self.atualizar_busca('aluno', usuario.ra, (usuario.ra, usuario.login, usuario.nome))
+        elif isinstance(usuario, Professor):
+            self.disciplinas_por_professor[usuario.login] = dict.fromkeys(usuario.disciplinas_ministradas)
+            self.atualizar_busca('professor', usuario.login, (usuario.login, usuario.nome))
+
+    def atualizar_busca(self, tipo, chave, campos):
+        if self.busca is not None:
+            self.busca.adicionar(tipo, chave, campos)
+
+    def registrar_aulas(self, disciplina):
+        if self.aulas is not None:
+            self.aulas.sincronizar(disciplina)
+
+    def adicionar_disciplina(self, disciplina):
+        self.atualizar_busca('disciplina', disciplina.id, (disciplina.id, disciplina.nome))
+        if self.aulas is not None:
+            self.aulas.substituir(disciplina)
+        alunos = dict.fromkeys(disciplina.alunos_ra)
+        if self.matriculados is not None:
+            # Disciplina recadastrada: a turma anterior dá lugar à nova
+            self._contar(self.alunos_por_disciplina.get(disciplina.id, ()), -1)
+            self._contar(alunos, 1)
+        self.alunos_por_disciplina[disciplina.id] = alunos
+        self.espera_por_disciplina[disciplina.id] = dict.fromkeys(disciplina.lista_espera)
+        if disciplina.professor_login in self.disciplinas_por_professor:
+            self.disciplinas_por_professor[disciplina.professor_login][disciplina.id] = None
+
+    def adicionar_matricula(self, ra, id_disciplina):
+        # Com o contador montado, todas as turmas estão em alunos_por_disciplina
+        alunos = self.alunos_por_disciplina.get(id_disciplina)
+        if alunos is not None:
+            if self.matriculados is not None and ra not in alunos:
+                self._contar((ra,), 1)
+            alunos[ra] = None
+
+    def remover_matricula(self, ra, id_disciplina):
+        alunos = self.alunos_por_disciplina.get(id_disciplina)
+        if alunos is not None and ra in alunos:
+            del alunos[ra]
+            if self.matriculados is not None:
+                self._contar((ra,), -1)
+
+    def adicionar_espera(self, ra, id_disciplina):
+        if id_disciplina in self.espera_por_disciplina:
+            self.espera_por_disciplina[id_disciplina][ra] = None
+
+    def remover_espera(self, ra, id_disciplina):
+        if id_disciplina in self.espera_por_disciplina:
+            self.espera_por_disciplina[id_disciplina].pop(ra, None)
+
+    # Verificação de consistência
+
+    def verificar_consistencia(self, corrigir=False):
+        # Recalcula cada índice a partir dos dados primários e compara com o que está em memória
+        sistema = self.sistema
+        divergencias = []
+
+        esperado = dict(sistema.armazenamento.pares_login_ra(sistema))
+        if esperado != self.ra_por_login:
+            divergencias.append(f"login -> RA: {len(set(esperado.items()) ^ set(self.ra_por_login.items()))} entrada(s) divergente(s)")
+
+        for nome, indice, montar in (
+                ('disciplina -> alunos', self.alunos_por_disciplina, self._montar_alunos_da_disciplina),
+                ('professor -> disciplinas', self.disciplinas_por_professor, self._montar_disciplinas_do_professor),
+                ('disciplina -> lista de espera', self.espera_por_disciplina, self._montar_espera_da_disciplina)):
+            for chave, valor in indice.items():
+                if set(valor) != set(montar(chave) or {}):
+                    divergencias.append(f"{nome}: entrada '{chave}' divergente")
+
+        if self.matriculados is not None:
+            esperado = {}
+            for disciplina in sistema.disciplinas.values():
+                for ra in disciplina.alunos_ra:
+                    esperado[ra] = esperado.get(ra, 0) + 1
+            if esperado != self.matriculados:
+                divergencias.append(f"RA -> matrículas: {len(set(esperado.items()) ^ set(self.matriculados.items()))} entrada(s) divergente(s)")
+
+        if self.aulas is not None and self.aulas.conteudo() != IndiceTemporal().montar(sistema.disciplinas.values()).conteudo():
+            divergencias.append("aulas por data: entradas divergentes")
+
+        if self.busca is not None:
+            textos, trigramas = self.busca.conteudo()
+            esperados, trigramas_esperados = IndiceBusca().montar(self._entradas_busca()).conteudo()
+            for tipo in IndiceBusca.TIPOS:
+                if textos[tipo] != esperados[tipo] or trigramas[tipo] != trigramas_esperados[tipo]:
+                    divergencias.append(f"busca: entradas de '{tipo}' divergentes")
+                if len(self.busca.por_nome[tipo]) != len(textos[tipo]):
+                    divergencias.append(f"busca: ordenação por nome de '{tipo}' divergente")
+
+        # Relação entre os próprios dados primários: matrícula registrada no aluno e na disciplina
+        for id_disc, disciplina in sistema.disciplinas.items():
+            for ra in disciplina.alunos_ra:
+                aluno = sistema.alunos.get(ra)
+                if not aluno or id_disc not in aluno.cursos:
+                    divergencias.append(f"disciplina '{id_disc}' lista o RA {ra}, mas o aluno não está matriculado nela")
+            if disciplina.lista_espera and disciplina.vagas() != 0:
+                divergencias.append(f"disciplina '{id_disc}' tem vagas livres e alunos na lista de espera")
+
+        if corrigir and divergencias:
+            self.reconstruir()
+        return divergencias
@@ -0,0 +1,150 @@
+# Métricas de desempenho (--metricas) e perfil com o cProfile (--perfil)
+import builtins
+import cProfile
+import json
+import pstats
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+# --- Instrumentação (Métricas e Perfil de Desempenho)
+
+FAIXAS_LATENCIA_MS = (0.01, 0.03, 0.1, 0.3, 1, 3, 10, 30, 100, 300, 1000, 3000, 10000) # Limites superiores das faixas
+
+class Metricas:
+    # Histogramas de latência e contagem de chamadas por operação, mais grandezas como bytes gravados.
+    # Desligada por padrão: nenhum método é embrulhado e os pontos de medição custam só o teste de `ativo`.
+    def __init__(self):
+        self.ativo = False
+        self.latencias = {} # nome -> {'chamadas', 'total_ms', 'minimo_ms', 'maximo_ms', 'faixas'}
+        self.grandezas = {} # nome -> {'registros', 'total', 'minimo', 'maximo', 'ultimo'}
+        self.perfil = None # cProfile.Profile, quando o perfil foi pedido
+        self._lock = threading.Lock()
+        self._espera_entrada = 0.0 # Tempo parado em input(), descontado das ações de menu
+        self._acao = None # (nome, início, espera em input() no início) da ação de menu em andamento
+
+    def ativar(self, *classes, menus=None):
+        # Embrulha os métodos públicos das classes e passa a cronometrar a espera por digitação
+        # (menus: globals() do módulo dos menus, cujo input() é trocado pelo cronometrado)
+        if self.ativo:
+            return
+        self.ativo = True
+        for classe in classes:
+            self.instrumentar(classe)
+        if menus is not None:
+            menus['input'] = self._entrada
+
+    def instrumentar(self, classe):
+        for nome, atributo in list(vars(classe).items()):
+            if nome.startswith('_') or not callable(atributo) or isinstance(atributo, type):
+                continue
+            setattr(classe, nome, self._cronometrado(f'{classe.__name__}.{nome}', atributo))
+
+    def _cronometrado(self, nome, funcao):
+        @wraps(funcao)
+        def executar(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                self.registrar(nome, time.perf_counter() - inicio)
+        return executar
+
+    def registrar(self, nome, segundos):
+        ms = segundos * 1000
+        with self._lock:
+            medida = self.latencias.get(nome)
+            if medida is None:
+                medida = self.latencias[nome] = {'chamadas': 0, 'total_ms': 0.0, 'minimo_ms': ms, 'maximo_ms': ms,
+                                                 'faixas': [0] * (len(FAIXAS_LATENCIA_MS) + 1)}
+            medida['chamadas'] += 1
+            medida['total_ms'] += ms
+            medida['minimo_ms'] = min(medida['minimo_ms'], ms)
+            medida['maximo_ms'] = max(medida['maximo_ms'], ms)
+            medida['faixas'][bisect_left(FAIXAS_LATENCIA_MS, ms)] += 1
+
+    def grandeza(self, nome, valor):
+        with self._lock:
+            medida = self.grandezas.get(nome)
+            if medida is None:
+                medida = self.grandezas[nome] = {'registros': 0, 'total': 0, 'minimo': valor, 'maximo': valor, 'ultimo': valor}
+            medida['registros'] += 1
+            medida['total'] += valor
+            medida['minimo'] = min(medida['minimo'], valor)
+            medida['maximo'] = max(medida['maximo'], valor)
+            medida['ultimo'] = valor
+
+    # Ações de menu: o tempo vai de uma escolha até a volta ao menu, sem a digitação do usuário
+
+    def _entrada(self, texto=''):
+        inicio = time.perf_counter()
+        try:
+            return builtins.input(texto)
+        finally:
+            self._espera_entrada += time.perf_counter() - inicio
+
+    def iniciar_acao(self, nome):
+        self.encerrar_acao()
+        self._acao = (nome, time.perf_counter(), self._espera_entrada)
+
+    def encerrar_acao(self):
+        if self._acao:
+            nome, inicio, espera = self._acao
+            self._acao = None
+            self.registrar(nome, time.perf_counter() - inicio - (self._espera_entrada - espera))
+
+    # Perfil (cProfile), exportação e exibição
+
+    def iniciar_perfil(self):
+        self.perfil = cProfile.Profile()
+        self.perfil.enable()
+
+    def _percentil(self, medida, fracao):
+        # Estimativa pelo limite superior da faixa que contém o percentil
+        alvo = medida['chamadas'] * fracao
+        acumulado = 0
+        for i, quantidade in enumerate(medida['faixas']):
+            acumulado += quantidade
+            if acumulado >= alvo:
+                return FAIXAS_LATENCIA_MS[i] if i < len(FAIXAS_LATENCIA_MS) else medida['maximo_ms']
+        return medida['maximo_ms']
+
+    def exportar(self):
+        with self._lock:
+            latencias = {}
+            for nome, medida in sorted(self.latencias.items()):
+                latencias[nome] = dict(medida, faixas=list(medida['faixas']),
+                                       media_ms=medida['total_ms'] / medida['chamadas'],
+                                       p50_ms=self._percentil(medida, 0.5), p95_ms=self._percentil(medida, 0.95))
+            return {'faixas_latencia_ms': list(FAIXAS_LATENCIA_MS), 'latencias': latencias,
+                    'grandezas': {nome: dict(medida) for nome, medida in sorted(self.grandezas.items())}}
+
+    def gravar(self, arquivo):
+        with open(arquivo, 'w', encoding='utf-8') as f:
+            json.dump(self.exportar(), f, indent=4, ensure_ascii=False)
+        print(f"[INFO] Métricas gravadas em {arquivo}.")
+
+    def exibir(self):
+        dados = self.exportar()
+        if not dados['latencias'] and not dados['grandezas']:
+            print("Nenhuma operação medida ainda.")
+            return
+        print(f"{'Operação':<45} {'Chamadas':>8} {'Média ms':>10} {'p50 ms':>8} {'p95 ms':>8} {'Máx. ms':>10}")
+        for nome, m in dados['latencias'].items():
+            print(f"{nome:<45} {m['chamadas']:>8} {m['media_ms']:>10.3f} {m['p50_ms']:>8.2f} {m['p95_ms']:>8.2f} {m['maximo_ms']:>10.3f}")
+        for nome, g in dados['grandezas'].items():
+            print(f"{nome:<45} {g['registros']:>8} total {g['total']} | mín. {g['minimo']} | máx. {g['maximo']} | último {g['ultimo']}")
+
+    def finalizar(self, arquivo_metricas=None, arquivo_perfil=None):
+        # Chamado na saída do programa
+        self.encerrar_acao()
+        if arquivo_metricas and self.ativo:
+            self.gravar(arquivo_metricas)
+        if arquivo_perfil and self.perfil:
+            self.perfil.disable()
+            self.perfil.dump_stats(arquivo_perfil)
+            print(f"[INFO] Perfil gravado em {arquivo_perfil}. Funções mais custosas (tempo acumulado):")
+            pstats.Stats(self.perfil).sort_stats('cumulative').print_stats(15)
+
+METRICAS = Metricas()
@@ -0,0 +1,296 @@
+# Modo serviço: o SistemaAcademico exposto por HTTP/JSON em localhost
+import json
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import islice
+from urllib.parse import parse_qs, urlsplit
+
+from configuracao import PORTA_SERVICO, TAMANHO_PAGINA, VALIDADE_SESSAO
+from metricas import METRICAS
+from entidades import interpretar_data_aula
+from indices import FILTROS_BUSCA, IndiceBusca
+from sistema_academico import MATRICULA_RECUSADA
+
+# --- Modo Serviço (HTTP/JSON local)
+
+def textos(*valores):
+    return all(isinstance(valor, str) for valor in valores)
+
+def linhas_validas(valor, tamanhos):
+    # Lista JSON de linhas [RA, ...] com um dos tamanhos aceitos
+    return isinstance(valor, list) and all(isinstance(linha, list) and len(linha) in tamanhos for linha in valor)
+
+def paginacao(parametros, quantidade_padrao):
+    # (inicio, quantidade) da query string; ValueError se não forem inteiros >= 0
+    inicio = int(parametros.get('inicio', 0))
+    quantidade = min(int(parametros.get('quantidade', quantidade_padrao)), 1000)
+    if inicio < 0 or quantidade < 0:
+        raise ValueError(f"inicio={inicio}, quantidade={quantidade}")
+    return inicio, quantidade
+
+class ServicoAcademico:
+    # Expõe o SistemaAcademico por HTTP/JSON em localhost. Um único lock serializa o acesso ao
+    # sistema (as estruturas em memória e o armazenamento não são seguros para threads) e os
+    # tokens de sessão evitam autenticar a cada requisição.
+    def __init__(self, sistema, validade_sessao=VALIDADE_SESSAO):
+        self.sistema = sistema
+        # O mesmo lock do motor de matrículas: uma rajada de pedidos vira poucos lotes gravados
+        self.lock = sistema.matriculas.trava
+        self.validade_sessao = validade_sessao
+        self._sessoes = {} # token -> (login, expira_em)
+        self._lock_sessoes = threading.Lock()
+
+    # Sessões
+
+    def autenticar(self, login, senha):
+        with self.lock:
+            usuario = self.sistema.usuarios.get(login)
+            if not usuario or usuario.senha != senha:
+                return None
+            perfil = usuario.perfil
+        token = secrets.token_urlsafe(24)
+        with self._lock_sessoes:
+            self._sessoes[token] = (login, time.monotonic() + self.validade_sessao)
+        return token, perfil
+
+    def encerrar_sessao(self, token):
+        with self._lock_sessoes:
+            self._sessoes.pop(token, None)
+
+    def usuario_da_sessao(self, token):
+        with self._lock_sessoes:
+            sessao = self._sessoes.get(token)
+            if not sessao:
+                return None
+            login, expira_em = sessao
+            if expira_em < time.monotonic():
+                del self._sessoes[token]
+                return None
+            self._sessoes[token] = (login, time.monotonic() + self.validade_sessao)
+        with self.lock:
+            return self.sistema.usuarios.get(login)
+
+    def ministra(self, usuario, disc_id):
+        # Chamado sob self.lock, que protege o índice professor -> disciplinas (refeito quando os dados são recarregados)
+        return usuario.perfil == 'professor' and self.sistema.ministra(usuario.login, disc_id)
+
+    # Operações (cada uma devolve (status HTTP, corpo))
+
+    def matricular(self, usuario, dados):
+        if usuario.perfil not in ('aluno', 'secretaria', 'administrador'):
+            return 403, {'ok': False, 'erro': "Perfil sem permissão para matricular."}
+        ra = usuario.ra if usuario.perfil == 'aluno' else dados.get('ra')
+        if not textos(ra, dados.get('disciplina')):
+            return 400, {'ok': False, 'erro': "Informe 'ra' e 'disciplina' como texto."}
+        situacao, mensagem = self.sistema.matricular_aluno(ra, dados.get('disciplina'))
+        if situacao == MATRICULA_RECUSADA:
+            return 400, {'ok': False, 'situacao': situacao, 'erro': f"Falha na matrícula: {mensagem}"}
+        return 200, {'ok': True, 'situacao': situacao, 'mensagem': mensagem}
+
+    def definir_capacidade(self, usuario, dados):
+        if usuario.perfil not in ('secretaria', 'administrador'):
+            return 403, {'ok': False, 'erro': "Perfil sem permissão para alterar vagas."}
+        if not textos(dados.get('disciplina')):
+            return 400, {'ok': False, 'erro': "Informe 'disciplina' como texto."}
+        capacidade = dados.get('capacidade')
+        if capacidade is not None and (not isinstance(capacidade, int) or isinstance(capacidade, bool)):
+            return 400, {'ok': False, 'erro': "Capacidade deve ser um número inteiro ou null (sem limite)."}
+        with self.lock:
+            sucesso, mensagem = self.sistema.definir_capacidade(dados.get('disciplina'), capacidade)
+        return (200 if sucesso else 400), {'ok': sucesso, 'mensagem': mensagem}
+
+    def cancelar(self, usuario, dados):
+        if usuario.perfil not in ('secretaria', 'administrador'):
+            return 403, {'ok': False, 'erro': "Perfil sem permissão para cancelar matrículas."}
+        if not textos(dados.get('ra'), dados.get('disciplina')):
+            return 400, {'ok': False, 'erro': "Informe 'ra' e 'disciplina' como texto."}
+        with self.lock:
+            sucesso, mensagem = self.sistema.cancelar_matricula(dados.get('ra'), dados.get('disciplina'))
+        return (200 if sucesso else 400), {'ok': sucesso, 'mensagem': mensagem}
+
+    def lancar_notas(self, usuario, dados):
+        disc_id = dados.get('disciplina')
+        if not textos(disc_id):
+            return 400, {'ok': False, 'erro': "Informe 'disciplina' como texto."}
+        linhas = dados.get('notas') or [[dados.get('ra'), dados.get('nota'), dados.get('avaliacao')]]
+        if not linhas_validas(linhas, (2, 3)):
+            return 400, {'ok': False, 'erro': "'notas' deve ser uma lista de [RA, nota] ou [RA, nota, avaliação]."}
+        with self.lock:
+            if not self.ministra(usuario, disc_id):
+                return 403, {'ok': False, 'erro': "Disciplina não atribuída a este professor."}
+            lancadas, erros = self.sistema.lancar_notas_lote(disc_id, linhas)
+        return 200, {'ok': not erros, 'lancadas': lancadas, 'erros': erros}
+
+    def registrar_frequencias(self, usuario, dados):
+        disc_id = dados.get('disciplina')
+        if not textos(disc_id):
+            return 400, {'ok': False, 'erro': "Informe 'disciplina' como texto."}
+        presencas = dados.get('presencas', {})
+        if not isinstance(presencas, dict) and not linhas_validas(presencas, (2,)):
+            return 400, {'ok': False, 'erro': "'presencas' deve ser um objeto RA -> P/F ou uma lista de [RA, P/F]."}
+        data = dados.get('data')
+        if data is not None and (not textos(data) or interpretar_data_aula(data) is None):
+            return 400, {'ok': False, 'erro': "'data' inválida (use AAAA-MM-DD[ HH:MM[:SS]] ou DD/MM/AAAA)."}
+        with self.lock:
+            if not self.ministra(usuario, disc_id):
+                return 403, {'ok': False, 'erro': "Disciplina não atribuída a este professor."}
+            registradas, erros = self.sistema.registrar_frequencia_lote(disc_id, presencas, data)
+        return 200, {'ok': not erros, 'registradas': registradas, 'erros': erros}
+
+    def historico(self, usuario, parametros):
+        ra = usuario.ra if usuario.perfil == 'aluno' else parametros.get('ra')
+        if not textos(ra):
+            return 400, {'ok': False, 'erro': "Informe o parâmetro 'ra'."}
+        with self.lock:
+            self.sistema.atualizar()
+            historico = self.sistema.historico_escolar(ra)
+        if historico is None:
+            return 404, {'ok': False, 'erro': "Aluno não encontrado."}
+        return 200, {'ok': True, 'historico': historico}
+
+    def listar_alunos(self, usuario, parametros):
+        if usuario.perfil not in ('secretaria', 'administrador'):
+            return 403, {'ok': False, 'erro': "Perfil sem permissão para listar alunos."}
+        try:
+            inicio, quantidade = paginacao(parametros, 100)
+        except ValueError:
+            return 400, {'ok': False, 'erro': "Parâmetros de paginação inválidos."}
+        with self.lock:
+            self.sistema.atualizar()
+            ras = list(islice(self.sistema.alunos, inicio, inicio + quantidade))
+        return 200, {'ok': True, 'alunos': ras}
+
+
+    def buscar(self, usuario, parametros):
+        if usuario.perfil not in ('secretaria', 'administrador'):
+            return 403, {'ok': False, 'erro': "Perfil sem permissão para buscar cadastros."}
+        tipo = parametros.get('tipo', 'aluno')
+        filtro = parametros.get('filtro') or None
+        ordem = parametros.get('ordem', 'cadastro')
+        if tipo not in IndiceBusca.TIPOS or ordem not in IndiceBusca.ORDENS or (filtro and filtro not in FILTROS_BUSCA[tipo]):
+            return 400, {'ok': False, 'erro': "Tipo, filtro ou ordem inválidos."}
+        try:
+            inicio, quantidade = paginacao(parametros, TAMANHO_PAGINA)
+        except ValueError:
+            return 400, {'ok': False, 'erro': "Parâmetros de paginação inválidos."}
+        campo_chave = {'aluno': 'ra', 'professor': 'login', 'disciplina': 'id'}[tipo]
+        with self.lock:
+            self.sistema.atualizar()
+            entidades, ha_mais, parcial = self.sistema.buscar(tipo, parametros.get('q', ''), filtro, ordem, inicio, quantidade)
+            itens = [{'chave': getattr(entidade, campo_chave), 'nome': entidade.nome} for entidade in entidades]
+        return 200, {'ok': True, 'resultados': itens, 'ha_mais': ha_mais, 'parcial': parcial}
+
+    def metricas(self, usuario, parametros):
+        if usuario.perfil != 'administrador':
+            return 403, {'ok': False, 'erro': "Apenas o administrador consulta as métricas."}
+        if not METRICAS.ativo:
+            return 404, {'ok': False, 'erro': "Métricas desligadas (inicie com --metricas)."}
+        return 200, {'ok': True, 'metricas': METRICAS.exportar()}
+
+
+class ManipuladorHTTP(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1' # Mantém a conexão aberta entre requisições do mesmo cliente
+    servico = None # ServicoAcademico, definido em criar_servidor
+
+    ROTAS_GET = {'/historico': 'historico', '/alunos': 'listar_alunos', '/busca': 'buscar', '/metricas': 'metricas'}
+    ROTAS_POST = {'/matricula': 'matricular', '/cancelamento': 'cancelar', '/capacidade': 'definir_capacidade',
+                  '/notas': 'lancar_notas', '/frequencias': 'registrar_frequencias'}
+
+    def log_message(self, formato, *args):
+        pass # Sem uma linha no terminal por requisição
+
+    def _responder(self, status, corpo):
+        dados = json.dumps(corpo, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _token(self):
+        cabecalho = self.headers.get('Authorization', '')
+        return cabecalho[7:] if cabecalho.startswith('Bearer ') else None
+
+    def _executar(self, metodo, usuario, dados):
+        try:
+            self._responder(*getattr(self.servico, metodo)(usuario, dados))
+        except TimeoutError as e:
+            self._responder(503, {'ok': False, 'erro': str(e)})
+        except OSError as e:
+            self._responder(500, {'ok': False, 'erro': f"Falha ao gravar os dados: {e}"})
+        except Exception as e:
+            # Um erro inesperado responde 500 em vez de derrubar a conexão sem resposta
+            print(f"[ERRO] Falha ao atender {self.command} {self.path}: {e!r}")
+            self._responder(500, {'ok': False, 'erro': "Erro interno do serviço."})
+
+    def _corpo(self):
+        tamanho = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(tamanho) or b'{}') if tamanho else {}
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == '/saude':
+            return self._responder(200, {'ok': True})
+        metodo = self.ROTAS_GET.get(url.path)
+        if not metodo:
+            return self._responder(404, {'ok': False, 'erro': "Rota inexistente."})
+        usuario = self.servico.usuario_da_sessao(self._token())
+        if not usuario:
+            return self._responder(401, {'ok': False, 'erro': "Sessão inválida ou expirada."})
+        parametros = {k: v[0] for k, v in parse_qs(url.query).items()}
+        self._executar(metodo, usuario, parametros)
+
+    def do_POST(self):
+        try:
+            dados = self._corpo()
+        except (ValueError, UnicodeDecodeError):
+            return self._responder(400, {'ok': False, 'erro': "Corpo JSON inválido."})
+        if not isinstance(dados, dict):
+            return self._responder(400, {'ok': False, 'erro': "O corpo deve ser um objeto JSON."})
+
+        if self.path == '/login':
+            if not textos(dados.get('login'), dados.get('senha')):
+                return self._responder(400, {'ok': False, 'erro': "Informe 'login' e 'senha' como texto."})
+            resultado = self.servico.autenticar(dados.get('login'), dados.get('senha'))
+            if not resultado:
+                return self._responder(401, {'ok': False, 'erro': "Login ou senha incorretos."})
+            token, perfil = resultado
+            return self._responder(200, {'ok': True, 'token': token, 'perfil': perfil})
+        if self.path == '/logout':
+            self.servico.encerrar_sessao(self._token())
+            return self._responder(200, {'ok': True})
+
+        metodo = self.ROTAS_POST.get(self.path)
+        if not metodo:
+            return self._responder(404, {'ok': False, 'erro': "Rota inexistente."})
+        usuario = self.servico.usuario_da_sessao(self._token())
+        if not usuario:
+            return self._responder(401, {'ok': False, 'erro': "Sessão inválida ou expirada."})
+        self._executar(metodo, usuario, dados)
+
+
+class ServidorAcademico(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024 # Fila de conexões pendentes; o padrão (5) recusa rajadas de clientes
+
+def criar_servidor(sistema, host='127.0.0.1', porta=PORTA_SERVICO):
+    manipulador = type('ManipuladorAcademico', (ManipuladorHTTP,), {'servico': ServicoAcademico(sistema)})
+    return ServidorAcademico((host, porta), manipulador)
+
+def executar_servidor(sistema, porta=PORTA_SERVICO):
+    # Apenas localhost: o serviço não deve ficar exposto na rede
+    servidor = criar_servidor(sistema, '127.0.0.1', porta)
+    print(f"[INFO] Serviço acadêmico em http://127.0.0.1:{porta} (Ctrl+C para encerrar).")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        try:
+            sistema.encerrar()
+        except OSError as e:
+            print(f"[ERRO] Falha ao gravar o estado final: {e}")
+        print("Serviço encerrado.")
@@ -0,0 +1,790 @@
+# SistemaAcademico: operações, transações, motor de matrículas, gravador em segundo plano e
+# conversões entre armazenamentos
+from datetime import datetime
+import atexit
+import gc
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import Mapping
+from functools import wraps
+
+from configuracao import (ARQUIVO_DADOS, ARQUIVO_SQLITE, CAPACIDADE_CACHE_HISTORICOS, JANELA_GRAVACAO,
+                          TAMANHO_LOTE_MATRICULAS, TAMANHO_PAGINA)
+from metricas import METRICAS
+from entidades import (Aluno, Professor, SEM_REGISTRO, Usuario, from_dict, interpretar_data_aula, montar_historico,
+                       periodo_consulta, situacao_curso, to_dict)
+from armazenamento import ArmazenamentoJSON, ArmazenamentoSQLite
+from estatisticas import calcular_estatisticas_turma
+from indices import FILTROS_BUSCA, IndicesAcademicos
+
+# --- Cache de Históricos Escolares
+
+class CacheHistoricos:
+    # Históricos já montados, por RA, com descarte do menos usado recentemente (LRU)
+    def __init__(self, capacidade):
+        self.capacidade = capacidade
+        self._itens = OrderedDict()
+        self.acertos = 0
+        self.falhas = 0
+        self.invalidacoes = 0
+
+    def obter(self, ra):
+        historico = self._itens.get(ra)
+        if historico is None:
+            self.falhas += 1
+            return None
+        self._itens.move_to_end(ra)
+        self.acertos += 1
+        return historico
+
+    def guardar(self, ra, historico):
+        self._itens[ra] = historico
+        self._itens.move_to_end(ra)
+        while len(self._itens) > self.capacidade:
+            self._itens.popitem(last=False)
+
+    def invalidar(self, *ras):
+        for ra in ras:
+            if self._itens.pop(ra, None) is not None:
+                self.invalidacoes += 1
+
+    def limpar(self):
+        self._itens.clear()
+
+    def estatisticas(self):
+        consultas = self.acertos + self.falhas
+        return {'itens': len(self._itens), 'capacidade': self.capacidade, 'acertos': self.acertos,
+                'falhas': self.falhas, 'invalidacoes': self.invalidacoes,
+                'taxa_acerto': self.acertos / consultas if consultas else 0.0}
+
+# --- Motor de Matrículas (período de matrícula com muitos pedidos simultâneos)
+
+MATRICULA_CONFIRMADA = 'matriculado'
+MATRICULA_EM_ESPERA = 'espera'
+MATRICULA_RECUSADA = 'recusado'
+
+class PedidoMatricula:
+    __slots__ = ('ra', 'id_disciplina', 'situacao', 'mensagem', 'erro')
+
+    def __init__(self, ra, id_disciplina):
+        self.ra = ra
+        self.id_disciplina = id_disciplina
+        self.situacao = None # Preenchida quando o pedido é decidido
+        self.mensagem = None
+        self.erro = None # Exceção da gravação do lote (ex.: TimeoutError), relançada para quem pediu
+
+    def concluir(self, situacao, mensagem):
+        self.situacao = situacao
+        self.mensagem = mensagem
+
+
+class MotorMatriculas:
+    # Os pedidos entram numa fila e são processados em lotes: quem pega a trava decide todos os pedidos
+    # pendentes (inclusive os de outras threads que chegaram enquanto esperava) sobre o estado mais recente
+    # e grava o lote inteiro com um único commit no armazenamento. Turmas com capacidade lotadas colocam o
+    # aluno na lista de espera; a vaga liberada por um cancelamento promove o primeiro da fila.
+    def __init__(self, sistema, tamanho_lote=TAMANHO_LOTE_MATRICULAS):
+        self.sistema = sistema
+        self.tamanho_lote = tamanho_lote
+        self.fila = deque()
+        self.trava = threading.RLock() # Também é o lock do modo serviço (um único dono do sistema por vez)
+
+    def solicitar(self, ra, id_disciplina):
+        pedido = PedidoMatricula(ra, id_disciplina)
+        self.fila.append(pedido)
+        return pedido
+
+    def matricular(self, ra, id_disciplina):
+        # Devolve (situação, mensagem); a situação é MATRICULA_CONFIRMADA, MATRICULA_EM_ESPERA ou MATRICULA_RECUSADA
+        pedido = self.solicitar(ra, id_disciplina)
+        with self.trava:
+            if pedido.situacao is None:
+                self.processar()
+        if pedido.erro:
+            raise pedido.erro
+        return pedido.situacao, pedido.mensagem
+
+    def matricular_lote(self, pares):
+        # Vários pedidos (RA, disciplina) de uma vez; devolve [(RA, disciplina, situação, mensagem)]
+        pedidos = [self.solicitar(str(ra).strip(), str(id_disciplina).strip()) for ra, id_disciplina in pares]
+        with self.trava:
+            self.processar()
+        for pedido in pedidos:
+            if pedido.erro:
+                raise pedido.erro
+        return [(p.ra, p.id_disciplina, p.situacao, p.mensagem) for p in pedidos]
+
+    def processar(self):
+        # Esvazia a fila, um lote por transação. Devolve quantos pedidos foram decididos.
+        processados = 0
+        with self.trava:
+            while self.fila:
+                lote = [self.fila.popleft() for _ in range(min(self.tamanho_lote, len(self.fila)))]
+                try:
+                    with self.sistema.armazenamento.transacao(self.sistema):
+                        registros = [registro for registro in map(self._decidir, lote) if registro]
+                        if registros:
+                            self.sistema.armazenamento.registrar_lote(self.sistema, registros)
+                except Exception as e:
+                    # Sem a trava (ou falha na gravação): este lote e os pedidos restantes voltam com o erro
+                    while self.fila:
+                        lote.append(self.fila.popleft())
+                    for pedido in lote:
+                        pedido.erro = e
+                        if pedido.situacao is None:
+                            pedido.concluir(MATRICULA_RECUSADA, f"Matrícula não processada: {e}")
+                    raise
+                processados += len(lote)
+                if METRICAS.ativo:
+                    METRICAS.grandeza('matriculas.lote', len(lote))
+        return processados
+
+    def _decidir(self, pedido):
+        # Decide um pedido e, se ele altera os dados, aplica-o em memória e devolve o registro a gravar
+        sistema = self.sistema
+        ra, id_disciplina = pedido.ra, pedido.id_disciplina
+        disciplina = sistema.disciplinas.get(id_disciplina)
+        if ra not in sistema.alunos:
+            return pedido.concluir(MATRICULA_RECUSADA, "Aluno não encontrado.")
+        if not disciplina:
+            return pedido.concluir(MATRICULA_RECUSADA, "Disciplina não encontrada.")
+        if sistema.esta_matriculado(ra, id_disciplina):
+            return pedido.concluir(MATRICULA_RECUSADA, "Aluno já matriculado nesta disciplina.")
+        if sistema.esta_em_espera(ra, id_disciplina):
+            posicao = disciplina.lista_espera.posicao(ra)
+            return pedido.concluir(MATRICULA_EM_ESPERA, f"Aluno já está na lista de espera (posição {posicao}).")
+
+        if disciplina.vagas() == 0:
+            registro = sistema.aplicar_alteracao({'op': 'espera', 'ra': ra, 'disciplina': id_disciplina})
+            pedido.concluir(MATRICULA_EM_ESPERA,
+                            f"Turma lotada: aluno na lista de espera (posição {len(disciplina.lista_espera)}).")
+        else:
+            registro = sistema.aplicar_alteracao({'op': 'matricula', 'ra': ra, 'disciplina': id_disciplina})
+            pedido.concluir(MATRICULA_CONFIRMADA, "Matrícula realizada com sucesso.")
+        return registro
+
+
+class GravadorAssincrono:
+    # Reescreve o snapshot numa thread de fundo. Cada alteração já vai para o journal na própria operação
+    # (é o que a torna durável); o caro é reescrever o snapshot inteiro, e isso não precisa acontecer com
+    # o usuário esperando. Pedidos que chegam dentro da janela viram uma única gravação, feita no máximo
+    # `janela` segundos depois do primeiro. flush() antecipa a gravação pendente e espera ela terminar.
+    def __init__(self, sistema, janela=JANELA_GRAVACAO):
+        self.sistema = sistema
+        self.janela = janela
+        self.condicao = threading.Condition()
+        self.pendente = False
+        self.gravando = False
+        self.ativo = True
+        self.prazo = 0.0
+        self.pedidos = 0 # Pedidos juntados na gravação pendente
+        self.gravacoes = 0
+        self.thread = threading.Thread(target=self._executar, name='gravador-snapshot', daemon=True)
+        self.thread.start()
+
+    def marcar(self):
+        # Há alterações a gravar no snapshot
+        with self.condicao:
+            self.pedidos += 1
+            if not self.pendente:
+                self.pendente = True
+                self.prazo = time.monotonic() + self.janela
+                self.condicao.notify_all()
+
+    def flush(self):
+        # Não pode ser chamado segurando a trava do sistema (a gravação precisa dela)
+        with self.condicao:
+            self.prazo = time.monotonic()
+            self.condicao.notify_all()
+            while self.pendente or self.gravando:
+                self.condicao.wait()
+
+    def encerrar(self):
+        if not self.ativo:
+            return
+        self.flush()
+        with self.condicao:
+            self.ativo = False
+            self.condicao.notify_all()
+        self.thread.join()
+
+    def _executar(self):
+        while True:
+            with self.condicao:
+                while self.ativo and not (self.pendente and time.monotonic() >= self.prazo):
+                    self.condicao.wait(max(0.0, self.prazo - time.monotonic()) if self.pendente else None)
+                if not self.pendente:
+                    return # Encerrado, sem nada pendente
+                pedidos, self.pedidos = self.pedidos, 0
+                self.pendente = False
+                self.gravando = True
+            try:
+                self._gravar(pedidos)
+            except Exception as e:
+                # As alterações continuam no journal; a próxima compactação pede outra gravação
+                print(f"[ERRO] Falha na gravação em segundo plano: {e}")
+            finally:
+                with self.condicao:
+                    self.gravando = False
+                    self.gravacoes += 1
+                    self.condicao.notify_all()
+
+    def _gravar(self, pedidos):
+        sistema = self.sistema
+        with sistema.matriculas.trava:
+            if sistema.armazenamento.desatualizado():
+                # Outro processo já gravou um snapshot com estas alterações; recarregar aqui trocaria os
+                # dados sob a thread principal, então fica para a próxima transação dela
+                return
+            sistema.salvar_dados()
+        if METRICAS.ativo:
+            METRICAS.grandeza('gravador.pedidos_por_gravacao', pedidos)
+
+# --- Gerenciamento de Dados (Simulação de DAO/Banco)
+def transacional(metodo):
+    # Executa o método sob a trava de escrita do armazenamento, já com as alterações dos outros processos.
+    # A trava do motor de matrículas exclui as outras threads do processo (gravador, modo serviço).
+    @wraps(metodo)
+    def executar(self, *args, **kwargs):
+        with self.matriculas.trava, self.armazenamento.transacao(self):
+            return metodo(self, *args, **kwargs)
+    return executar
+
+class SistemaAcademico:
+    def __init__(self, armazenamento=None, somente_leitura=False):
+        self.usuarios = {}  
+        self.alunos = {}  
+        self.professores = {} 
+        self.disciplinas = {} 
+        self.sequencia = 0 # Número do último registro aplicado (snapshot + journal)
+        self.indices = None # Índices secundários, montados depois do carregamento
+        self.cache_historicos = CacheHistoricos(CAPACIDADE_CACHE_HISTORICOS)
+        self.matriculas = MotorMatriculas(self)
+        self.gravador = None # GravadorAssincrono, quando o snapshot é gravado em segundo plano
+        self.armazenamento = armazenamento or ArmazenamentoJSON()
+        self.gravar_na_partida = False # A carga criou ou refez algo que ainda não está no disco
+        self.carregar_dados()
+        # Só grava na partida quando é preciso: arquivo inexistente ou ilegível (dados padrão), usuários
+        # base recriados ou índice do modo preguiçoso refeito. Reescrever um snapshot intacto a cada
+        # inicialização custava tanto quanto a própria carga. Aberto somente para leitura (exportações),
+        # nunca grava na partida.
+        if self.gravar_na_partida and not somente_leitura:
+            self.salvar_dados()
+
+    def carregar_dados_iniciais(self):
+        # Usuários e Perfis Iniciais
+        self.gravar_na_partida = True
+        admin = Usuario('admin', '123', 'Admin Master', 'administrador')
+        sec = Usuario('secretaria1', '123', 'Ana Secretária', 'secretaria')
+
+        self.usuarios = {u.login: u for u in [admin, sec]}
+        self.professores = {}
+        self.alunos = {}
+        self.disciplinas = {} 
+
+    @transacional
+    def salvar_dados(self):
+        self.armazenamento.salvar(self)
+
+    def iniciar_gravador(self, janela=JANELA_GRAVACAO):
+        self.gravador = GravadorAssincrono(self, janela)
+        atexit.register(self.gravador.encerrar)
+
+    def agendar_gravacao(self):
+        # Pedido de reescrita do snapshot: em segundo plano se houver gravador, senão na hora
+        if self.gravador:
+            self.gravador.marcar()
+        else:
+            self.salvar_dados()
+
+    def encerrar(self):
+        # Saída: termina o gravador (com o que estiver pendente) e grava o estado final
+        if self.gravador:
+            self.gravador.encerrar()
+        self.salvar_dados()
+
+    def carregar_dados(self):
+        # Sob a trava do sistema: a carga troca os dados que o gravador em segundo plano percorre
+        with self.matriculas.trava:
+            anterior = (self.usuarios, self.alunos, self.professores, self.disciplinas, self.sequencia, self.indices)
+            # Durante o carregamento (e o replay do journal) os índices ainda não existem
+            self.indices = None
+            self.cache_historicos.limpar()
+            # A carga cria centenas de milhares de objetos de uma vez. Com o coletor cíclico pausado ele não
+            # varre o heap a cada poucas centenas de alocações; ao final, os objetos carregados vão para a
+            # geração permanente (gc.freeze) e deixam de ser varridos nas coletas seguintes.
+            coletor_ativo = gc.isenabled()
+            gc.disable()
+            gc.unfreeze() # Os objetos de uma carga anterior voltam a ser coletáveis
+            try:
+                self.armazenamento.carregar(self)
+                self.indices = IndicesAcademicos(self)
+            except Exception:
+                # Uma recarga que falha mantém o estado anterior
+                self.usuarios, self.alunos, self.professores, self.disciplinas, self.sequencia, self.indices = anterior
+                raise
+            finally:
+                gc.freeze()
+                if coletor_ativo:
+                    gc.enable()
+
+    def atualizar(self):
+        # Incorpora o que outros processos gravaram (sem esperar pela trava de escrita deles). A trava do
+        # sistema impede que a recarga troque os dados enquanto o gravador em segundo plano os percorre.
+        with self.matriculas.trava:
+            self.armazenamento.sincronizar(self)
+
+    def vincular_aluno(self, aluno):
+        # Liga as frequências do aluno às tabelas de aulas das disciplinas (e converte o formato antigo,
+        # o que acrescenta aulas às disciplinas: sob a trava do sistema, como toda alteração de estado)
+        with self.matriculas.trava:
+            convertendo = bool(aluno.frequencias.pendentes)
+            aluno.frequencias.vincular(self._sessoes_da_disciplina, self._registrar_sessao)
+            if convertendo:
+                aluno.recalcular_agregados()
+            aluno.compactar()
+        return aluno
+
+    def _sessoes_da_disciplina(self, id_disciplina):
+        disciplina = self.disciplinas.get(id_disciplina)
+        return disciplina.sessoes if disciplina else []
+
+    def _registrar_sessao(self, id_disciplina, data):
+        disciplina = self.disciplinas.get(id_disciplina)
+        return self.registrar_aula(disciplina, data) if disciplina else None
+
+    def registrar_aula(self, disciplina, data):
+        # Índice da aula na tabela da disciplina; uma aula nova também entra no índice por data
+        indice = disciplina.registrar_sessao(data)
+        if self.indices:
+            self.indices.registrar_aulas(disciplina)
+        return indice
+
+    def esta_matriculado(self, ra, id_disciplina):
+        if self.indices:
+            return self.indices.matriculado(ra, id_disciplina)
+        disciplina = self.disciplinas.get(id_disciplina)
+        return bool(disciplina) and ra in disciplina.alunos_ra
+
+    def esta_em_espera(self, ra, id_disciplina):
+        if self.indices:
+            return self.indices.em_espera(ra, id_disciplina)
+        disciplina = self.disciplinas.get(id_disciplina)
+        return bool(disciplina) and ra in disciplina.lista_espera
+
+    def ministra(self, login, id_disciplina):
+        # Se a disciplina está atribuída ao professor (permissão de lançar notas e frequências)
+        if self.indices:
+            return self.indices.ministra(login, id_disciplina)
+        professor = self.professores.get(login)
+        return bool(professor) and id_disciplina in professor.disciplinas_ministradas
+
+    def disciplinas_do_professor(self, login):
+        if self.indices:
+            return self.indices.disciplinas_do_professor(login)
+        professor = self.professores.get(login)
+        return list(professor.disciplinas_ministradas) if professor else []
+
+    def aluno_por_login(self, login):
+        return self.indices.aluno_por_login(login)
+
+    def buscar(self, tipo, consulta='', filtro=None, ordem='cadastro', inicio=0, quantidade=TAMANHO_PAGINA):
+        # Busca paginada de alunos, professores ou disciplinas; devolve (entidades da página, se há mais,
+        # se a busca foi parcial). Só as entidades da página são hidratadas; a varredura do índice é limitada
+        # a LIMITE_VARREDURA_BUSCA candidatos descartados (ver IndiceBusca.pesquisar).
+        entidades = {'aluno': self.alunos, 'professor': self.professores, 'disciplina': self.disciplinas}[tipo]
+        aceitar = FILTROS_BUSCA[tipo][filtro][1](self) if filtro else None
+        chaves, ha_mais, parcial = self.indices.indice_busca().pesquisar(tipo, consulta, aceitar, ordem, inicio, quantidade)
+        return [entidades[chave] for chave in chaves], ha_mais, parcial
+
+    def aulas_no_periodo(self, desde=None, ate=None, id_disciplina=None):
+        # [(data/hora, disciplina, índice da aula)] das aulas do período (ver periodo_consulta), em ordem cronológica.
+        # Busca binária no índice por data: nenhum aluno é lido.
+        inicio, fim = periodo_consulta(desde, ate)
+        return self.indices.indice_aulas().aulas(inicio, fim, id_disciplina)
+
+    def frequencias_no_periodo(self, desde=None, ate=None, id_disciplina=None, tipo='F'):
+        # [(data/hora, disciplina, RA, 'P'/'F')] das aulas do período, só do tipo pedido (None = ambos).
+        # Só os alunos das turmas que tiveram aula no período são consultados, uma vez por turma.
+        por_disciplina = {}
+        for momento, id_disc, indice in self.aulas_no_periodo(desde, ate, id_disciplina):
+            por_disciplina.setdefault(id_disc, []).append((momento, indice))
+        codigo = ord(tipo) if tipo else None
+        marcas = []
+        for id_disc, aulas in por_disciplina.items():
+            for ra in self.disciplinas[id_disc].alunos_ra:
+                aluno = self.alunos.get(ra)
+                if not aluno:
+                    continue
+                for momento, indice in aulas:
+                    marca = aluno.frequencias.marca(id_disc, indice)
+                    if marca != SEM_REGISTRO and (codigo is None or marca == codigo):
+                        marcas.append((momento, id_disc, ra, chr(marca)))
+        marcas.sort()
+        return marcas
+
+    def faltas_por_aluno(self, desde=None, ate=None, id_disciplina=None):
+        # RA -> [(data/hora, disciplina)] das faltas do período, em todas as disciplinas se nenhuma for indicada
+        faltas = {}
+        for momento, id_disc, ra, _ in self.frequencias_no_periodo(desde, ate, id_disciplina, 'F'):
+            faltas.setdefault(ra, []).append((momento, id_disc))
+        return faltas
+
+    # --- Registro de Alterações
+
+    @transacional
+    def registrar_alteracao(self, registro):
+        # Aplica a operação em memória e a entrega ao armazenamento (journal ou banco), sem reescrever tudo
+        self.armazenamento.registrar(self, self.aplicar_alteracao(registro))
+
+    def aplicar_alteracao(self, registro):
+        # Aplica em memória e numera o registro; gravá-lo fica com quem chamou (sempre dentro de uma transação)
+        self.aplicar_registro(registro)
+        self.sequencia += 1
+        registro['seq'] = self.sequencia
+        return registro
+
+    def aplicar_registro(self, registro):
+        # Aplica uma operação do journal ao estado em memória (usado tanto na alteração quanto no replay)
+        op = registro['op']
+        self.invalidar_historicos(registro)
+
+        if op == 'usuario':
+            usuario = from_dict(dict(registro['dados']))
+            self.usuarios[usuario.login] = usuario
+            if isinstance(usuario, Aluno):
+                self.alunos[usuario.ra] = self.vincular_aluno(usuario)
+            elif isinstance(usuario, Professor):
+                self.professores[usuario.login] = usuario
+            if self.indices:
+                self.indices.adicionar_usuario(usuario)
+
+        elif op == 'disciplina':
+            disciplina = from_dict(dict(registro['dados']))
+            self.disciplinas[disciplina.id] = disciplina
+            professor = self.professores.get(disciplina.professor_login)
+            if professor and disciplina.id not in professor.disciplinas_ministradas:
+                professor.disciplinas_ministradas.append(disciplina.id)
+            if self.indices:
+                self.indices.adicionar_disciplina(disciplina)
+
+        elif op == 'matricula':
+            aluno = self.alunos[registro['ra']]
+            disciplina = self.disciplinas[registro['disciplina']]
+            if not self.esta_matriculado(registro['ra'], registro['disciplina']):
+                disciplina.alunos_ra.append(registro['ra'])
+            aluno.cursos[registro['disciplina']] = situacao_curso('Matriculado')
+            self.remover_da_espera(disciplina, registro['ra']) # Promoção da lista de espera
+            if self.indices:
+                self.indices.adicionar_matricula(registro['ra'], registro['disciplina'])
+
+        elif op == 'espera':
+            disciplina = self.disciplinas[registro['disciplina']]
+            if not self.esta_em_espera(registro['ra'], disciplina.id):
+                disciplina.lista_espera.append(registro['ra'])
+                if self.indices:
+                    self.indices.adicionar_espera(registro['ra'], disciplina.id)
+
+        elif op == 'capacidade':
+            self.disciplinas[registro['disciplina']].capacidade = registro['capacidade']
+
+        elif op == 'cancelamento':
+            aluno = self.alunos[registro['ra']]
+            disciplina = self.disciplinas.get(registro['disciplina'])
+            aluno.remover_disciplina(registro['disciplina'])
+            if disciplina and self.esta_matriculado(registro['ra'], registro['disciplina']):
+                disciplina.alunos_ra.remove(registro['ra'])
+            if disciplina:
+                self.remover_da_espera(disciplina, registro['ra'])
+            if self.indices:
+                self.indices.remover_matricula(registro['ra'], registro['disciplina'])
+
+        elif op == 'nota':
+            aluno = self.alunos[registro['ra']]
+            aluno.registrar_nota(registro['disciplina'], registro['nota'], registro.get('avaliacao'))
+
+        elif op == 'notas_lote':
+            for ra, nota, avaliacao in registro['notas']:
+                self.alunos[ra].registrar_nota(registro['disciplina'], nota, avaliacao)
+
+        elif op == 'frequencia':
+            aluno = self.alunos[registro['ra']]
+            indice = self.registrar_aula(self.disciplinas[registro['disciplina']], registro['data'])
+            aluno.registrar_frequencia(registro['disciplina'], indice, registro['tipo'])
+
+        elif op == 'frequencia_lote':
+            indice = self.registrar_aula(self.disciplinas[registro['disciplina']], registro['data'])
+            for ra, tipo in registro['presencas'].items():
+                self.alunos[ra].registrar_frequencia(registro['disciplina'], indice, tipo)
+
+        elif op == 'renomear_disciplina':
+            self.disciplinas[registro['disciplina']].nome = registro['nome']
+            if self.indices:
+                self.indices.atualizar_busca('disciplina', registro['disciplina'], (registro['disciplina'], registro['nome']))
+
+        elif op == 'dados_pessoais':
+            aluno = self.alunos[registro['ra']]
+            if registro.get('nome'):
+                aluno.nome = registro['nome']
+                if self.indices:
+                    self.indices.atualizar_busca('aluno', aluno.ra, (aluno.ra, aluno.login, aluno.nome))
+            if registro.get('endereco'):
+                aluno.dados_pessoais['endereco'] = registro['endereco']
+
+        else:
+            raise ValueError(f"Operação desconhecida no journal: {op}")
+
+    def remover_da_espera(self, disciplina, ra):
+        if self.esta_em_espera(ra, disciplina.id):
+            disciplina.lista_espera.remove(ra)
+            if self.indices:
+                self.indices.remover_espera(ra, disciplina.id)
+
+    def invalidar_historicos(self, registro):
+        # Descarta do cache apenas os históricos afetados pela operação
+        op = registro['op']
+        if 'ra' in registro:
+            self.cache_historicos.invalidar(registro['ra'])
+        elif op == 'usuario':
+            self.cache_historicos.invalidar(registro['dados'].get('ra'))
+        elif op == 'notas_lote':
+            self.cache_historicos.invalidar(*(ra for ra, _, _ in registro['notas']))
+        elif op == 'frequencia_lote':
+            self.cache_historicos.invalidar(*registro['presencas'])
+        elif op in ('renomear_disciplina', 'disciplina'):
+            # O nome da disciplina aparece no histórico de cada aluno da turma (recadastrar também pode mudá-lo)
+            id_disc = registro['disciplina'] if op == 'renomear_disciplina' else registro['dados']['id']
+            if self.indices:
+                self.cache_historicos.invalidar(*self.indices.alunos_por_disciplina[id_disc])
+            else:
+                self.cache_historicos.limpar()
+
+    def historico_escolar(self, ra):
+        # Histórico Escolar do aluno; repetido sem alterações, sai direto do cache
+        historico = self.cache_historicos.obter(ra)
+        if historico is not None:
+            return historico
+        aluno = self.alunos.get(ra)
+        if not aluno:
+            return None
+        historico = self.montar_historico(aluno)
+        self.cache_historicos.guardar(ra, historico)
+        return historico
+
+    def montar_historico(self, aluno):
+        # Sem passar pelo cache (a exportação de todos os alunos apenas o esvaziaria)
+        return montar_historico(aluno, self.nome_disciplina)
+
+    def nome_disciplina(self, id_disciplina):
+        disciplina = self.disciplinas.get(id_disciplina)
+        return disciplina.nome if disciplina else None
+
+    def matricular_aluno(self, ra, id_disciplina):
+        # Passa pelo motor de matrículas: devolve (situação, mensagem), ver MotorMatriculas.matricular
+        return self.matriculas.matricular(ra, id_disciplina)
+
+    def matricular_lote(self, pares):
+        return self.matriculas.matricular_lote(pares)
+        
+    @transacional
+    def cancelar_matricula(self, ra, id_disciplina):
+        aluno = self.alunos.get(ra)
+        disciplina = self.disciplinas.get(id_disciplina)
+
+        if not aluno:
+            return False, "Aluno não encontrado."
+        if not disciplina:
+            return False, "Disciplina não encontrada."
+        if self.esta_em_espera(ra, id_disciplina):
+            self.registrar_alteracao({'op': 'cancelamento', 'ra': ra, 'disciplina': id_disciplina})
+            return True, "Aluno retirado da lista de espera."
+        if id_disciplina not in aluno.cursos:
+            return False, "Aluno não está matriculado nesta disciplina."
+
+        # Remove do aluno (curso, frequências e notas) e da disciplina (lista de alunos_ra); a vaga
+        # liberada vai para o primeiro da lista de espera, gravado no mesmo commit do cancelamento
+        registros = [self.aplicar_alteracao({'op': 'cancelamento', 'ra': ra, 'disciplina': id_disciplina})]
+        registros += self.aplicar_promocoes(disciplina)
+        self.armazenamento.registrar_lote(self, registros)
+        if len(registros) > 1:
+            return True, f"Matrícula cancelada com sucesso. Vaga preenchida pela lista de espera (RA {registros[1]['ra']})."
+        return True, "Matrícula cancelada com sucesso."
+
+    @transacional
+    def definir_capacidade(self, id_disciplina, capacidade):
+        # Capacidade None remove o limite. Aumentar as vagas promove alunos da lista de espera.
+        disciplina = self.disciplinas.get(id_disciplina)
+        if not disciplina:
+            return False, "Disciplina não encontrada."
+        if capacidade is not None and capacidade < 0:
+            return False, "Capacidade inválida."
+
+        registros = [self.aplicar_alteracao({'op': 'capacidade', 'disciplina': id_disciplina, 'capacidade': capacidade})]
+        registros += self.aplicar_promocoes(disciplina)
+        self.armazenamento.registrar_lote(self, registros)
+
+        mensagem = f"Capacidade de {id_disciplina}: {'sem limite' if capacidade is None else capacidade}."
+        if capacidade is not None and len(disciplina.alunos_ra) > capacidade:
+            mensagem += f" A turma já tem {len(disciplina.alunos_ra)} aluno(s); nenhuma matrícula é desfeita."
+        if len(registros) > 1:
+            mensagem += f" {len(registros) - 1} aluno(s) promovido(s) da lista de espera."
+        return True, mensagem
+
+    def aplicar_promocoes(self, disciplina):
+        # Matricula, em ordem, os alunos em espera enquanto houver vagas (dentro da transação de quem chamou)
+        registros = []
+        while disciplina.lista_espera and disciplina.vagas() != 0:
+            registros.append(self.aplicar_alteracao(
+                {'op': 'matricula', 'ra': disciplina.lista_espera.primeiro(), 'disciplina': disciplina.id, 'promocao': True}))
+        return registros
+
+    @transacional
+    def cadastrar_usuario(self, usuario):
+        self.registrar_alteracao({'op': 'usuario', 'dados': to_dict(usuario)})
+        # O registro reconstrói o objeto a partir do dicionário; mantém a senha informada no cadastro
+        self.usuarios[usuario.login].senha = usuario.senha
+        return self.usuarios[usuario.login]
+
+    @transacional
+    def cadastrar_disciplina(self, disciplina):
+        self.registrar_alteracao({'op': 'disciplina', 'dados': to_dict(disciplina)})
+        return self.disciplinas[disciplina.id]
+
+    @transacional
+    def renomear_disciplina(self, id_disciplina, nome):
+        if id_disciplina not in self.disciplinas:
+            return False
+        self.registrar_alteracao({'op': 'renomear_disciplina', 'disciplina': id_disciplina, 'nome': nome})
+        return True
+
+    def estatisticas_disciplina(self, id_disciplina):
+        # Reúne os agregados da turma em colunas e calcula o resumo de uma vez
+        disciplina = self.disciplinas.get(id_disciplina)
+        if not disciplina:
+            return None
+        agregados = []
+        for ra in disciplina.alunos_ra:
+            aluno = self.alunos.get(ra)
+            if aluno:
+                agregados.append(aluno.agregados.get(id_disciplina) or {})
+        return calcular_estatisticas_turma(
+            [a.get('soma_notas', 0.0) for a in agregados],
+            [a.get('qtd_notas', 0) for a in agregados],
+            [a.get('aulas', 0) for a in agregados],
+            [a.get('presencas', 0) for a in agregados])
+
+    @transacional
+    def lancar_nota(self, ra, id_disciplina, nota):
+        self.registrar_alteracao({'op': 'nota', 'ra': ra, 'disciplina': id_disciplina, 'nota': nota})
+
+    @transacional
+    def lancar_notas_lote(self, id_disciplina, linhas):
+        # Lança as notas de uma turma inteira: linhas (RA, nota[, avaliação]) são todas validadas antes,
+        # as válidas são aplicadas em memória e gravadas num único registro. Devolve (lançadas, erros),
+        # com erros = [(número da linha, mensagem)].
+        if id_disciplina not in self.disciplinas:
+            return 0, [(0, "Disciplina não encontrada.")]
+
+        validas = []
+        erros = []
+        for numero, linha in enumerate(linhas, start=1):
+            if len(linha) < 2:
+                erros.append((numero, "Linha incompleta (esperado: RA, nota[, avaliação])."))
+                continue
+            ra = str(linha[0]).strip()
+            avaliacao = str(linha[2]).strip() if len(linha) > 2 and linha[2] is not None else ''
+            if not self.esta_matriculado(ra, id_disciplina) or ra not in self.alunos:
+                erros.append((numero, f"RA {ra} não encontrado ou não matriculado nesta turma."))
+                continue
+            try:
+                nota = float(str(linha[1]).strip().replace(',', '.'))
+            except ValueError:
+                erros.append((numero, f"Nota inválida: '{linha[1]}'."))
+                continue
+            if not 0.0 <= nota <= 10.0:
+                erros.append((numero, f"Nota {nota} fora do intervalo 0.0 a 10.0."))
+                continue
+            validas.append([ra, nota, avaliacao or None])
+
+        if validas:
+            self.registrar_alteracao({'op': 'notas_lote', 'disciplina': id_disciplina, 'notas': validas})
+        return len(validas), erros
+
+    @transacional
+    def registrar_frequencia(self, ra, id_disciplina, data, tipo):
+        self.registrar_alteracao({'op': 'frequencia', 'ra': ra, 'disciplina': id_disciplina, 'data': data, 'tipo': tipo})
+
+    @transacional
+    def registrar_frequencia_lote(self, id_disciplina, presencas, data=None):
+        # Registra a chamada de uma aula inteira numa passada e com uma única gravação.
+        # presencas: dict RA -> 'P'/'F' (ou pares (RA, tipo)). Devolve (registradas, erros), com erros = [(RA, mensagem)].
+        if id_disciplina not in self.disciplinas:
+            return 0, [('', "Disciplina não encontrada.")]
+        data = data or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if interpretar_data_aula(data) is None:
+            # A data vira a sessão da turma e entra nas consultas por período: tem de ser reconhecível
+            return 0, [('', f"Data da aula inválida: '{data}' (use AAAA-MM-DD[ HH:MM[:SS]] ou DD/MM/AAAA).")]
+        pares = presencas.items() if isinstance(presencas, Mapping) else presencas
+
+        validas = {}
+        erros = []
+        for ra, tipo in pares:
+            ra, tipo = str(ra).strip(), str(tipo).strip().upper()
+            if tipo not in ('P', 'F'):
+                erros.append((ra, f"Tipo de frequência inválido: '{tipo}' (use P ou F)."))
+            elif not self.esta_matriculado(ra, id_disciplina) or ra not in self.alunos:
+                erros.append((ra, "Aluno não encontrado ou não matriculado nesta turma."))
+            else:
+                validas[ra] = tipo
+
+        if validas:
+            self.registrar_alteracao({'op': 'frequencia_lote', 'disciplina': id_disciplina, 'data': data, 'presencas': validas})
+        return len(validas), erros
+
+    @transacional
+    def atualizar_dados_pessoais(self, ra, nome=None, endereco=None):
+        self.registrar_alteracao({'op': 'dados_pessoais', 'ra': ra, 'nome': nome, 'endereco': endereco})
+
+def migrar_json_para_sqlite(arquivo_json=None, arquivo_sqlite=None):
+    # Converte um sistema_academico_dados.json (snapshot + journal) para o banco SQLite
+    arquivo_json = arquivo_json or ARQUIVO_DADOS
+    arquivo_sqlite = arquivo_sqlite or ARQUIVO_SQLITE
+    if os.path.exists(arquivo_sqlite):
+        print(f"[ERRO] O banco {arquivo_sqlite} já existe. Remova-o antes de migrar.")
+        return False
+
+    origem = SistemaAcademico(ArmazenamentoJSON(arquivo_json))
+
+    destino = ArmazenamentoSQLite(arquivo_sqlite)
+    with destino.conexao:
+        for usuario in origem.usuarios.values():
+            destino.inserir_usuario(to_dict(usuario))
+            if isinstance(usuario, Aluno):
+                destino.inserir_frequencias(usuario)
+        for disciplina in origem.disciplinas.values():
+            destino.inserir_disciplina(to_dict(disciplina))
+        destino.conexao.execute("INSERT OR REPLACE INTO metadados (chave, valor) VALUES ('sequencia', ?)",
+                                (str(origem.sequencia),))
+    destino.conexao.close()
+
+    print(f"[INFO] Migração concluída: {len(origem.alunos)} alunos, {len(origem.professores)} professores "
+          f"e {len(origem.disciplinas)} disciplinas gravados em {arquivo_sqlite}.")
+    return True
+
+def converter_snapshot(origem, destino):
+    # Converte entre os formatos de snapshot (JSON, binário, fragmentado): carrega pela origem (snapshot + journal)
+    # e grava um snapshot completo no destino, que fica com o journal vazio
+    if not os.path.exists(origem.arquivo):
+        print(f"[ERRO] Arquivo {origem.arquivo} não encontrado.")
+        return False
+    sistema = SistemaAcademico(origem)
+    try:
+        destino.exportar(sistema)
+    except OSError as e:
+        print(f"[ERRO] Conversão para {destino.arquivo} não concluída: {e}")
+        return False
+    print(f"[INFO] Conversão concluída: {origem.arquivo} ({origem.tamanho_snapshot()} bytes) -> "
+          f"{destino.arquivo} ({destino.tamanho_snapshot()} bytes).")
+    return True
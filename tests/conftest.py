@@ -0,0 +1,53 @@
+# Os testes importam o script principal pelo caminho (o nome tem espaço), como os benchmarks;
+# os módulos do sistema (entidades, armazenamento, ...) ficam na raiz do repositório
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import carregar_sistema
+
+
+@pytest.fixture(scope='session')
+def pim():
+    return carregar_sistema()
+
+
+@pytest.fixture
+def diretorio(tmp_path, monkeypatch):
+    # Cada teste grava os arquivos de dados num diretório próprio
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def turma(pim):
+    # Cadastra o professor 'prof', a disciplina D1 e os alunos R0, R1, ... no sistema
+    def cadastrar(sistema, alunos=3):
+        sistema.cadastrar_usuario(pim.Professor('prof', '123', 'Professor'))
+        sistema.cadastrar_disciplina(pim.Disciplina('D1', 'Algoritmos', 'prof'))
+        for i in range(alunos):
+            sistema.cadastrar_usuario(pim.Aluno(f'aluno{i}', '123', f'Aluno {i}', f'R{i}'))
+        return sistema
+    return cadastrar
+
+
+@pytest.fixture
+def povoar(pim, turma):
+    # Turma com notas, chamadas, capacidade e lista de espera: o que cada armazenamento precisa preservar
+    def povoar(sistema):
+        turma(sistema, alunos=4)
+        sistema.cadastrar_disciplina(pim.Disciplina('D2', 'Banco de Dados', 'prof'))
+        sistema.definir_capacidade('D2', 2)
+        for i in range(4):
+            sistema.matricular_aluno(f'R{i}', 'D1')
+            sistema.matricular_aluno(f'R{i}', 'D2')
+        sistema.lancar_notas_lote('D1', [['R0', 8.0, 'P1'], ['R1', 5.5, 'P1'], ['R0', 9.0, 'P2'], ['R2', 7.0]])
+        sistema.registrar_frequencia_lote('D1', {'R0': 'P', 'R1': 'F', 'R2': 'P', 'R3': 'P'}, '2024-03-04 08:00:00')
+        sistema.registrar_frequencia_lote('D1', {'R0': 'P', 'R1': 'P', 'R2': 'F'}, '2024-03-11 08:00:00')
+        sistema.registrar_frequencia('R3', 'D1', '2024-03-01 08:00:00', 'F')
+        sistema.atualizar_dados_pessoais('R1', nome='Aluno Um', endereco='Rua A, 1')
+        return sistema
+    return povoar
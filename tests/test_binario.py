@@ -0,0 +1,55 @@
+# Snapshot binário: ida e volta com o JSON e falhas ao gravar
+import errno
+import os
+
+import pytest
+
+import armazenamento
+
+
+def test_conversao_preserva_os_dados(pim, diretorio, povoar):
+    origem = povoar(pim.SistemaAcademico(pim.ArmazenamentoJSON()))
+    assert pim.converter_snapshot(pim.ArmazenamentoJSON(), pim.ArmazenamentoBinario())
+
+    binario = pim.SistemaAcademico(pim.ArmazenamentoBinario())
+    assert binario.armazenamento.estado_compacto(binario) == origem.armazenamento.estado_compacto(origem)
+    assert binario.disciplinas['D2'].lista_espera == ['R2', 'R3']
+    assert binario.historico_escolar('R0') == origem.historico_escolar('R0')
+
+    # Alterações vão para o journal do binário e voltam na próxima carga
+    binario.lancar_notas_lote('D1', [['R3', 6.0]])
+    binario.salvar_dados()
+    binario.cancelar_matricula('R0', 'D2')
+    recarregado = pim.SistemaAcademico(pim.ArmazenamentoBinario())
+    assert recarregado.alunos['R3'].notas['D1'] == [6.0]
+    assert sorted(recarregado.disciplinas['D2'].alunos_ra) == ['R1', 'R2']
+    assert recarregado.indices.verificar_consistencia() == []
+
+
+def test_snapshot_binario_corrompido_nao_e_carregado(pim, diretorio, povoar):
+    povoar(pim.SistemaAcademico(pim.ArmazenamentoBinario()))
+    caminho = pim.ArmazenamentoBinario().arquivo
+    with open(caminho, 'r+b') as f:
+        f.seek(-4, os.SEEK_END)
+        f.write(b'\x00\x00\x00\x00')
+    with pytest.raises(ValueError, match='corrompido'):
+        pim.SistemaAcademico(pim.ArmazenamentoBinario())
+
+
+def test_falha_ao_gravar_snapshot_binario_sobe(pim, diretorio, povoar, monkeypatch):
+    sistema = povoar(pim.SistemaAcademico(pim.ArmazenamentoBinario()))
+    journal = sistema.armazenamento.journal
+    tamanho = os.path.getsize(journal)
+    substituir = os.replace
+    def substituir_com_falha(origem, destino):
+        if destino.endswith('.pimb'):
+            raise OSError(errno.ENOSPC, 'No space left on device')
+        return substituir(origem, destino)
+    with monkeypatch.context() as trocas:
+        trocas.setattr(armazenamento.os, 'replace', substituir_com_falha)
+        with pytest.raises(OSError):
+            sistema.salvar_dados()
+        assert not pim.converter_snapshot(pim.ArmazenamentoBinario(),
+                                          pim.ArmazenamentoBinario('copia.pimb', 'copia.pimb.journal'))
+    assert os.path.getsize(journal) == tamanho
+    assert pim.SistemaAcademico(pim.ArmazenamentoBinario()).alunos['R0'].notas['D1'] == [8.0, 9.0]
@@ -0,0 +1,55 @@
+# Busca paginada por trecho e filtros de cadastro
+def chaves(resultado, campo='ra'):
+    entidades, ha_mais, parcial = resultado
+    return [getattr(entidade, campo) for entidade in entidades], ha_mais, parcial
+
+
+def test_busca_por_trecho_sem_acento_e_paginada(pim, diretorio, turma):
+    sistema = turma(pim.SistemaAcademico(pim.ArmazenamentoJSON()), alunos=5)
+    sistema.atualizar_dados_pessoais('R3', nome='José Conceição')
+    assert chaves(sistema.buscar('aluno', 'jose')) == (['R3'], False, False)
+    assert chaves(sistema.buscar('aluno', 'CONCEI')) == (['R3'], False, False)
+    assert chaves(sistema.buscar('aluno', 'aluno', quantidade=2)) == (['R0', 'R1'], True, False)
+    # R3 continua sendo encontrado pelo login (aluno3)
+    assert chaves(sistema.buscar('aluno', 'aluno', inicio=2, quantidade=2)) == (['R2', 'R3'], True, False)
+    assert chaves(sistema.buscar('aluno', 'aluno', inicio=4, quantidade=2)) == (['R4'], False, False)
+    assert chaves(sistema.buscar('aluno', '', ordem='nome'))[0] == ['R0', 'R1', 'R2', 'R4', 'R3']
+
+    # O nome antigo sai do índice; o cadastro novo entra sem remontar
+    assert chaves(sistema.buscar('aluno', 'aluno 3')) == ([], False, False)
+    sistema.cadastrar_usuario(pim.Aluno('zeca', '123', 'Zé Carioca', 'R9'))
+    assert chaves(sistema.buscar('aluno', 'carioca')) == (['R9'], False, False)
+    assert chaves(sistema.buscar('disciplina', 'ritmo'), 'id') == (['D1'], False, False)
+    assert sistema.indices.verificar_consistencia() == []
+
+
+def test_filtro_sem_matricula_acompanha_as_operacoes(pim, diretorio, turma):
+    sistema = turma(pim.SistemaAcademico(pim.ArmazenamentoJSON()), alunos=3)
+    sistema.cadastrar_disciplina(pim.Disciplina('D2', 'Banco de Dados', 'prof'))
+    sistema.matricular_aluno('R0', 'D1')
+    sistema.matricular_aluno('R0', 'D2')
+    assert chaves(sistema.buscar('aluno', filtro='sem_matricula'))[0] == ['R1', 'R2']
+
+    sistema.matricular_aluno('R1', 'D1')
+    sistema.cancelar_matricula('R0', 'D1')
+    assert chaves(sistema.buscar('aluno', filtro='sem_matricula'))[0] == ['R2']
+    assert sistema.indices.alunos_matriculados() == {'R0': 1, 'R1': 1}
+
+    sistema.cancelar_matricula('R0', 'D2')
+    # Recadastrar a disciplina substitui a turma anterior
+    sistema.cadastrar_disciplina(pim.Disciplina('D1', 'Algoritmos II', 'prof'))
+    assert chaves(sistema.buscar('aluno', filtro='sem_matricula'))[0] == ['R0', 'R1', 'R2']
+    assert sistema.indices.verificar_consistencia() == []
+
+
+def test_filtros_de_professores_e_disciplinas(pim, diretorio, turma):
+    sistema = turma(pim.SistemaAcademico(pim.ArmazenamentoJSON()), alunos=2)
+    sistema.cadastrar_usuario(pim.Professor('prof2', '123', 'Professora Dois'))
+    sistema.cadastrar_disciplina(pim.Disciplina('D2', 'Banco de Dados', 'ninguem'))
+    sistema.definir_capacidade('D1', 1)
+    sistema.matricular_aluno('R0', 'D1')
+    sistema.matricular_aluno('R1', 'D1')
+    assert chaves(sistema.buscar('professor', filtro='sem_disciplina'), 'login')[0] == ['prof2']
+    assert chaves(sistema.buscar('disciplina', filtro='sem_professor'), 'id')[0] == ['D2']
+    assert chaves(sistema.buscar('disciplina', filtro='lotadas'), 'id')[0] == ['D1']
+    assert chaves(sistema.buscar('disciplina', filtro='com_espera'), 'id')[0] == ['D1']
@@ -0,0 +1,67 @@
+# Cache dos Históricos Escolares: acertos, descarte LRU e invalidação só dos alunos afetados
+from sistema_academico import CacheHistoricos
+
+
+def em_cache(sistema):
+    return set(sistema.cache_historicos._itens)
+
+
+def test_cache_lru():
+    cache = CacheHistoricos(2)
+    cache.guardar('R0', {'ra': 'R0'})
+    cache.guardar('R1', {'ra': 'R1'})
+    assert cache.obter('R0') == {'ra': 'R0'} # R0 passa a ser o mais recente
+    cache.guardar('R2', {'ra': 'R2'})
+    assert cache.obter('R1') is None
+    assert set(cache._itens) == {'R0', 'R2'}
+    cache.invalidar('R0', 'R9')
+    assert cache.estatisticas() == {'itens': 1, 'capacidade': 2, 'acertos': 1, 'falhas': 1,
+                                    'invalidacoes': 1, 'taxa_acerto': 0.5}
+
+
+def test_alteracoes_invalidam_so_os_historicos_afetados(pim, diretorio, povoar):
+    sistema = povoar(pim.SistemaAcademico(pim.ArmazenamentoJSON()))
+    sistema.cadastrar_disciplina(pim.Disciplina('D3', 'Redes', 'prof'))
+    sistema.matricular_aluno('R3', 'D3')
+    todos = set(sistema.alunos)
+    def consultar():
+        for ra in todos:
+            sistema.historico_escolar(ra)
+
+    consultar()
+    historico = sistema.historico_escolar('R0')
+    assert sistema.historico_escolar('R0') is historico
+    assert em_cache(sistema) == todos
+
+    sistema.lancar_nota('R0', 'D1', 3.0)
+    assert em_cache(sistema) == todos - {'R0'}
+    assert sistema.historico_escolar('R0')['disciplinas'][0]['media'] == '6.67'
+
+    consultar()
+    sistema.lancar_notas_lote('D1', [['R1', 9.0], ['R2', 9.0]])
+    assert em_cache(sistema) == {'R0', 'R3'}
+
+    consultar()
+    sistema.registrar_frequencia_lote('D1', {'R0': 'F', 'R3': 'F'}, '2024-03-18 08:00')
+    assert em_cache(sistema) == {'R1', 'R2'}
+
+    consultar()
+    sistema.renomear_disciplina('D3', 'Redes de Computadores')
+    assert em_cache(sistema) == todos - {'R3'}
+    assert [d['disciplina'] for d in sistema.historico_escolar('R3')['disciplinas']][-1] == 'Redes de Computadores'
+
+    consultar()
+    sistema.cadastrar_disciplina(pim.Disciplina('D3', 'Redes II', 'prof'))
+    assert em_cache(sistema) == todos - {'R3'}
+    assert [d['disciplina'] for d in sistema.historico_escolar('R3')['disciplinas']][-1] == 'Redes II'
+
+
+def test_recarga_por_outro_processo_esvazia_o_cache(pim, diretorio, turma):
+    sistema = turma(pim.SistemaAcademico(pim.ArmazenamentoJSON()), alunos=1)
+    sistema.matricular_aluno('R0', 'D1')
+    assert sistema.historico_escolar('R0')['disciplinas'][0]['media'] == '0.00'
+
+    outro = pim.SistemaAcademico(pim.ArmazenamentoJSON())
+    outro.lancar_nota('R0', 'D1', 8.0)
+    sistema.atualizar()
+    assert sistema.historico_escolar('R0')['disciplinas'][0]['media'] == '8.00'
@@ -0,0 +1,41 @@
+# Cache de partida (arquivo .cache) do armazenamento JSON
+import os
+
+
+def recarregar(pim):
+    return pim.SistemaAcademico(pim.ArmazenamentoJSON())
+
+
+def test_cache_corrompido_e_ignorado(pim, diretorio, turma):
+    sistema = turma(pim.SistemaAcademico(pim.ArmazenamentoJSON()))
+    sistema.matricular_aluno('R0', 'D1')
+    sistema.salvar_dados()
+    cache = sistema.armazenamento.cache
+    with open(cache, 'r+b') as f:
+        f.seek(-10, os.SEEK_END)
+        f.write(b'\xff' * 10)
+
+    assert not pim.ArmazenamentoJSON().ler_cache(sistema)
+    recarregado = recarregar(pim)
+    assert recarregado.esta_matriculado('R0', 'D1')
+    assert sorted(recarregado.alunos) == ['R0', 'R1', 'R2']
+    # A partida a frio regrava um cache válido
+    assert pim.ArmazenamentoJSON().ler_cache(recarregado)
+
+
+def test_cache_de_snapshot_anterior_e_ignorado(pim, diretorio, turma):
+    sistema = turma(pim.SistemaAcademico(pim.ArmazenamentoJSON()))
+    sistema.salvar_dados()
+    cache = sistema.armazenamento.cache
+    with open(cache, 'rb') as f:
+        antigo = f.read()
+
+    sistema.matricular_aluno('R1', 'D1')
+    sistema.salvar_dados()
+    # Um cache válido, mas de um snapshot anterior ao atual
+    with open(cache, 'wb') as f:
+        f.write(antigo)
+
+    recarregado = recarregar(pim)
+    assert recarregado.esta_matriculado('R1', 'D1')
+    assert recarregado.sequencia == sistema.sequencia
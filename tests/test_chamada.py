@@ -0,0 +1,49 @@
+# Chamada da turma inteira: uma aula, várias presenças e um único registro gravado
+import pytest
+
+
+def test_chamada_valida_cada_aluno_e_grava_um_registro(pim, diretorio, turma):
+    sistema = turma(pim.SistemaAcademico(pim.ArmazenamentoJSON()), alunos=4)
+    for ra in ('R0', 'R1', 'R2'):
+        sistema.matricular_aluno(ra, 'D1')
+    sequencia = sistema.sequencia
+
+    registradas, erros = sistema.registrar_frequencia_lote(
+        'D1', [('R0', 'p'), (' R1 ', 'F'), ('R2', 'X'), ('R3', 'P')], '2024-03-04 08:00')
+    assert registradas == 2
+    assert [ra for ra, _ in erros] == ['R2', 'R3']
+    assert sistema.sequencia == sequencia + 1
+    assert sistema.disciplinas['D1'].sessoes == ['2024-03-04 08:00']
+    assert list(sistema.alunos['R0'].frequencias['D1']) == [{'data': '2024-03-04 08:00', 'tipo': 'P'}]
+    assert 'D1' not in sistema.alunos['R2'].frequencias
+
+    # A mesma aula outra vez corrige as marcas, sem criar outra sessão
+    assert sistema.registrar_frequencia_lote('D1', {'R1': 'P', 'R2': 'F'}, '2024-03-04 08:00') == (2, [])
+    assert sistema.disciplinas['D1'].sessoes == ['2024-03-04 08:00']
+    assert sistema.alunos['R1'].resumo_frequencia('D1') == (1, 1)
+    assert sistema.alunos['R2'].resumo_frequencia('D1') == (1, 0)
+
+
+def test_chamada_sem_data_usa_o_momento_atual_e_data_invalida_e_recusada(pim, diretorio, turma):
+    sistema = turma(pim.SistemaAcademico(pim.ArmazenamentoJSON()), alunos=1)
+    sistema.matricular_aluno('R0', 'D1')
+    assert sistema.registrar_frequencia_lote('D1', {'R0': 'P'}) == (1, [])
+    assert len(sistema.disciplinas['D1'].sessoes) == 1
+    assert sistema.registrar_frequencia_lote('D1', {'R0': 'P'}, '31/02/2024')[0] == 0
+    assert sistema.registrar_frequencia_lote('D9', {'R0': 'P'}) == (0, [('', "Disciplina não encontrada.")])
+    assert len(sistema.disciplinas['D1'].sessoes) == 1
+
+
+@pytest.mark.parametrize('backend', ['ArmazenamentoJSON', 'ArmazenamentoSQLite'])
+def test_chamada_sobrevive_a_recarga(pim, diretorio, turma, backend):
+    sistema = turma(pim.SistemaAcademico(getattr(pim, backend)()), alunos=3)
+    for ra in ('R0', 'R1', 'R2'):
+        sistema.matricular_aluno(ra, 'D1')
+    sistema.registrar_frequencia_lote('D1', {'R0': 'P', 'R1': 'F', 'R2': 'P'}, '2024-03-04 08:00')
+    sistema.registrar_frequencia_lote('D1', {'R0': 'F', 'R2': 'P'}, '2024-03-11 08:00')
+
+    recarregado = pim.SistemaAcademico(getattr(pim, backend)())
+    assert recarregado.disciplinas['D1'].sessoes == ['2024-03-04 08:00', '2024-03-11 08:00']
+    for ra in ('R0', 'R1', 'R2'):
+        assert list(recarregado.alunos[ra].frequencias['D1']) == list(sistema.alunos[ra].frequencias['D1'])
+        assert recarregado.alunos[ra].resumo_frequencia('D1') == sistema.alunos[ra].resumo_frequencia('D1')
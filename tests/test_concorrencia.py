@@ -0,0 +1,86 @@
+# Duas instâncias (como dois processos) gravando nos mesmos dados, e a trava de escrita entre processos
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+import armazenamento
+
+
+@pytest.fixture(params=['json', 'sqlite'])
+def novo_armazenamento(request, pim, diretorio):
+    if request.param == 'sqlite':
+        return pim.ArmazenamentoSQLite
+    return pim.ArmazenamentoJSON
+
+
+def test_escritas_intercaladas_nao_se_perdem(pim, turma, novo_armazenamento):
+    primeiro = turma(pim.SistemaAcademico(novo_armazenamento()), alunos=0)
+    segundo = pim.SistemaAcademico(novo_armazenamento())
+
+    for i in range(10):
+        # Cada instância grava sem ter visto a última alteração da outra
+        sistema = primeiro if i % 2 == 0 else segundo
+        sistema.cadastrar_usuario(pim.Aluno(f'aluno{i}', '123', f'Aluno {i}', f'R{i}'))
+        assert sistema.matricular_aluno(f'R{i}', 'D1')[0] == pim.MATRICULA_CONFIRMADA
+        sistema.lancar_notas_lote('D1', [[f'R{i}', 8.0]])
+
+    for sistema in (primeiro, segundo, pim.SistemaAcademico(novo_armazenamento())):
+        sistema.atualizar()
+        assert sorted(sistema.alunos) == [f'R{i}' for i in range(10)]
+        assert all(sistema.esta_matriculado(f'R{i}', 'D1') for i in range(10))
+        assert all(sistema.alunos[f'R{i}'].notas['D1'] == [8.0] for i in range(10))
+        assert sistema.sequencia == primeiro.sequencia
+        assert sistema.indices.verificar_consistencia() == []
+
+
+def test_vaga_disputada_vai_para_uma_instancia_so(pim, turma, novo_armazenamento):
+    primeiro = turma(pim.SistemaAcademico(novo_armazenamento()), alunos=2)
+    primeiro.definir_capacidade('D1', 1)
+    segundo = pim.SistemaAcademico(novo_armazenamento())
+
+    assert primeiro.matricular_aluno('R0', 'D1')[0] == pim.MATRICULA_CONFIRMADA
+    # O segundo ainda não viu a matrícula do primeiro; a transação sincroniza antes de decidir
+    assert segundo.matricular_aluno('R1', 'D1')[0] == pim.MATRICULA_EM_ESPERA
+
+    recarregado = pim.SistemaAcademico(novo_armazenamento())
+    assert recarregado.disciplinas['D1'].alunos_ra == ['R0']
+    assert recarregado.disciplinas['D1'].lista_espera == ['R1']
+
+
+def trava_antiga(caminho, conteudo):
+    with open(caminho, 'w') as f:
+        f.write(conteudo)
+    antigo = time.time() - 3600
+    os.utime(caminho, (antigo, antigo))
+
+
+@pytest.mark.skipif(os.name == 'nt', reason="o dono da trava só é verificado pelo PID fora do Windows")
+def test_trava_antiga_de_processo_vivo_nao_e_tomada(pim, diretorio, monkeypatch):
+    sistema = pim.SistemaAcademico(pim.ArmazenamentoJSON())
+    monkeypatch.setattr(armazenamento, 'TEMPO_ESPERA_TRAVA', 0.2)
+    trava_antiga(sistema.armazenamento.trava, f'{os.getpid()}\n')
+    with pytest.raises(TimeoutError):
+        sistema.cadastrar_usuario(pim.Aluno('aluno0', '123', 'Aluno 0', 'R0'))
+    assert 'R0' not in sistema.alunos
+
+
+def test_trava_de_processo_encerrado_e_tomada(pim, diretorio):
+    sistema = pim.SistemaAcademico(pim.ArmazenamentoJSON())
+    encerrado = subprocess.Popen([sys.executable, '-c', 'pass'])
+    encerrado.wait()
+    trava_antiga(sistema.armazenamento.trava, f'{encerrado.pid}\n')
+    sistema.cadastrar_usuario(pim.Aluno('aluno0', '123', 'Aluno 0', 'R0'))
+    assert 'R0' in pim.SistemaAcademico(pim.ArmazenamentoJSON()).alunos
+    assert not os.path.exists(sistema.armazenamento.trava)
+
+
+def test_trava_mantida_por_muito_tempo_e_renovada(pim, diretorio, monkeypatch):
+    monkeypatch.setattr(armazenamento, 'TRAVA_ABANDONADA', 0.2)
+    sistema = pim.SistemaAcademico(pim.ArmazenamentoJSON())
+    outro = pim.ArmazenamentoJSON()
+    with sistema.armazenamento.transacao(sistema):
+        time.sleep(0.6) # Uma compactação demorada, três vezes o limite
+        assert not outro._trava_abandonada()
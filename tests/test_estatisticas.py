@@ -0,0 +1,75 @@
+# As versões com e sem NumPy das estatísticas de turma precisam dar o mesmo resultado
+import random
+
+import pytest
+
+pytest.importorskip('numpy')
+
+import estatisticas
+
+
+def colunas(quantidade, semente):
+    aleatorio = random.Random(semente)
+    soma_notas, qtd_notas, aulas, presencas = [], [], [], []
+    for _ in range(quantidade):
+        qtd = aleatorio.choice([0, 1, 2, 4])
+        soma_notas.append(sum(aleatorio.choice([0.0, 5.0, 6.5, 7.0, 9.75, 10.0]) for _ in range(qtd)))
+        qtd_notas.append(qtd)
+        total = aleatorio.choice([0, 4, 20, 40])
+        aulas.append(total)
+        presencas.append(aleatorio.randint(0, total))
+    return soma_notas, qtd_notas, aulas, presencas
+
+
+def comparar(com_numpy, sem_numpy):
+    assert com_numpy.keys() == sem_numpy.keys()
+    for chave, valor in com_numpy.items():
+        if isinstance(valor, float):
+            assert valor == pytest.approx(sem_numpy[chave], rel=1e-12, abs=1e-12), chave
+        else:
+            assert valor == sem_numpy[chave], chave
+
+
+@pytest.mark.parametrize('quantidade, semente', [(0, 1), (1, 2), (7, 3), (500, 4)])
+def test_estatisticas_turma_iguais_com_e_sem_numpy(monkeypatch, quantidade, semente):
+    dados = colunas(quantidade, semente)
+    com_numpy = estatisticas.calcular_estatisticas_turma(*dados)
+    monkeypatch.setattr(estatisticas, 'np', None)
+    sem_numpy = estatisticas.calcular_estatisticas_turma(*dados)
+    comparar(com_numpy, sem_numpy)
+
+
+def test_estatisticas_turma_limites_das_faixas(monkeypatch):
+    # Média 10 cai na última faixa; frequência exatamente no mínimo aprova; sem aulas = 100%
+    dados = ([10.0, 7.0, 6.9, 0.0], [1, 1, 1, 0], [4, 4, 0, 4], [3, 4, 0, 2])
+    com_numpy = estatisticas.calcular_estatisticas_turma(*dados)
+    monkeypatch.setattr(estatisticas, 'np', None)
+    sem_numpy = estatisticas.calcular_estatisticas_turma(*dados)
+    comparar(com_numpy, sem_numpy)
+    assert sem_numpy['histograma_notas'][-1] == 1
+    assert sem_numpy['situacoes'] == {'APROVADO': 2, 'REPROVADO POR NOTA': 1, 'REPROVADO POR FALTA': 1}
+
+
+def test_simulador_politica_igual_com_e_sem_numpy(pim, diretorio, monkeypatch, capsys):
+    sistema = pim.SistemaAcademico(pim.ArmazenamentoJSON())
+    sistema.cadastrar_usuario(pim.Professor('prof', '123', 'Professor'))
+    for id_disc in ('D1', 'D2'):
+        sistema.cadastrar_disciplina(pim.Disciplina(id_disc, f'Disciplina {id_disc}', 'prof'))
+    aleatorio = random.Random(5)
+    for i in range(40):
+        ra = f'RA{i:03d}'
+        sistema.cadastrar_usuario(pim.Aluno(f'aluno{i}', '123', f'Aluno {i}', ra))
+        for id_disc in ('D1', 'D2'):
+            sistema.matricular_aluno(ra, id_disc)
+            sistema.lancar_notas_lote(id_disc, [[ra, aleatorio.choice([4.0, 6.5, 7.0, 9.0])]])
+            for dia in range(1, 5):
+                sistema.registrar_frequencia(ra, id_disc, f'2025-03-0{dia}', aleatorio.choice('PPPF'))
+
+    monkeypatch.setattr(estatisticas.SimuladorPolitica, 'caminho_informado', False)
+    com_numpy = estatisticas.SimuladorPolitica(sistema)
+    resultados = [com_numpy.comparar(6.0, 70.0), com_numpy.varrer([5.0, 7.0], [50.0, 75.0])]
+    monkeypatch.setattr(estatisticas, 'np', None)
+    sem_numpy = estatisticas.SimuladorPolitica(sistema)
+    assert [sem_numpy.comparar(6.0, 70.0), sem_numpy.varrer([5.0, 7.0], [50.0, 75.0])] == resultados
+    # O caminho em uso é informado uma única vez
+    assert capsys.readouterr().out.count('Simulação de política') == 1
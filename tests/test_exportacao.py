@@ -0,0 +1,43 @@
+# Filtros de período na exportação de frequências
+import csv
+
+import pytest
+
+from exportacao import exportar_em_fluxo
+
+
+@pytest.fixture
+def sistema(pim, diretorio, turma):
+    sistema = turma(pim.SistemaAcademico(pim.ArmazenamentoJSON()), alunos=2)
+    for ra in ('R0', 'R1'):
+        sistema.matricular_aluno(ra, 'D1')
+    for data in ('2024-02-28', '2024-03-01', '2024-03-15 10:00', '31/03/2024', '2024-04-01'):
+        sistema.registrar_frequencia('R0', 'D1', data, 'P')
+    sistema.registrar_frequencia('R1', 'D1', '2024-03-15 10:00', 'F')
+    return sistema
+
+
+def exportadas(caminho):
+    with open(caminho, encoding='utf-8', newline='') as f:
+        return sorted((linha['ra'], linha['data']) for linha in csv.DictReader(f, delimiter=';'))
+
+
+def test_exportacao_sem_periodo_traz_tudo(sistema, diretorio):
+    assert exportar_em_fluxo(sistema, 'frequencias', 'frequencias.csv')
+    assert len(exportadas('frequencias.csv')) == 6
+
+
+def test_exportacao_filtra_o_periodo(sistema, diretorio):
+    # 'ate' só com a data inclui o próprio dia; datas em DD/MM/AAAA também são interpretadas
+    assert exportar_em_fluxo(sistema, 'frequencias', 'marco.csv', desde='2024-03-01', ate='31/03/2024')
+    assert exportadas('marco.csv') == [('R0', '2024-03-01'), ('R0', '2024-03-15 10:00'), ('R0', '31/03/2024'),
+                                       ('R1', '2024-03-15 10:00')]
+
+    assert exportar_em_fluxo(sistema, 'frequencias', 'depois.csv', desde='2024-03-15 10:00', ras=['R0'])
+    assert exportadas('depois.csv') == [('R0', '2024-03-15 10:00'), ('R0', '2024-04-01'), ('R0', '31/03/2024')]
+
+
+def test_exportacao_recusa_data_invalida(sistema, diretorio, capsys):
+    assert not exportar_em_fluxo(sistema, 'frequencias', 'invalida.csv', ate='2024-13-01')
+    assert "Data inválida: '2024-13-01'" in capsys.readouterr().out
+    assert not (diretorio / 'invalida.csv').exists()
@@ -0,0 +1,63 @@
+# Armazenamento fragmentado: ida e volta com o JSON, gravação só dos fragmentos alterados e falhas
+import errno
+import os
+
+import pytest
+
+import armazenamento
+
+
+def estado(sistema):
+    # Os fragmentos agrupam as entidades pelo crc32 da chave: a ordem dos dicionários muda, o conteúdo não
+    return {chave: sorted(valor, key=repr) if isinstance(valor, list) else valor
+            for chave, valor in sistema.armazenamento.estado_compacto(sistema).items()}
+
+
+def test_conversao_preserva_os_dados(pim, diretorio, povoar):
+    origem = povoar(pim.SistemaAcademico(pim.ArmazenamentoJSON()))
+    assert pim.converter_snapshot(pim.ArmazenamentoJSON(), pim.ArmazenamentoFragmentado())
+
+    fragmentado = pim.SistemaAcademico(pim.ArmazenamentoFragmentado())
+    assert estado(fragmentado) == estado(origem)
+    assert fragmentado.historico_escolar('R1') == origem.historico_escolar('R1')
+
+
+def test_salvar_regrava_so_os_fragmentos_alterados(pim, diretorio, povoar):
+    sistema = povoar(pim.SistemaAcademico(pim.ArmazenamentoFragmentado()))
+    sistema.salvar_dados()
+    armazenamento_ = sistema.armazenamento
+    antes = armazenamento_.ler_manifesto()
+
+    sistema.lancar_notas_lote('D1', [['R3', 4.5]])
+    sistema.salvar_dados()
+    depois = armazenamento_.ler_manifesto()
+    alterados = {nome for nome, arquivo in depois['fragmentos'].items() if antes['fragmentos'][nome] != arquivo}
+    assert alterados == {armazenamento_.fragmento('alunos', 'R3')}
+    assert depois['geracao'] == antes['geracao'] + 1
+
+    recarregado = pim.SistemaAcademico(pim.ArmazenamentoFragmentado())
+    assert recarregado.alunos['R3'].notas['D1'] == [4.5]
+    assert recarregado.indices.verificar_consistencia() == []
+
+
+def test_falha_ao_gravar_fragmentos_sobe_e_mantem_o_journal(pim, diretorio, povoar, monkeypatch):
+    sistema = povoar(pim.SistemaAcademico(pim.ArmazenamentoFragmentado()))
+    manifesto = sistema.armazenamento.arquivo
+    journal = sistema.armazenamento.journal
+    tamanho = os.path.getsize(journal)
+    substituir = os.replace
+    def substituir_com_falha(origem, destino):
+        if destino == manifesto:
+            raise OSError(errno.ENOSPC, 'No space left on device')
+        return substituir(origem, destino)
+    with monkeypatch.context() as trocas:
+        trocas.setattr(armazenamento.os, 'replace', substituir_com_falha)
+        with pytest.raises(OSError):
+            sistema.salvar_dados()
+    assert os.path.getsize(journal) == tamanho
+
+    # Os fragmentos ainda sujos são regravados na próxima vez
+    sistema.salvar_dados()
+    assert os.path.getsize(journal) == 0
+    recarregado = pim.SistemaAcademico(pim.ArmazenamentoFragmentado())
+    assert estado(recarregado) == estado(sistema)
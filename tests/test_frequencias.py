@@ -0,0 +1,76 @@
+# Frequências compactas: uma marca por aula, alinhada à tabela de aulas da disciplina
+import json
+
+from entidades import FrequenciasCompactas
+
+
+def test_remarcar_a_mesma_aula_troca_a_marca(pim, diretorio, turma):
+    sistema = turma(pim.SistemaAcademico(pim.ArmazenamentoJSON()), alunos=2)
+    sistema.matricular_aluno('R0', 'D1')
+    sistema.matricular_aluno('R1', 'D1')
+    sistema.registrar_frequencia('R0', 'D1', '2024-03-04 08:00', 'P')
+    sistema.registrar_frequencia('R0', 'D1', '2024-03-11 08:00', 'F')
+    sistema.registrar_frequencia('R1', 'D1', '2024-03-11 08:00', 'P')
+    sistema.registrar_frequencia('R0', 'D1', '2024-03-04 08:00', 'F')
+
+    assert sistema.disciplinas['D1'].sessoes == ['2024-03-04 08:00', '2024-03-11 08:00']
+    assert list(sistema.alunos['R0'].frequencias['D1']) == [
+        {'data': '2024-03-04 08:00', 'tipo': 'F'}, {'data': '2024-03-11 08:00', 'tipo': 'F'}]
+    # R1 entrou na turma a partir da segunda aula
+    assert sistema.alunos['R1'].frequencias.para_json() == {'D1': {'inicio': 1, 'marcas': 'P'}}
+    assert sistema.alunos['R0'].resumo_frequencia('D1') == (2, 0)
+    assert sistema.alunos['R1'].resumo_frequencia('D1') == (1, 1)
+
+
+def test_ida_e_volta_pelo_snapshot(pim, diretorio, povoar):
+    sistema = povoar(pim.SistemaAcademico(pim.ArmazenamentoJSON()))
+    sistema.salvar_dados()
+    with open(sistema.armazenamento.arquivo, encoding='utf-8') as f:
+        dados = json.load(f)
+    assert dados['alunos']['R3']['frequencias'] == {'D1': {'inicio': 0, 'marcas': 'P.F'}}
+    assert dados['disciplinas']['D1']['sessoes'] == ['2024-03-04 08:00:00', '2024-03-11 08:00:00', '2024-03-01 08:00:00']
+
+    recarregado = pim.SistemaAcademico(pim.ArmazenamentoJSON())
+    for ra, aluno in sistema.alunos.items():
+        assert list(recarregado.alunos[ra].frequencias['D1']) == list(aluno.frequencias['D1'])
+        assert recarregado.alunos[ra].agregados == aluno.agregados
+
+
+def test_formato_antigo_e_convertido_na_carga(pim, diretorio, turma):
+    sistema = turma(pim.SistemaAcademico(pim.ArmazenamentoJSON()), alunos=2)
+    sistema.matricular_aluno('R0', 'D1')
+    sistema.matricular_aluno('R1', 'D1')
+    sistema.salvar_dados()
+    arquivo = sistema.armazenamento.arquivo
+    with open(arquivo, encoding='utf-8') as f:
+        dados = json.load(f)
+    # Arquivo anterior às frequências compactas: listas de {'data', 'tipo'} e nenhuma tabela de aulas
+    dados['alunos']['R0']['frequencias'] = {'D1': [{'data': '2024-03-04', 'tipo': 'P'}, {'data': '2024-03-11', 'tipo': 'F'}]}
+    dados['alunos']['R1']['frequencias'] = {'D1': [{'data': '2024-03-11', 'tipo': 'P'}]}
+    for aluno in dados['alunos'].values():
+        del aluno['agregados']
+    del dados['disciplinas']['D1']['sessoes']
+    with open(arquivo, 'w', encoding='utf-8') as f:
+        json.dump(dados, f)
+
+    antigo = pim.SistemaAcademico(pim.ArmazenamentoJSON())
+    assert antigo.disciplinas['D1'].sessoes == ['2024-03-04', '2024-03-11']
+    assert antigo.alunos['R1'].frequencias.para_json() == {'D1': {'inicio': 1, 'marcas': 'P'}}
+    assert antigo.alunos['R0'].resumo_frequencia('D1') == (2, 1)
+    assert list(antigo.alunos['R0'].frequencias['D1']) == dados['alunos']['R0']['frequencias']['D1']
+
+    antigo.salvar_dados()
+    with open(arquivo, encoding='utf-8') as f:
+        assert json.load(f)['alunos']['R0']['frequencias'] == {'D1': {'inicio': 0, 'marcas': 'PF'}}
+
+
+def test_frequencias_compactas_aceitam_aula_anterior_ao_inicio():
+    frequencias = FrequenciasCompactas()
+    sessoes = ['a', 'b', 'c', 'd']
+    frequencias.vincular(lambda id_disc: sessoes, None)
+    assert frequencias.registrar('D1', 2, 'P') == ord('.')
+    assert frequencias.registrar('D1', 0, 'F') == ord('.')
+    assert frequencias.registrar('D1', 2, 'F') == ord('P')
+    assert frequencias.para_json() == {'D1': {'inicio': 0, 'marcas': 'F.F'}}
+    assert [f['data'] for f in frequencias['D1']] == ['a', 'c']
+    assert frequencias.contagem('D1') == (2, 0)
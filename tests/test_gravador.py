@@ -0,0 +1,65 @@
+# Gravador em segundo plano: pedidos dentro da janela viram uma gravação, fora do caminho das operações
+import os
+
+import armazenamento
+
+
+def sistema_com_gravador(pim, turma, janela):
+    sistema = turma(pim.SistemaAcademico(pim.ArmazenamentoJSON()), alunos=3)
+    sistema.salvar_dados()
+    sistema.iniciar_gravador(janela)
+    return sistema
+
+
+def tamanho_journal(sistema):
+    return os.path.getsize(sistema.armazenamento.journal)
+
+
+def test_pedidos_na_janela_viram_uma_gravacao(pim, diretorio, turma):
+    sistema = sistema_com_gravador(pim, turma, janela=0.2)
+    for i in range(3):
+        sistema.matricular_aluno(f'R{i}', 'D1')
+        sistema.agendar_gravacao()
+    assert sistema.gravador.gravacoes == 0 and tamanho_journal(sistema) > 0
+
+    sistema.gravador.flush()
+    assert sistema.gravador.gravacoes == 1
+    assert tamanho_journal(sistema) == 0
+    assert sorted(pim.SistemaAcademico(pim.ArmazenamentoJSON()).disciplinas['D1'].alunos_ra) == ['R0', 'R1', 'R2']
+    sistema.gravador.encerrar()
+    assert not sistema.gravador.thread.is_alive()
+
+
+def test_compactacao_do_journal_vai_para_o_gravador(pim, diretorio, turma, monkeypatch):
+    monkeypatch.setattr(armazenamento, 'LIMITE_JOURNAL', 2)
+    monkeypatch.setattr(armazenamento, 'PROPORCAO_JOURNAL', 0)
+    sistema = sistema_com_gravador(pim, turma, janela=30)
+    for i in range(3):
+        sistema.matricular_aluno(f'R{i}', 'D1')
+    # A janela ainda não passou: a operação não esperou a reescrita do snapshot
+    assert sistema.gravador.pendente and sistema.gravador.gravacoes == 0
+    assert tamanho_journal(sistema) > 0
+
+    sistema.encerrar()
+    assert sistema.gravador.gravacoes == 1 and not sistema.gravador.thread.is_alive()
+    assert tamanho_journal(sistema) == 0
+
+
+def test_falha_em_segundo_plano_mantem_o_journal(pim, diretorio, turma, monkeypatch, capsys):
+    sistema = sistema_com_gravador(pim, turma, janela=0)
+    sistema.matricular_aluno('R0', 'D1')
+    def falhar():
+        raise OSError(28, 'No space left on device')
+    with monkeypatch.context() as trocas:
+        trocas.setattr(sistema, 'salvar_dados', falhar)
+        sistema.agendar_gravacao()
+        sistema.gravador.flush()
+    assert 'Falha na gravação em segundo plano' in capsys.readouterr().out
+    assert tamanho_journal(sistema) > 0
+
+    # O próximo pedido grava normalmente e o estado recarregado tem a matrícula
+    sistema.agendar_gravacao()
+    sistema.gravador.flush()
+    assert tamanho_journal(sistema) == 0
+    assert pim.SistemaAcademico(pim.ArmazenamentoJSON()).esta_matriculado('R0', 'D1')
+    sistema.gravador.encerrar()
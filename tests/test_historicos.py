@@ -0,0 +1,42 @@
+# Exportação dos Históricos Escolares em lotes, pelos processos do pool
+import csv
+import json
+
+from configuracao import ARQUIVO_PROGRESSO_EXPORTACAO
+from exportacao import exportar_historicos, nome_arquivo_historico
+
+
+def test_exportacao_confere_com_o_historico_do_sistema(pim, diretorio, povoar):
+    sistema = povoar(pim.SistemaAcademico(pim.ArmazenamentoJSON()))
+    sistema.cadastrar_usuario(pim.Aluno('sem', '123', 'Sem Matrícula', 'R9'))
+    assert exportar_historicos(sistema, 'historicos', processos=2, tamanho_lote=2)
+
+    for ra in sistema.alunos:
+        with open(diretorio / 'historicos' / f'{ra}.json', encoding='utf-8') as f:
+            assert json.load(f) == sistema.historico_escolar(ra)
+    texto = (diretorio / 'historicos' / 'R1.txt').read_text(encoding='utf-8')
+    assert texto.startswith("--- Histórico Escolar de Aluno Um (RA: R1) ---") and 'Banco de Dados' in texto
+    with open(diretorio / 'historicos' / 'indice.csv', encoding='utf-8', newline='') as f:
+        indice = list(csv.reader(f, delimiter=';'))
+    assert [linha[0] for linha in indice[1:]] == list(sistema.alunos)
+    assert not (diretorio / 'historicos' / ARQUIVO_PROGRESSO_EXPORTACAO).exists()
+
+
+def test_nome_de_arquivo_e_unico_por_ra():
+    ras = ['2025000124', 'A/1', 'A_1', 'A?1', 'A_3f_1', 'A 1', 'A-1', 'José']
+    nomes = [nome_arquivo_historico(ra) for ra in ras]
+    assert len(set(nomes)) == len(ras)
+    assert nomes[0] == '2025000124' and nomes[-1] == 'José'
+    assert all(c.isalnum() or c in '-_' for nome in nomes for c in nome)
+
+
+def test_ras_que_colidiam_geram_arquivos_separados(pim, diretorio, turma):
+    sistema = turma(pim.SistemaAcademico(pim.ArmazenamentoJSON()), alunos=0)
+    for ra in ('A/1', 'A_1', 'A?1'):
+        sistema.cadastrar_usuario(pim.Aluno(f'login{ra}', '123', f'Aluno {ra}', ra))
+    assert exportar_historicos(sistema, 'historicos', formatos=['json'], processos=1)
+    arquivos = sorted(p.name for p in (diretorio / 'historicos').glob('*.json'))
+    assert len(arquivos) == 3
+    for ra in ('A/1', 'A_1', 'A?1'):
+        with open(diretorio / 'historicos' / f'{nome_arquivo_historico(ra)}.json', encoding='utf-8') as f:
+            assert json.load(f)['ra'] == ra
@@ -0,0 +1,132 @@
+# Journal do armazenamento JSON: replay depois de uma queda e falhas de gravação
+import errno
+import os
+
+import pytest
+
+import armazenamento
+
+
+def recarregar(pim):
+    return pim.SistemaAcademico(pim.ArmazenamentoJSON())
+
+
+def test_replay_ignora_ultima_linha_truncada(pim, diretorio, turma):
+    sistema = turma(pim.SistemaAcademico(pim.ArmazenamentoJSON()))
+    sistema.matricular_aluno('R0', 'D1')
+    sequencia = sistema.sequencia
+    # Queda no meio da escrita: o último registro ficou pela metade e sem a quebra de linha
+    with open(sistema.armazenamento.journal, 'ab') as f:
+        f.write(b'{"op": "matricula", "ra": "R1", "disc')
+
+    recarregado = recarregar(pim)
+    assert recarregado.sequencia == sequencia
+    assert recarregado.esta_matriculado('R0', 'D1')
+    assert not recarregado.esta_matriculado('R1', 'D1')
+
+    # O próximo registro não é colado ao resto da linha interrompida
+    recarregado.matricular_aluno('R2', 'D1')
+    final = recarregar(pim)
+    assert final.sequencia == sequencia + 1
+    assert final.esta_matriculado('R2', 'D1')
+    assert final.indices.verificar_consistencia() == []
+
+
+class JournalSemEspaco:
+    # Arquivo do journal que aceita só o começo da escrita e depois falha (disco cheio)
+    def __init__(self, arquivo):
+        self.arquivo = arquivo
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.arquivo.close()
+
+    def tell(self):
+        return self.arquivo.tell()
+
+    def truncate(self, tamanho):
+        return self.arquivo.truncate(tamanho)
+
+    def write(self, dados):
+        self.arquivo.write(bytes(dados[:5]))
+        raise OSError(errno.ENOSPC, 'No space left on device')
+
+
+def test_falha_ao_gravar_journal_nao_confirma_a_alteracao(pim, diretorio, turma, monkeypatch):
+    sistema = turma(pim.SistemaAcademico(pim.ArmazenamentoJSON()))
+    journal = sistema.armazenamento.journal
+    sequencia, tamanho = sistema.sequencia, os.path.getsize(journal)
+
+    abrir = open
+    def abrir_journal(caminho, modo='r', *args, **kwargs):
+        arquivo = abrir(caminho, modo, *args, **kwargs)
+        return JournalSemEspaco(arquivo) if caminho == journal and modo.startswith('a') else arquivo
+    with monkeypatch.context() as trocas:
+        trocas.setattr(armazenamento, 'open', abrir_journal, raising=False)
+        with pytest.raises(OSError):
+            sistema.matricular_aluno('R0', 'D1')
+
+    # Nada da operação fica em memória nem no journal
+    assert sistema.sequencia == sequencia
+    assert not sistema.esta_matriculado('R0', 'D1')
+    assert 'D1' not in sistema.alunos['R0'].cursos
+    assert os.path.getsize(journal) == tamanho
+
+    sistema.matricular_aluno('R1', 'D1')
+    recarregado = recarregar(pim)
+    assert recarregado.sequencia == sequencia + 1
+    assert not recarregado.esta_matriculado('R0', 'D1')
+    assert recarregado.esta_matriculado('R1', 'D1')
+
+
+def falhar_ao_substituir(monkeypatch, caminho):
+    # os.replace falha (disco cheio) só para o arquivo pedido
+    substituir = os.replace
+    def substituir_com_falha(origem, destino):
+        if destino == caminho:
+            raise OSError(errno.ENOSPC, 'No space left on device')
+        return substituir(origem, destino)
+    monkeypatch.setattr(armazenamento.os, 'replace', substituir_com_falha)
+
+
+def test_falha_ao_gravar_snapshot_sobe_e_mantem_o_journal(pim, diretorio, turma, monkeypatch):
+    sistema = turma(pim.SistemaAcademico(pim.ArmazenamentoJSON()))
+    sistema.matricular_aluno('R0', 'D1')
+    journal = sistema.armazenamento.journal
+    tamanho = os.path.getsize(journal)
+    with monkeypatch.context() as trocas:
+        falhar_ao_substituir(trocas, sistema.armazenamento.arquivo)
+        with pytest.raises(OSError):
+            sistema.salvar_dados()
+    assert os.path.getsize(journal) == tamanho
+    assert recarregar(pim).esta_matriculado('R0', 'D1')
+
+
+def test_falha_ao_gravar_indice_realinha_o_modo_preguicoso(pim, diretorio, turma, monkeypatch):
+    turma(pim.SistemaAcademico(pim.ArmazenamentoJSON()))
+    sistema = pim.SistemaAcademico(pim.ArmazenamentoJSON(preguicoso=True))
+    # Um professor novo desloca as posições de todos os alunos no snapshot
+    sistema.cadastrar_usuario(pim.Professor('prof_novo', '123', 'Professor Novo'))
+    sistema.cadastrar_usuario(pim.Aluno('aluno_novo', '123', 'Aluno Novo com nome comprido', 'R9'))
+    with monkeypatch.context() as trocas:
+        # O snapshot novo entra no lugar, mas o índice não: os alunos são lidos pelas posições novas
+        falhar_ao_substituir(trocas, sistema.armazenamento.indice)
+        with pytest.raises(OSError):
+            sistema.salvar_dados()
+    assert [sistema.alunos[ra].nome for ra in ('R0', 'R1', 'R2', 'R9')] == [
+        'Aluno 0', 'Aluno 1', 'Aluno 2', 'Aluno Novo com nome comprido']
+
+
+def test_compactacao_que_falha_nao_desfaz_a_operacao(pim, diretorio, turma, monkeypatch, capsys):
+    sistema = turma(pim.SistemaAcademico(pim.ArmazenamentoJSON()))
+    monkeypatch.setattr(armazenamento, 'LIMITE_JOURNAL', 1)
+    falhar_ao_substituir(monkeypatch, sistema.armazenamento.arquivo)
+    assert sistema.matricular_aluno('R0', 'D1')[0] == pim.MATRICULA_CONFIRMADA
+    assert 'Compactação do journal adiada' in capsys.readouterr().out
+    assert sistema.esta_matriculado('R0', 'D1')
+    monkeypatch.undo()
+    assert pim.SistemaAcademico(pim.ArmazenamentoJSON(str(diretorio / 'sistema_academico_dados.json'),
+                                                      str(diretorio / 'sistema_academico_dados.journal'))
+                                ).esta_matriculado('R0', 'D1')
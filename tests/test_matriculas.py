@@ -0,0 +1,81 @@
+# Capacidade das turmas e lista de espera
+import json
+
+import pytest
+
+
+def test_cancelamento_promove_o_primeiro_da_lista_de_espera(pim, diretorio, turma):
+    sistema = turma(pim.SistemaAcademico(pim.ArmazenamentoJSON()), alunos=4)
+    assert sistema.definir_capacidade('D1', 2)[0]
+    situacoes = [sistema.matricular_aluno(f'R{i}', 'D1')[0] for i in range(4)]
+    assert situacoes == [pim.MATRICULA_CONFIRMADA] * 2 + [pim.MATRICULA_EM_ESPERA] * 2
+
+    ok, mensagem = sistema.cancelar_matricula('R0', 'D1')
+    assert ok and 'R2' in mensagem
+    assert sistema.esta_matriculado('R2', 'D1')
+    assert 'D1' in sistema.alunos['R2'].cursos
+    assert sistema.disciplinas['D1'].lista_espera == ['R3']
+
+    # Sair da lista de espera não libera vaga para ninguém
+    assert sistema.cancelar_matricula('R3', 'D1') == (True, "Aluno retirado da lista de espera.")
+    assert sistema.disciplinas['D1'].lista_espera == []
+
+    # A promoção foi gravada junto com o cancelamento
+    recarregado = pim.SistemaAcademico(pim.ArmazenamentoJSON())
+    assert sorted(recarregado.disciplinas['D1'].alunos_ra) == ['R1', 'R2']
+    assert recarregado.disciplinas['D1'].lista_espera == []
+    assert not recarregado.esta_matriculado('R0', 'D1')
+    assert recarregado.indices.verificar_consistencia() == []
+
+
+def test_aumentar_capacidade_promove_em_ordem(pim, diretorio, turma):
+    sistema = turma(pim.SistemaAcademico(pim.ArmazenamentoJSON()), alunos=4)
+    sistema.definir_capacidade('D1', 1)
+    for i in range(4):
+        sistema.matricular_aluno(f'R{i}', 'D1')
+    assert sistema.disciplinas['D1'].lista_espera == ['R1', 'R2', 'R3']
+
+    ok, mensagem = sistema.definir_capacidade('D1', 3)
+    assert ok and '2 aluno(s) promovido(s)' in mensagem
+    assert sistema.disciplinas['D1'].alunos_ra == ['R0', 'R1', 'R2']
+    assert sistema.disciplinas['D1'].lista_espera == ['R3']
+
+
+@pytest.mark.parametrize('backend', ['ArmazenamentoJSON', 'ArmazenamentoBinario', 'ArmazenamentoSQLite'])
+def test_saida_do_meio_da_fila_preserva_a_ordem(pim, diretorio, turma, backend):
+    sistema = turma(pim.SistemaAcademico(getattr(pim, backend)()), alunos=5)
+    sistema.definir_capacidade('D1', 1)
+    for i in range(5):
+        sistema.matricular_aluno(f'R{i}', 'D1')
+    assert sistema.matricular_aluno('R3', 'D1')[1] == "Aluno já está na lista de espera (posição 3)."
+
+    sistema.cancelar_matricula('R2', 'D1')
+    sistema.cancelar_matricula('R0', 'D1')
+    assert sistema.disciplinas['D1'].alunos_ra == ['R1']
+    assert sistema.disciplinas['D1'].lista_espera == ['R3', 'R4']
+    sistema.salvar_dados()
+
+    recarregado = pim.SistemaAcademico(getattr(pim, backend)())
+    assert recarregado.disciplinas['D1'].alunos_ra == ['R1']
+    assert recarregado.disciplinas['D1'].lista_espera == ['R3', 'R4']
+    assert recarregado.indices.verificar_consistencia() == []
+
+
+def test_snapshot_json_grava_as_turmas_como_listas(pim, diretorio, turma):
+    sistema = turma(pim.SistemaAcademico(pim.ArmazenamentoJSON()), alunos=2)
+    sistema.matricular_aluno('R1', 'D1')
+    sistema.matricular_aluno('R0', 'D1')
+    sistema.salvar_dados()
+    with open(sistema.armazenamento.arquivo, encoding='utf-8') as f:
+        disciplina = json.load(f)['disciplinas']['D1']
+    assert disciplina['alunos_ra'] == ['R1', 'R0'] and disciplina['lista_espera'] == []
+
+
+def test_permissao_do_professor_pelo_indice(pim, diretorio, turma):
+    sistema = turma(pim.SistemaAcademico(pim.ArmazenamentoJSON()), alunos=1)
+    assert sistema.ministra('prof', 'D1') and not sistema.ministra('prof', 'D2')
+    sistema.cadastrar_disciplina(pim.Disciplina('D2', 'Disciplina 2', 'prof'))
+    assert sistema.ministra('prof', 'D2')
+    assert sistema.disciplinas_do_professor('prof') == ['D1', 'D2']
+    assert not sistema.ministra('secretaria1', 'D1') and sistema.disciplinas_do_professor('ninguem') == []
+    assert sistema.indices.verificar_consistencia() == []
@@ -0,0 +1,55 @@
+# Lançamento de notas da turma em lote: validação linha a linha e um único registro gravado
+import pytest
+
+
+def linhas_journal(sistema):
+    with open(sistema.armazenamento.journal, encoding='utf-8') as f:
+        return f.read().splitlines()
+
+
+def test_lote_valida_cada_linha_e_grava_um_registro(pim, diretorio, turma):
+    sistema = turma(pim.SistemaAcademico(pim.ArmazenamentoJSON()), alunos=3)
+    sistema.matricular_aluno('R0', 'D1')
+    sistema.matricular_aluno('R1', 'D1')
+    antes, sequencia = len(linhas_journal(sistema)), sistema.sequencia
+
+    lancadas, erros = sistema.lancar_notas_lote('D1', [
+        ['R0', '8,5', 'P1'],
+        ['R1', 6],
+        ['R2', 7],         # não matriculado
+        ['R0', 'dez'],
+        ['R1', 10.5],
+        ['R0'],
+        [' R0 ', 9.5, ' P2 '],
+    ])
+    assert lancadas == 3
+    assert [numero for numero, _ in erros] == [3, 4, 5, 6]
+    assert "Nota inválida: 'dez'." in dict(erros)[4]
+
+    assert sistema.sequencia == sequencia + 1
+    assert len(linhas_journal(sistema)) == antes + 1
+    aluno = sistema.alunos['R0']
+    assert aluno.notas['D1'] == [8.5, 9.5] and aluno.avaliacoes['D1'] == ['P1', 'P2']
+    assert aluno.calcular_media('D1') == 9.0
+    assert sistema.alunos['R1'].notas['D1'] == [6.0]
+
+
+def test_lote_sem_linhas_validas_nao_grava(pim, diretorio, turma):
+    sistema = turma(pim.SistemaAcademico(pim.ArmazenamentoJSON()), alunos=1)
+    sequencia = sistema.sequencia
+    assert sistema.lancar_notas_lote('D9', [['R0', 5]]) == (0, [(0, "Disciplina não encontrada.")])
+    assert sistema.lancar_notas_lote('D1', [['R0', 5]])[0] == 0
+    assert sistema.sequencia == sequencia
+
+
+@pytest.mark.parametrize('backend', ['ArmazenamentoJSON', 'ArmazenamentoSQLite'])
+def test_lote_sobrevive_a_recarga(pim, diretorio, turma, backend):
+    sistema = turma(pim.SistemaAcademico(getattr(pim, backend)()), alunos=2)
+    sistema.matricular_aluno('R0', 'D1')
+    sistema.matricular_aluno('R1', 'D1')
+    sistema.lancar_notas_lote('D1', [['R0', 4, 'P1'], ['R1', 7], ['R0', 6, 'P2']])
+
+    recarregado = pim.SistemaAcademico(getattr(pim, backend)())
+    assert recarregado.alunos['R0'].notas['D1'] == [4.0, 6.0]
+    assert recarregado.alunos['R0'].avaliacoes['D1'] == ['P1', 'P2']
+    assert recarregado.historico_escolar('R1') == sistema.historico_escolar('R1')
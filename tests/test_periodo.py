@@ -0,0 +1,54 @@
+# Consultas de aulas e faltas por período, pelo índice de aulas ordenado por data
+from datetime import datetime, timedelta
+
+
+def test_aulas_do_periodo_em_ordem_cronologica(pim, diretorio, povoar):
+    sistema = povoar(pim.SistemaAcademico(pim.ArmazenamentoJSON()))
+    sistema.registrar_frequencia_lote('D2', {'R0': 'F', 'R1': 'P'}, '05/03/2024 10:00')
+
+    aulas = sistema.aulas_no_periodo('2024-03-01', '2024-03-11')
+    assert [(momento.isoformat(' '), id_disc) for momento, id_disc, _ in aulas] == [
+        ('2024-03-01 08:00:00', 'D1'), ('2024-03-04 08:00:00', 'D1'), ('2024-03-05 10:00:00', 'D2'),
+        ('2024-03-11 08:00:00', 'D1')]
+    # Com hora, o fim não é incluído; 'desde' é incluído
+    assert len(sistema.aulas_no_periodo('2024-03-04 08:00', '2024-03-11 08:00')) == 2
+    assert [id_disc for _, id_disc, _ in sistema.aulas_no_periodo('2024-03-01', '2024-03-31', 'D2')] == ['D2']
+    # O índice devolve a posição da aula na tabela da disciplina
+    momento, id_disc, indice = aulas[0]
+    assert sistema.disciplinas[id_disc].sessoes[indice] == '2024-03-01 08:00:00'
+
+
+def test_faltas_por_aluno_no_periodo(pim, diretorio, povoar):
+    sistema = povoar(pim.SistemaAcademico(pim.ArmazenamentoJSON()))
+    faltas = sistema.faltas_por_aluno('2024-03-01', '2024-03-31')
+    assert {ra: [m.day for m, _ in lista] for ra, lista in faltas.items()} == {'R1': [4], 'R2': [11], 'R3': [1]}
+    assert sistema.faltas_por_aluno('2024-03-05', '2024-03-31') == {'R2': [(datetime(2024, 3, 11, 8), 'D1')]}
+    presencas = sistema.frequencias_no_periodo('2024-03-11', '2024-03-11', tipo='P')
+    assert [(ra, tipo) for _, _, ra, tipo in presencas] == [('R0', 'P'), ('R1', 'P')]
+
+
+def test_indice_acompanha_as_aulas_novas(pim, diretorio, turma):
+    sistema = turma(pim.SistemaAcademico(pim.ArmazenamentoJSON()), alunos=1)
+    sistema.matricular_aluno('R0', 'D1')
+    hoje = datetime.now().replace(microsecond=0)
+    assert sistema.aulas_no_periodo() == []
+
+    sistema.registrar_frequencia_lote('D1', {'R0': 'F'}, (hoje - timedelta(days=30)).isoformat(' '))
+    sistema.registrar_frequencia_lote('D1', {'R0': 'F'}, (hoje - timedelta(days=2)).isoformat(' '))
+    # Sem 'desde': os últimos 7 dias
+    assert [momento for momento, _, _ in sistema.aulas_no_periodo()] == [hoje - timedelta(days=2)]
+    assert list(sistema.faltas_por_aluno()) == ['R0']
+
+    # Disciplina recadastrada: as aulas da versão anterior saem do índice
+    sistema.cadastrar_disciplina(pim.Disciplina('D1', 'Algoritmos II', 'prof'))
+    assert sistema.aulas_no_periodo(desde='2000-01-01') == []
+    assert sistema.indices.verificar_consistencia() == []
+
+
+def test_aulas_sem_data_reconhecivel_ficam_fora(pim, diretorio, turma):
+    sistema = turma(pim.SistemaAcademico(pim.ArmazenamentoJSON()), alunos=1)
+    # Dados antigos podem ter datas em formato livre na tabela de aulas
+    sistema.disciplinas['D1'].sessoes.extend(['aula 1', '2024-03-04'])
+    indice = sistema.indices.indice_aulas()
+    assert indice.sem_data == [('D1', 0, 'aula 1')]
+    assert [i for _, _, i in sistema.aulas_no_periodo('2024-01-01', '2024-12-31')] == [1]
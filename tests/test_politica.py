@@ -0,0 +1,27 @@
+# Faixas de limites da varredura de políticas de aprovação (menu do administrador)
+import pytest
+
+
+def ler_faixa(pim, monkeypatch, entrada):
+    monkeypatch.setattr(pim, 'input', lambda texto: entrada, raising=False)
+    return pim.ler_faixa("Faixa", "5:8:0.5")
+
+
+def test_faixa_inclui_o_fim_sem_acumular_erro(pim, monkeypatch):
+    assert ler_faixa(pim, monkeypatch, '') == [5.0, 5.5, 6.0, 6.5, 7.0, 7.5, 8.0]
+    assert ler_faixa(pim, monkeypatch, '0:1:0,1') == [round(i / 10, 4) for i in range(11)]
+    assert ler_faixa(pim, monkeypatch, '7:7:1') == [7.0]
+
+
+@pytest.mark.parametrize('entrada, mensagem', [
+    ('5:8:0', 'passo'),
+    ('5:8:-0.5', 'passo'),
+    ('8:5:1', 'início'),
+    ('0:100:0.001', 'máximo'),
+    ('5:inf:1', 'finitos'),
+    ('5:8', None),
+    ('a:b:c', None),
+])
+def test_faixa_invalida_e_recusada(pim, monkeypatch, entrada, mensagem):
+    with pytest.raises(ValueError, match=mensagem):
+        ler_faixa(pim, monkeypatch, entrada)
@@ -0,0 +1,59 @@
+# Armazenamento JSON preguiçoso: os alunos são hidratados do snapshot (pelo índice .idx) só quando acessados
+import os
+
+import armazenamento
+
+
+def abrir(pim):
+    return pim.SistemaAcademico(pim.ArmazenamentoJSON(preguicoso=True))
+
+
+def estado(sistema):
+    return sistema.armazenamento.estado_compacto(sistema)
+
+
+def test_partida_nao_hidrata_alunos(pim, diretorio, povoar):
+    completo = povoar(pim.SistemaAcademico(pim.ArmazenamentoJSON()))
+    completo.salvar_dados()
+
+    sistema = abrir(pim)
+    assert isinstance(sistema.alunos, armazenamento.MapaPreguicoso)
+    assert dict(sistema.alunos.carregados()) == {}
+    assert len(sistema.alunos) == 4 and 'R3' in sistema.alunos and 'R9' not in sistema.alunos
+    # Busca e listagem de nomes saem do índice
+    assert [a.ra for a in sistema.buscar('aluno', 'aluno um')[0]] == ['R1']
+    assert set(dict(sistema.alunos.carregados())) == {'R1'}
+
+    assert sistema.aluno_por_login('aluno2').ra == 'R2'
+    assert sistema.historico_escolar('R0') == completo.historico_escolar('R0')
+    assert set(dict(sistema.alunos.carregados())) == {'R0', 'R1', 'R2'}
+    assert estado(sistema) == estado(completo)
+
+
+def test_alteracoes_e_salvamento_sem_hidratar_os_demais(pim, diretorio, povoar):
+    povoar(pim.SistemaAcademico(pim.ArmazenamentoJSON())).salvar_dados()
+    sistema = abrir(pim)
+    sistema.lancar_nota('R2', 'D1', 6.0)
+    sistema.cadastrar_usuario(pim.Aluno('novo', '123', 'Aluno Novo', 'R7'))
+    sistema.salvar_dados()
+    assert set(dict(sistema.alunos.carregados())) == {'R2', 'R7'}
+
+    # O snapshot regravado (com os alunos não hidratados copiados do anterior) é lido igual pelos dois modos
+    completo = pim.SistemaAcademico(pim.ArmazenamentoJSON())
+    assert completo.alunos['R2'].notas['D1'] == [7.0, 6.0]
+    assert 'R7' in completo.alunos
+    assert estado(abrir(pim)) == estado(completo)
+    assert completo.indices.verificar_consistencia() == []
+
+
+def test_indice_desatualizado_carrega_completo_e_o_refaz(pim, diretorio, povoar, capsys):
+    sistema = povoar(pim.SistemaAcademico(pim.ArmazenamentoJSON()))
+    sistema.salvar_dados()
+    os.remove(sistema.armazenamento.indice)
+    capsys.readouterr()
+
+    recarregado = abrir(pim)
+    assert 'Carregando o snapshot completo' in capsys.readouterr().out
+    assert not isinstance(recarregado.alunos, armazenamento.MapaPreguicoso)
+    assert os.path.exists(recarregado.armazenamento.indice)
+    assert isinstance(abrir(pim).alunos, armazenamento.MapaPreguicoso)
@@ -0,0 +1,97 @@
+# Modo serviço: o SistemaAcademico por HTTP/JSON, com um servidor real em uma porta livre
+import http.client
+import json
+import threading
+
+import pytest
+
+from servico import criar_servidor
+
+
+@pytest.fixture
+def servidor(pim, diretorio, turma):
+    sistema = turma(pim.SistemaAcademico(pim.ArmazenamentoJSON()), alunos=2)
+    servidor = criar_servidor(sistema, porta=0)
+    thread = threading.Thread(target=servidor.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    thread.start()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def requisitar(servidor, metodo, caminho, corpo=None, token=None):
+    conexao = http.client.HTTPConnection('127.0.0.1', servidor.server_address[1], timeout=10)
+    cabecalhos = {'Authorization': f'Bearer {token}'} if token else {}
+    if corpo is not None:
+        corpo = corpo if isinstance(corpo, bytes) else json.dumps(corpo).encode('utf-8')
+        cabecalhos['Content-Type'] = 'application/json'
+    conexao.request(metodo, caminho, body=corpo, headers=cabecalhos)
+    resposta = conexao.getresponse()
+    dados = json.loads(resposta.read())
+    conexao.close()
+    return resposta.status, dados
+
+
+def entrar(servidor, login):
+    status, dados = requisitar(servidor, 'POST', '/login', {'login': login, 'senha': '123'})
+    assert status == 200
+    return dados['token']
+
+
+def test_matricula_notas_e_historico(servidor):
+    secretaria, professor = entrar(servidor, 'secretaria1'), entrar(servidor, 'prof')
+    status, dados = requisitar(servidor, 'POST', '/matricula', {'ra': 'R0', 'disciplina': 'D1'}, secretaria)
+    assert (status, dados['situacao']) == (200, 'matriculado')
+    status, dados = requisitar(servidor, 'POST', '/notas', {'disciplina': 'D1', 'notas': [['R0', 8.5]]}, professor)
+    assert (status, dados['lancadas']) == (200, 1)
+    status, dados = requisitar(servidor, 'GET', '/historico?ra=R0', token=secretaria)
+    assert status == 200 and dados['historico']['ra'] == 'R0'
+
+    assert requisitar(servidor, 'GET', '/alunos')[0] == 401
+    assert requisitar(servidor, 'POST', '/notas', {'disciplina': 'D1', 'notas': []}, secretaria)[0] == 403
+
+
+@pytest.mark.parametrize('metodo, caminho, corpo, perfil', [
+    ('POST', '/frequencias', {'disciplina': 'D1', 'presencas': 'abc'}, 'prof'),
+    ('POST', '/notas', {'disciplina': 'D1', 'notas': 5}, 'prof'),
+    ('POST', '/notas', {'disciplina': 'D1', 'notas': [5]}, 'prof'),
+    ('POST', '/login', [], None),
+    ('POST', '/login', {'login': ['admin'], 'senha': '123'}, None),
+    ('POST', '/matricula', {'ra': [1], 'disciplina': 'D1'}, 'secretaria1'),
+    ('POST', '/cancelamento', {'ra': 'R0', 'disciplina': {}}, 'secretaria1'),
+    ('POST', '/capacidade', {'disciplina': None, 'capacidade': 1}, 'secretaria1'),
+    ('POST', '/frequencias', {'disciplina': 'D1', 'presencas': {'R0': 'P'}, 'data': 'lixo'}, 'prof'),
+    ('POST', '/frequencias', {'disciplina': 'D1', 'presencas': {'R0': 'P'}, 'data': 20240301}, 'prof'),
+    ('GET', '/alunos?inicio=-5', None, 'secretaria1'),
+    ('GET', '/busca?quantidade=-1', None, 'secretaria1'),
+    ('POST', '/matricula', b'{"ra": ', 'secretaria1'),
+])
+def test_pedidos_malformados_recebem_400(servidor, metodo, caminho, corpo, perfil):
+    token = entrar(servidor, perfil) if perfil else None
+    status, dados = requisitar(servidor, metodo, caminho, corpo, token)
+    assert status == 400 and not dados['ok']
+    # O servidor continua atendendo
+    assert requisitar(servidor, 'GET', '/saude') == (200, {'ok': True})
+
+
+def test_chamada_com_data_invalida_nao_cria_aula(servidor):
+    sistema = servidor.RequestHandlerClass.servico.sistema
+    professor, secretaria = entrar(servidor, 'prof'), entrar(servidor, 'secretaria1')
+    requisitar(servidor, 'POST', '/matricula', {'ra': 'R0', 'disciplina': 'D1'}, secretaria)
+    corpo = {'disciplina': 'D1', 'presencas': {'R0': 'P'}, 'data': 'lixo'}
+    assert requisitar(servidor, 'POST', '/frequencias', corpo, professor)[0] == 400
+    corpo['data'] = '2024-03-01 08:00'
+    assert requisitar(servidor, 'POST', '/frequencias', corpo, professor)[:1] == (200,)
+    assert [r['data'] for r in sistema.alunos['R0'].frequencias['D1']] == ['2024-03-01 08:00']
+    # Pela API do sistema (sem o serviço) a data também é validada
+    assert sistema.registrar_frequencia_lote('D1', {'R0': 'F'}, 'lixo')[0] == 0
+
+
+def test_erro_inesperado_responde_500(servidor, monkeypatch, capsys):
+    def falhar(usuario, dados):
+        raise RuntimeError("falha simulada")
+    monkeypatch.setattr(servidor.RequestHandlerClass.servico, 'cancelar', falhar)
+    status, dados = requisitar(servidor, 'POST', '/cancelamento', {'ra': 'R0', 'disciplina': 'D1'},
+                               entrar(servidor, 'secretaria1'))
+    assert (status, dados['ok']) == (500, False)
+    assert 'falha simulada' in capsys.readouterr().out
@@ -0,0 +1,70 @@
+# Armazenamento SQLite: falhas do banco ao gravar
+import sqlite3
+
+import pytest
+
+from armazenamento import FalhaBanco
+
+
+class ConexaoComFalha:
+    # Repassa tudo à conexão real, mas falha no commit ou nos INSERT da tabela pedida
+    def __init__(self, conexao, commit=False, tabela=None):
+        self.conexao = conexao
+        self.falhar_commit = commit
+        self.tabela = tabela
+
+    def __getattr__(self, nome):
+        return getattr(self.conexao, nome)
+
+    def commit(self):
+        if self.falhar_commit:
+            raise sqlite3.OperationalError('database or disk is full')
+        return self.conexao.commit()
+
+    def execute(self, comando, *args):
+        if self.tabela and f'INTO {self.tabela} ' in comando:
+            raise sqlite3.OperationalError('database or disk is full')
+        return self.conexao.execute(comando, *args)
+
+
+@pytest.mark.parametrize('falha', [{'commit': True}, {'tabela': 'matriculas'}])
+def test_falha_do_banco_vira_oserror_e_descarta_a_alteracao(pim, diretorio, turma, capsys, falha):
+    sistema = turma(pim.SistemaAcademico(pim.ArmazenamentoSQLite()), alunos=1)
+    sequencia = sistema.sequencia
+    armazenamento = sistema.armazenamento
+    armazenamento.conexao = ConexaoComFalha(armazenamento.conexao, **falha)
+    with pytest.raises(OSError) as erro:
+        sistema.matricular_aluno('R0', 'D1')
+    assert isinstance(erro.value, FalhaBanco)
+    assert 'A alteração não foi gravada' in capsys.readouterr().out
+
+    armazenamento.conexao = armazenamento.conexao.conexao
+    assert not armazenamento.conexao.in_transaction
+    assert sistema.sequencia == sequencia
+    assert not sistema.esta_matriculado('R0', 'D1')
+    # A trava (BEGIN IMMEDIATE) foi liberada: a próxima operação grava normalmente
+    assert sistema.matricular_aluno('R0', 'D1')[0] == pim.MATRICULA_CONFIRMADA
+    assert pim.SistemaAcademico(pim.ArmazenamentoSQLite()).esta_matriculado('R0', 'D1')
+
+
+def test_migracao_preserva_a_ordem_das_aulas(pim, diretorio, turma):
+    sistema = turma(pim.SistemaAcademico(pim.ArmazenamentoJSON()), alunos=3)
+    for ra in ('R0', 'R1', 'R2'):
+        sistema.matricular_aluno(ra, 'D1')
+    # Aulas fora da ordem de data, e o primeiro aluno gravado (R0) só aparece a partir da segunda aula
+    sistema.registrar_frequencia_lote('D1', {'R1': 'P', 'R2': 'F'}, '2024-03-11 08:00')
+    sistema.registrar_frequencia_lote('D1', {'R0': 'F', 'R1': 'P', 'R2': 'P'}, '2024-03-04 08:00')
+    sistema.registrar_frequencia_lote('D1', {'R0': 'P', 'R2': 'P'}, '2024-03-18 08:00')
+    sistema.salvar_dados()
+
+    assert pim.migrar_json_para_sqlite()
+    banco = pim.SistemaAcademico(pim.ArmazenamentoSQLite())
+    assert banco.disciplinas['D1'].sessoes == sistema.disciplinas['D1'].sessoes
+    for ra in ('R0', 'R1', 'R2'):
+        assert list(banco.alunos[ra].frequencias['D1']) == list(sistema.alunos[ra].frequencias['D1'])
+        assert banco.historico_escolar(ra) == sistema.historico_escolar(ra)
+
+    # Aulas novas entram no fim da tabela, também depois de reabrir o banco
+    banco.registrar_frequencia_lote('D1', {'R0': 'P'}, '2024-02-26 08:00')
+    reaberto = pim.SistemaAcademico(pim.ArmazenamentoSQLite())
+    assert reaberto.disciplinas['D1'].sessoes == sistema.disciplinas['D1'].sessoes + ['2024-02-26 08:00']